@@ -0,0 +1,160 @@
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from mapfmclient import Problem
+
+from src.map_generation.map_parser import MapParser
+from src.solver.epeastar.epeastar import EPEAStar
+from src.solver.epeastar.frontier import FrontierType, create_frontier
+from src.solver.epeastar.heuristic import Heuristic
+from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.pdb_generator import PDB
+from src.solver.epeastar.search_options import SearchOptions
+from src.util.agent import Agent
+from src.util.coordinate import Coordinate
+from src.util.grid import Grid
+from src.util.node import Node
+from src.util.statistic_tracker import StatisticTracker
+
+# A trace contains the pushed node for every push and None for every pop
+Trace = List[Optional[Node]]
+
+
+class TraceComplete(Exception):
+    """
+    Raised when the maximum number of operations has been recorded
+    """
+
+
+class RecordingFrontier:
+    """
+    Open list that records all operations on the open list that it wraps.
+    """
+
+    def __init__(self, frontier, max_operations: int):
+        """
+        Constructs a RecordingFrontier instance
+        :param frontier:        The open list that performs the operations
+        :param max_operations:  Number of operations after which recording is stopped
+        """
+        self.frontier = frontier
+        self.max_operations = max_operations
+        self.trace: Trace = []
+
+    def push(self, node: Node) -> None:
+        self.record(node)
+        self.frontier.push(node)
+
+    def pop(self) -> Node:
+        self.record(None)
+        return self.frontier.pop()
+
+    def record(self, node: Optional[Node]) -> None:
+        if len(self.trace) >= self.max_operations:
+            raise TraceComplete()
+        self.trace.append(node)
+
+    def __len__(self):
+        return len(self.frontier)
+
+
+class RecordingEPEAStar(EPEAStar):
+    """
+    EPEA* solver that records the operations on its open list.
+    """
+
+    def __init__(self, *args, max_operations: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = None
+        self.max_operations = max_operations
+
+    def create_frontier(self):
+        self.recorder = RecordingFrontier(super().create_frontier(), self.max_operations)
+        return self.recorder
+
+
+def record_trace(problem: Problem, max_operations: int) -> Trace:
+    """
+    Records the open list operations of EPEA* (heuristic matching, no ID) on a problem instance
+    :param problem:         MAPFM problem instance
+    :param max_operations:  Maximum number of recorded operations
+    :return:                The recorded trace
+    """
+    grid = Grid(problem.width, problem.height, problem.grid)
+    heuristic = Heuristic(grid, problem.goals)
+    mapf_problem = MAPFProblem(problem.goals, PDB(heuristic, grid), heuristic)
+    agents = [Agent(Coordinate(s.x, s.y), s.color, i) for i, s in enumerate(problem.starts)]
+    solver = RecordingEPEAStar(mapf_problem, agents, [], StatisticTracker(),
+                               search_options=SearchOptions(packed_states=True), max_operations=max_operations)
+    try:
+        solver.solve()
+    except TraceComplete:
+        pass
+    return solver.recorder.trace
+
+
+def replay(trace: Trace, frontier_type: FrontierType) -> Tuple[float, int, int]:
+    """
+    Replays a trace on an empty open list
+    :param trace:           The trace
+    :param frontier_type:   Type of the open list
+    :return:                Operations per second, peak memory of the open list in bytes and peak number of nodes
+    """
+    # Timing run
+    frontier = create_frontier(frontier_type)
+    push = frontier.push
+    pop = frontier.pop
+    start = perf_counter()
+    for node in trace:
+        if node is None:
+            pop()
+        else:
+            push(node)
+    duration = perf_counter() - start
+
+    # Memory run. The nodes already exist, so only the memory of the open list itself is measured.
+    frontier = create_frontier(frontier_type)
+    peak_size = 0
+    tracemalloc.start()
+    for node in trace:
+        if node is None:
+            frontier.pop()
+        else:
+            frontier.push(node)
+            peak_size = max(peak_size, len(frontier))
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(trace) / duration, peak_memory, peak_size
+
+
+def run_benchmark(map_root: str, map_sets: List[str], maps_per_set: int, max_operations: int) -> None:
+    """
+    Compares the open list implementations on the traces of problem instances and prints the results
+    :param map_root:        Root folder of the benchmark maps
+    :param map_sets:        Names of the map sets
+    :param maps_per_set:    Number of maps that is used from every map set
+    :param max_operations:  Maximum number of recorded operations per map
+    """
+    parser = MapParser(map_root)
+    print("map set, map, frontier, operations, operations per second, peak memory (bytes), peak size")
+    for map_set in map_sets:
+        totals = dict((frontier_type, [0.0, 0, 0]) for frontier_type in FrontierType)
+        for name, problem in sorted(parser.parse_batch(map_set))[:maps_per_set]:
+            trace = record_trace(problem, max_operations)
+            for frontier_type in FrontierType:
+                ops, memory, size = replay(trace, frontier_type)
+                print(f"{map_set}, {name}, {frontier_type.value}, {len(trace)}, {ops:.0f}, {memory}, {size}")
+                totals[frontier_type][0] += ops
+                totals[frontier_type][1] = max(totals[frontier_type][1], memory)
+                totals[frontier_type][2] = max(totals[frontier_type][2], size)
+        for frontier_type, (ops, memory, size) in totals.items():
+            print(f"{map_set}, mean ops/s {ops / maps_per_set:.0f}, peak memory {memory / 1024:.1f} KiB, "
+                  f"peak size {size}, {frontier_type.value}")
+
+
+if __name__ == '__main__':
+    # Usage: python -m src.benchmarks.frontier_benchmark [map set ...]
+    sets = sys.argv[1:] if len(sys.argv) > 1 else ['Maze-20x20-A3_T1', 'Obstacle-20x20-A4_T3']
+    run_benchmark('maps', sets, maps_per_set=10, max_operations=200000)
@@ -0,0 +1,91 @@
+import random
+import sys
+from time import perf_counter
+from typing import List, Tuple
+
+from mapfmclient import Problem
+
+from src.map_generation.map_parser import MapParser
+from src.solver.epeastar.heuristic import Heuristic
+from src.solver.epeastar.operator_finder import OperatorFinder
+from src.solver.epeastar.pdb_generator import PDB, PDBTable
+from src.util.grid import Grid
+
+# Pattern database tables of every agent in a group and the Δf values for which operators are selected
+Call = Tuple[List[PDBTable], int]
+
+
+def sample_calls(problem: Problem, group_size: int, groups: int, max_delta_f: int, seed: int = 0) -> List[Call]:
+    """
+    Samples the operator finder calls of node expansions on a problem instance.
+    Every group consists of agents on random traversable cells with random colors. For every group, the operators are
+    selected for all Δf values that the operator finder reports, until max_delta_f is exceeded.
+    :param problem:     MAPFM problem instance
+    :param group_size:  Number of agents in a group
+    :param groups:      Number of sampled groups
+    :param max_delta_f: Maximum Δf value of a call
+    :param seed:        Seed of the random number generator
+    :return:            The sampled calls
+    """
+    grid = Grid(problem.width, problem.height, problem.grid)
+    heuristic = Heuristic(grid, problem.goals)
+    pdb = PDB(heuristic, grid)
+    rng = random.Random(seed)
+    colors = list(pdb.pdb.keys())
+    cells = [(x, y) for y in range(problem.height) for x in range(problem.width) if grid.traversable_coords(x, y)]
+
+    calls = []
+    for _ in range(groups):
+        tables = []
+        for x, y in rng.sample(cells, group_size):
+            table = pdb.pdb[rng.choice(colors)][y][x]
+            if table:
+                tables.append(table)
+        delta_f = 0
+        while delta_f <= max_delta_f:
+            calls.append((tables, delta_f))
+            operator_finder = OperatorFinder(delta_f, tables)
+            operator_finder.find_operators()
+            delta_f = operator_finder.next_target_value
+    return calls
+
+
+def time_calls(calls: List[Call], repetitions: int) -> float:
+    """
+    Measures the time of constructing an operator finder and finding the operators
+    :param calls:       The calls
+    :param repetitions: Number of times that all calls are executed
+    :return:            Mean time per call in microseconds
+    """
+    start = perf_counter()
+    for _ in range(repetitions):
+        for tables, delta_f in calls:
+            OperatorFinder(delta_f, tables).find_operators()
+    return (perf_counter() - start) / (len(calls) * repetitions) * 1e6
+
+
+def run_benchmark(map_root: str, map_name: str, group_sizes: List[int], groups: int, max_delta_f: int) -> None:
+    """
+    Measures the cost of an operator finder call for different group sizes and prints the results
+    :param map_root:    Root folder of the benchmark maps
+    :param map_name:    Name of the map
+    :param group_sizes: Group sizes that are measured
+    :param groups:      Number of sampled groups per group size
+    :param max_delta_f: Maximum Δf value of a call
+    """
+    problem = MapParser(map_root).parse_map(map_name)
+    print("group size, calls, mean operators per call, time per call (us)")
+    for group_size in group_sizes:
+        calls = sample_calls(problem, group_size, groups, max_delta_f)
+        operators = 0
+        for tables, delta_f in calls:
+            operator_finder = OperatorFinder(delta_f, tables)
+            operator_finder.find_operators()
+            operators += len(operator_finder.operators)
+        print(f"{group_size}, {len(calls)}, {operators / len(calls):.1f}, {time_calls(calls, repetitions=5):.2f}")
+
+
+if __name__ == '__main__':
+    # Usage: python -m src.benchmarks.operator_finder_benchmark [map]
+    name = sys.argv[1] if len(sys.argv) > 1 else 'Obstacle-20x20-A8_T3/Obstacle-20x20-A8_T3-000.map'
+    run_benchmark('maps', name, list(range(2, 13)), groups=50, max_delta_f=6)
@@ -0,0 +1,101 @@
+import sys
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from mapfmclient import Problem
+
+from src.map_generation.map_parser import MapParser
+from src.solver.epeastar.epeastar import EPEAStar
+from src.solver.epeastar.heuristic import Heuristic
+from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.parallel_epeastar import ParallelEPEAStar
+from src.solver.epeastar.pdb_generator import PDB
+from src.solver.epeastar.search_options import SearchOptions
+from src.util.agent import Agent
+from src.util.coordinate import Coordinate
+from src.util.deadline import Deadline, SolverTimeout
+from src.util.grid import Grid
+from src.util.statistic_tracker import StatisticTracker
+
+
+def create_search(problem: Problem) -> Tuple[MAPFProblem, List[Agent]]:
+    """
+    Creates the MAPF problem of a problem instance, in which all agents form a single group (heuristic matching)
+    :param problem: MAPFM problem instance
+    :return:        The MAPF problem and the agents
+    """
+    grid = Grid(problem.width, problem.height, problem.grid)
+    heuristic = Heuristic(grid, problem.goals)
+    mapf_problem = MAPFProblem(problem.goals, PDB(heuristic, grid), heuristic)
+    agents = [Agent(Coordinate(s.x, s.y), s.color, i) for i, s in enumerate(problem.starts)]
+    return mapf_problem, agents
+
+
+def time_search(mapf_problem: MAPFProblem, agents: List[Agent], workers: int,
+                time_limit: float) -> Tuple[Optional[int], float, int]:
+    """
+    Solves a problem with sequential EPEA* if workers is 0, otherwise with parallel EPEA*
+    :param mapf_problem:    The MAPF problem
+    :param agents:          The agents
+    :param workers:         Number of worker processes
+    :param time_limit:      Time limit of the search in seconds
+    :return:                Cost of the solution (None if not solved), time in seconds and number of expansions
+    """
+    stat_tracker = StatisticTracker()
+    search_options = SearchOptions(packed_states=True, workers=max(workers, 1))
+    deadline = Deadline(time_limit)
+    if workers == 0:
+        solver = EPEAStar(mapf_problem, agents, [], stat_tracker, search_options=search_options, deadline=deadline)
+    else:
+        solver = ParallelEPEAStar(mapf_problem, agents, [], stat_tracker, search_options=search_options,
+                                  deadline=deadline)
+    start = perf_counter()
+    try:
+        solution = solver.solve()
+    except SolverTimeout:
+        solution = None
+    duration = perf_counter() - start
+    return solution[1] if solution is not None else None, duration, stat_tracker.last_search.expanded
+
+
+def run_benchmark(map_root: str, map_sets: List[str], candidates: int, hardest: int, worker_counts: List[int],
+                  time_limit: float) -> None:
+    """
+    Measures the speedup of parallel EPEA* over sequential EPEA* on the hardest instances of map sets and prints the
+    results. The hardness of an instance is the number of expansions of sequential EPEA*. Instances that sequential
+    EPEA* can not solve within the time limit are skipped.
+    :param map_root:        Root folder of the benchmark maps
+    :param map_sets:        Names of the map sets
+    :param candidates:      Number of instances of every map set from which the hardest instances are selected
+    :param hardest:         Number of instances that is measured from every map set
+    :param worker_counts:   Numbers of workers that are measured
+    :param time_limit:      Time limit of a single search in seconds
+    """
+    parser = MapParser(map_root)
+    print("map set, map, workers, cost, time (s), expansions, speedup")
+    for map_set in map_sets:
+        instances = []
+        for name, problem in sorted(parser.parse_batch(map_set))[:candidates]:
+            mapf_problem, agents = create_search(problem)
+            cost, duration, expanded = time_search(mapf_problem, agents, 0, time_limit)
+            if cost is not None:
+                instances.append((expanded, name, mapf_problem, agents, cost, duration))
+        instances.sort(key=lambda instance: instance[0], reverse=True)
+
+        speedups = dict((workers, []) for workers in worker_counts)
+        for expanded, name, mapf_problem, agents, cost, sequential_time in instances[:hardest]:
+            print(f"{map_set}, {name}, 0, {cost}, {sequential_time:.3f}, {expanded}, 1.00")
+            for workers in worker_counts:
+                cost, duration, expanded = time_search(mapf_problem, agents, workers, time_limit)
+                speedup = sequential_time / duration
+                speedups[workers].append(speedup)
+                print(f"{map_set}, {name}, {workers}, {cost}, {duration:.3f}, {expanded}, {speedup:.2f}")
+        for workers, values in speedups.items():
+            if values:
+                print(f"{map_set}, mean speedup with {workers} workers: {sum(values) / len(values):.2f}")
+
+
+if __name__ == '__main__':
+    # Usage: python -m src.benchmarks.parallel_benchmark [map set ...]
+    sets = sys.argv[1:] if len(sys.argv) > 1 else ['Maze-20x20-A8_T3', 'Maze-20x20-A10_T3']
+    run_benchmark('maps', sets, candidates=50, hardest=3, worker_counts=[1, 2, 4, 8, 16], time_limit=120)
@@ -1,14 +1,16 @@
+import json
 import sys
 from multiprocessing import Pool
 from time import process_time, time
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 
-from func_timeout import func_timeout, FunctionTimedOut
 from mapfmclient import Problem
 
 from src.map_generation.map_parser import MapParser
 from src.solver.algorithm_descriptor import AlgorithmDescriptor, Algorithm
+from src.solver.epeastar.search_options import SearchOptions
 from src.solver.solver import Solver
+from src.util.deadline import Deadline
 from src.util.path import Path
 from src.util.statistic_tracker import StatisticTracker
 
@@ -54,22 +56,27 @@ class Dummy:
 
     __author__ = 'ivardb'
 
-    def __init__(self, time_out, end_time):
+    def __init__(self, time_out, end_time, profile=False, records=False):
         """
         Creates the Dummy object
         :param time_out:    The amount of time that the solver is allowed to use to solve the instance
         :param end_time:    Time after which benchmarking must be ceased
+        :param profile:     When set to true, the EPEA* searches are profiled
+        :param records:     When set to true, the statistics of every search and goal assignment are recorded
         """
         self.timeout = time_out
         self.end_time = end_time
+        self.profile = profile
+        self.records = records
 
-    def __call__(self, problem: Tuple[str, Problem]) -> Tuple[str, Optional[Tuple[float, int]]]:
+    def __call__(self, problem: Tuple[str, Problem]) -> Tuple[str, Optional[Tuple[float, int, Dict]]]:
         """
         Runs the benchmark
         :param problem:     Tuple of map name and MAPFM problem
-        :return:            Tuple of map name and optional tuple of runtime and amount of evaluated goal assignments
+        :return:            Tuple of map name and optional tuple of runtime, amount of evaluated goal assignments and
+                            all statistics of the run
         """
-        return problem[0], test(problem[1], self.timeout, self.end_time)
+        return problem[0], test(problem[1], self.timeout, self.end_time, self.profile, self.records)
 
 
 class MapRunner:
@@ -79,25 +86,39 @@ class MapRunner:
 
     __author__ = 'ivardb'
 
-    def __init__(self, map_root: str):
+    def __init__(self, map_root: str, profile: bool = False, records: bool = False):
         """
         Creates the MapRunner object.
         :param map_root:    Root folder of the benchmark maps
+        :param profile:     When set to true, the phase times and counters of the EPEA* searches are added to the
+                            statistics
+        :param records:     When set to true, the statistics of every search and goal assignment are added to the
+                            statistics instead of only the totals
         """
         self.map_root = map_root
         self.map_parser = MapParser(map_root)
+        self.profile = profile
+        self.records = records
 
-    def test_queue(self, time_out: float, benchmark_queue: BenchmarkQueue, output):
+    def test_queue(self, time_out: float, benchmark_queue: BenchmarkQueue, output, statistics_output=None):
         """
-
-        :param time_out:
-        :param benchmark_queue:
-        :param output:
+        Runs the solver on all map sets in the queue
+        :param time_out:            Time out for the solver
+        :param benchmark_queue:     Queue with the names of the map sets
+        :param output:              File to which the runtime and the amount of evaluated goal assignments of every
+                                    instance are appended
+        :param statistics_output:   File to which all statistics of every solved instance are appended as a JSON
+                                    object per line, not written if None
         """
         task = benchmark_queue.get_next()
         while task is not None and task != "":
             print(task)
             res = self.test_generated(time_out, task)
+            if statistics_output is not None:
+                with open(statistics_output, 'a') as f:
+                    for r in res:
+                        if r[1] is not None:
+                            f.write(json.dumps({'task': task, 'map': r[0], 'runtime': r[1][0], **r[1][2]}) + '\n')
             with open(output, 'a') as f:
                 for r in res:
                     if r[1] is not None:
@@ -117,56 +138,69 @@ class MapRunner:
         problems = self.map_parser.parse_batch(folder)
 
         with Pool(processes=processes) as p:
-            res = p.map(Dummy(time_out, end_time), problems)
+            res = p.map(Dummy(time_out, end_time, self.profile, self.records), problems)
         print()
         return res
 
 
-def test(problem: Problem, time_out: float, end_time: float) -> Optional[Tuple[float, int]]:
+def test(problem: Problem, time_out: float, end_time: float,
+         profile: bool = False, records: bool = False) -> Optional[Tuple[float, int, Dict]]:
     """
     Runs the solver on a problem instance.
     :param problem:     MAPFM problem instance
     :param time_out:    Time out for the solver
     :param end_time:    Time after which benchmarking should be ceased
-    :return:            Tuple of runtime and amount of evaluated goal assignments if solved within timeout
+    :param profile:     When set to true, the EPEA* searches are profiled
+    :param records:     When set to true, the statistics of every search and goal assignment are recorded
+    :return:            Tuple of runtime, amount of evaluated goal assignments and all statistics of the statistic
+                        tracker if solved within timeout
     """
     if time() > end_time:
         raise Exception('Out of time!')
     start_time = process_time()
-    solution = timeout(problem, time_out)
+    solution = timeout(problem, time_out, profile, records)
     print('.', end='', flush=True)
     if solution is not None:
         _, stat_tracker = solution
-        return process_time() - start_time, stat_tracker.assignment_evaluation
+        return process_time() - start_time, stat_tracker.assignment_evaluation, stat_tracker.as_dict()
     else:
         return None
 
 
-def timeout(current_problem: Problem, time_out) -> Optional[Tuple[List[Path], StatisticTracker]]:
+def timeout(current_problem: Problem, time_out, profile: bool = False,
+            records: bool = False) -> Optional[Tuple[List[Path], StatisticTracker]]:
     """
     Runs the solver on a problem instance.
     :param current_problem:     MAPFM problem instance
     :param time_out:            Time out for the solver
-    :return:                    Tuple of solution and statistic tracker
+    :param profile:             When set to true, the EPEA* searches are profiled
+    :param records:             When set to true, the statistics of every search and goal assignment are recorded
+    :return:                    Tuple of solution and statistic tracker, None if the solver timed out
     """
     try:
-        sol, stat_tracker = func_timeout(time_out, solve, args=[current_problem])
-    except FunctionTimedOut:
-        return None
+        sol, stat_tracker = solve(current_problem, Deadline(time_out), profile, records)
     except Exception as e:
         print(f"An error occurred while running: {e}")
         return None
+    if stat_tracker.timed_out:
+        return None
     return sol, stat_tracker
 
 
-def solve(starting_problem: Problem) -> Tuple[Optional[List[Path]], StatisticTracker]:
+def solve(starting_problem: Problem, deadline: Optional[Deadline] = None,
+          profile: bool = False, records: bool = False) -> Tuple[Optional[List[Path]], StatisticTracker]:
     """
     Solves the given MAPFM problem instance.
     :param starting_problem:    MAPFM problem instance
+    :param deadline:            Deadline after which the solver stops
+    :param profile:             When set to true, the EPEA* searches are profiled in the statistic tracker
+    :param records:             When set to true, the statistic tracker records every search and goal assignment
     :return:                    Tuple with solution if found and statistic tracker
     """
     solver = Solver(starting_problem,
-                    AlgorithmDescriptor(Algorithm.HeuristicMatching, independence_detection=True))
+                    AlgorithmDescriptor(Algorithm.HeuristicMatching, independence_detection=True,
+                                        search_options=SearchOptions(profile=profile, record_statistics=records)),
+                    deadline)
     return solver.solve()
 
 
@@ -175,7 +209,9 @@ if __name__ == "__main__":
     run_minutes = float(sys.argv[1])
     end_time = time() + (run_minutes * 60)
     processes = int(sys.argv[2])
+    profile_searches = 'profile' in sys.argv[3:]
+    record_statistics = 'records' in sys.argv[3:]
     map_root = "maps"
     queue = BenchmarkQueue("queue.txt")
-    runner = MapRunner(map_root)
-    runner.test_queue(120, queue, "results.txt")
+    runner = MapRunner(map_root, profile_searches, record_statistics)
+    runner.test_queue(120, queue, "results.txt", "statistics.jsonl")
@@ -1,4 +1,7 @@
 from enum import Enum
+from typing import Optional
+
+from src.solver.epeastar.search_options import SearchOptions
 
 
 class Algorithm(Enum):
@@ -16,18 +19,21 @@ class AlgorithmDescriptor:
     Descriptor for EPEA*-algorithms for solving MAPFM
     """
 
-    def __init__(self, algorithm: Algorithm, independence_detection: bool):
+    def __init__(self, algorithm: Algorithm, independence_detection: bool,
+                 search_options: Optional[SearchOptions] = None):
         """
         Constructs an AlgorithmDescriptor instance
         :param algorithm:               The type of EPEA* algorithm
         :param independence_detection:  When set to true, EPEA* will use ID
+        :param search_options:          Options that select the low-level search: a variant of EPEA* or EPE-IDA*
         """
         self.algorithm = algorithm
         self.id = independence_detection
+        self.search_options = search_options if search_options is not None else SearchOptions()
 
     def get_name(self):
         """
         Creates a textual description of the algorithm
         :return:    String with algorithm description
         """
-        return f"{self.algorithm.value}{' with ID' if self.id else ''}"
+        return f"{self.algorithm.value}{' with ID' if self.id else ''}{self.search_options.get_name()}"
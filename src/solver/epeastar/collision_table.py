@@ -0,0 +1,71 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.util.cat import CAT
+
+
+class CollisionTable:
+    """
+    Dense version of a list of collision avoidance tables for the batched evaluation of children.
+    For every time step, the table contains the number of collisions of every grid cell as a NumPy array, so the
+    collisions of a batch of packed states are a single sum over the rows of the table. The counts are the same as
+    those of CAT.get_cat. The table is built for a single call of EPEA*, since the CATs change between searches.
+    """
+
+    __slots__ = 'num_cells', 'counts', 'finished', 'rows', 'lists'
+
+    def __init__(self, cats: List[CAT], ignored_paths: List[int], width: int, num_cells: int):
+        """
+        Constructs a CollisionTable instance
+        :param cats:            Collision avoidance tables
+        :param ignored_paths:   Identifiers of the paths that should be ignored
+        :param width:           Width of the grid
+        :param num_cells:       Number of grid cells
+        """
+        self.num_cells = num_cells
+        # Cells and times of the paths of the agents that are not ignored
+        self.counts: Dict[int, List[int]] = dict()
+        # Cells and lengths of the paths for which collisions are counted after they have ended
+        self.finished: List[Tuple[int, int]] = []
+        for cat in cats:
+            if not cat.active:
+                continue
+            identifiers = set(agent.identifier for agent in cat.agents if agent.identifier not in ignored_paths)
+            for y, row in enumerate(cat.cat):
+                for x, entries in enumerate(row):
+                    cell = y * width + x
+                    for identifier, time in entries:
+                        if identifier in identifiers:
+                            self.counts.setdefault(time, []).append(cell)
+                    for identifier, length in cat.length.items():
+                        if (identifier, length) in entries:
+                            self.finished.append((length, cell))
+        self.rows: Dict[int, np.ndarray] = dict()
+        self.lists: Dict[int, List[int]] = dict()
+
+    def get_row(self, time: int) -> np.ndarray:
+        """
+        Looks up the number of collisions of every cell at a time step
+        :param time:    The time step
+        :return:        Array with the number of collisions of every cell
+        """
+        row = self.rows.get(time)
+        if row is None:
+            cells = list(self.counts.get(time, ()))
+            cells.extend(cell for length, cell in self.finished if time > length)
+            row = np.bincount(np.array(cells, dtype=np.intp), minlength=self.num_cells).astype(np.int32)
+            self.rows[time] = row
+        return row
+
+    def get_list(self, time: int) -> List[int]:
+        """
+        Looks up the number of collisions of every cell at a time step as a list, which is faster to index per child
+        :param time:    The time step
+        :return:        List with the number of collisions of every cell
+        """
+        collisions = self.lists.get(time)
+        if collisions is None:
+            collisions = self.get_row(time).tolist()
+            self.lists[time] = collisions
+        return collisions
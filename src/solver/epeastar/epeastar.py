@@ -1,15 +1,44 @@
 from __future__ import annotations
 
-from heapq import heappush, heappop
-from typing import List, Optional, Tuple
+from time import perf_counter
+from typing import List, Optional, Tuple, Dict, Set
 
-from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.collision_table import CollisionTable
+from src.solver.epeastar.frontier import create_frontier
+from src.solver.epeastar.mapf_problem import MAPFProblem, COST_SHIFT, FULLY_EXPANDED
+from src.solver.epeastar.packed_mapf_problem import PackedMAPFProblem
+from src.solver.epeastar.search_options import SearchOptions
+from src.solver.epeastar.search_profile import SearchProfile
+from src.solver.epeastar.spill_frontier import SpillFrontier
 from src.util.agent import Agent
 from src.util.cat import CAT
-from src.util.node import Node
+from src.util.deadline import Deadline
+from src.util.node import Node, ODNode, SubdimensionalNode
+from src.util.node_arena import NodeArena
 from src.util.path import Path
-from src.util.state import State
-from src.util.statistic_tracker import StatisticTracker
+from src.util.state import State, PackedState
+from src.util.statistic_tracker import StatisticTracker, SearchStatistics
+
+# Fraction of the node limit to which the search tree is reduced when the node limit is reached
+COLLAPSE_RATIO = 0.75
+
+
+class CollisionSetEntry:
+    """
+    Collision set of a state with subdimensional expansion, together with the states from which it has been reached
+    (its back-propagation set) and its current node
+    """
+
+    __slots__ = 'collision_set', 'parents', 'node'
+
+    def __init__(self, node: Optional[Node] = None):
+        """
+        Constructs a CollisionSetEntry with an empty collision set
+        :param node:    The node of the state, if it has been added to the open list
+        """
+        self.collision_set = 0
+        self.parents: Set[PackedState] = set()
+        self.node = node
 
 
 def get_path(node: Node) -> List[Node]:
@@ -49,72 +78,517 @@ class EPEAStar:
                  agents: List[Agent],
                  cats: List[CAT],
                  stat_tracker: StatisticTracker,
-                 max_cost=float('inf')):
+                 max_cost=float('inf'),
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None,
+                 resumable: bool = False):
         """
         Constructs an EPEAStar instance.
-        :param problem:     The MAPFProblem that should be solved
-        :param agents:      The moving agents
-        :param cats:        Collision avoidance tables
-        :param stat_tracker:Statistic tracker
-        :param max_cost:    The maximum cost of the solution. Stop the solver if exceeded.
-        """
-        self.problem = problem
-        initial_state = State(agents)
+        :param problem:         The MAPFProblem that should be solved
+        :param agents:          The moving agents
+        :param cats:            Collision avoidance tables
+        :param stat_tracker:    Statistic tracker
+        :param max_cost:        The maximum cost of the solution. Stop the solver if exceeded.
+        :param search_options:  Options that select the variant of EPEA*
+        :param deadline:        Deadline after which the search is aborted with SolverTimeout
+        :param resumable:       When set to true, the search is suspended instead of discarded when the maximum cost is
+                                reached, so it can be resumed with a higher maximum cost by calling solve again
+        """
+        self.search_options = search_options if search_options is not None else SearchOptions()
+        self.node_limit = self.search_options.node_limit if not self.search_options.operator_decomposition else 0
+        # Spilled nodes are stored as packed states that refer to their parent in the node arena
+        self.spill_distance = self.search_options.spill_distance if self.node_limit == 0 and \
+            self.search_options.focal_weight == 1 and not self.search_options.operator_decomposition else 0
+        self.subdimensional = self.search_options.subdimensional_expansion and self.node_limit == 0 and \
+            self.spill_distance == 0 and not self.search_options.operator_decomposition
+        self.packed_states = self.search_options.packed_states or self.search_options.operator_decomposition or \
+            self.search_options.batch_children or self.spill_distance > 0 or self.subdimensional
+        if self.packed_states:
+            self.problem = PackedMAPFProblem(problem, agents)
+            initial_state = self.problem.initial_state
+            waiting_costs = tuple(agent.waiting_cost for agent in agents)
+        else:
+            self.problem = problem
+            initial_state = State(agents)
+            waiting_costs = None
         self.cats = cats
-        self.initial_node = Node(initial_state, len(agents), self.problem.get_heuristic(initial_state), 0, 0)
+        self.agents = agents
+        self.ignored_paths = [agent.identifier for agent in agents]
+        self.num_agents = len(agents)
+        self.node_class = self.search_options.get_node_class(self.subdimensional)
+        self.initial_node = self.node_class(initial_state, len(agents), self.problem.get_heuristic(initial_state), 0, 0,
+                                            waiting_costs=waiting_costs,
+                                            agents_on_goal=self.problem.count_agents_on_goal(initial_state))
         self.stat_tracker = stat_tracker
         self.max_cost = max_cost
+        self.bounded = False
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.compact_parents = (self.search_options.compact_parents or self.spill_distance > 0) and \
+            self.node_limit == 0 and not self.search_options.operator_decomposition
+        # Packed states are shared with the closed table, but the agents of other states can be freed
+        self.release_states = self.compact_parents and not self.packed_states
+        self.batch_children = self.search_options.batch_children and not self.search_options.operator_decomposition \
+            and not self.subdimensional
+        self.resumable = resumable
+        self.statistics: Optional[SearchStatistics] = None
+
+        # State of the search, which is kept between calls of solve if the search is resumable
+        self.frontier = None
+        self.closed: Optional[Dict] = None
+        self.arena: Optional[NodeArena] = None
+        self.collision_sets: Optional[Dict[PackedState, CollisionSetEntry]] = None
+        self.next_collapse = self.node_limit
+        # Nodes above the maximum cost that have been selected by focal search
+        self.suspended: List[Node] = []
+        self.solution: Optional[Tuple[List[Path], int]] = None
+        self.profile: Optional[SearchProfile] = None
+        if self.search_options.profile:
+            if stat_tracker.profile is None:
+                stat_tracker.profile = SearchProfile()
+            self.profile = stat_tracker.profile
 
     def solve(self) -> Optional[Tuple[List[Path], int]]:
         """
-        Solves the problem instance in self.problem
+        Solves the problem instance in self.problem.
+        With focal search, the cost of the solution is at most the focal weight times the optimal cost. The ratio
+        between the cost and the lower bound of the focal list, which is the lowest admissible value in the open list
+        (see get_admissible_value), is reported to the statistic tracker.
+        The statistics of the search are reported to the statistic tracker, also when the search is aborted. When
+        profiling is enabled, the phase times and counters of the search are added to the profile in the statistic
+        tracker.
+        A resumable search continues where the previous call stopped. Its solution is kept, so later calls return it
+        directly if its cost is below the maximum cost.
         :return: Path for every agent if a solution was found, otherwise None
         """
-        frontier = []
-        seen = set()  # Avoid re-adding states that already have been expanded at least once
-        fully_expanded = set()  # Avoid evaluating states that have been fully expanded already
-        heappush(frontier, self.initial_node)
+        self.statistics = SearchStatistics(self.num_agents)
+        start_time = perf_counter()
+        try:
+            if self.profile is None:
+                solution = self.search()
+            else:
+                with self.profile.instrument(self):
+                    solution = self.search()
+        finally:
+            self.statistics.time = perf_counter() - start_time
+            if self.closed is not None:
+                self.statistics.closed_size = max(self.statistics.closed_size, len(self.closed))
+            if not self.resumable or self.solution is not None:
+                self.release()
+            self.stat_tracker.search_finished(self.statistics)
+        if solution is not None:
+            self.statistics.cost = solution[1]
+        return solution
 
-        ignored_paths = [agent.identifier for agent in self.initial_node.state.agents]
+    def prepare(self, cats: List[CAT], max_cost) -> None:
+        """
+        Prepares a resumable search for another call of solve. The collisions of the nodes that are already in the open
+        list were counted with the old collision avoidance tables. They only break ties, so the search stays optimal.
+        :param cats:        Collision avoidance tables of the caller
+        :param max_cost:    The new maximum cost of the solution
+        """
+        self.cats = cats
+        self.max_cost = max_cost
+
+    def get_size(self) -> int:
+        """
+        Counts the nodes that are kept by a suspended search
+        :return:    Number of nodes in the open list, the closed table, the node arena and the collision sets
+        """
+        if self.frontier is None:
+            return 0
+        return len(self.frontier) + len(self.suspended) + len(self.closed) + \
+            (len(self.arena) if self.arena is not None else 0) + \
+            (len(self.collision_sets) if self.collision_sets is not None else 0)
 
-        nodes_expanded = 0
+    def release(self) -> None:
+        """
+        Frees the state of the search
+        """
+        self.frontier = None
+        self.closed = None
+        self.arena = None
+        self.collision_sets = None
+        self.suspended = []
+
+    def search(self) -> Optional[Tuple[List[Path], int]]:
+        """
+        Runs the main loop of EPEA*, or resumes it if the search has been suspended
+        :return: Path for every agent if a solution was found, otherwise None
+        """
+        if self.solution is not None:
+            return self.solution if self.solution[1] < self.max_cost else None
+        if self.frontier is None:
+            if self.initial_node.value >= self.max_cost:
+                return None
+            self.closed = {self.problem.get_key(self.initial_node.state): self.initial_node.cost << COST_SHIFT}
+            self.frontier = self.create_frontier()
+            if self.compact_parents:
+                self.arena = NodeArena(self.num_agents)
+                self.initial_node.parent = self.arena.add(-1, bytes(self.num_agents))
+            if self.subdimensional:
+                self.collision_sets = {self.initial_node.state: CollisionSetEntry(self.initial_node)}
+            self.frontier.push(self.initial_node)
+        frontier = self.frontier
+        closed = self.closed
+        arena = self.arena
+        for node in self.suspended:
+            frontier.push(node)
+        self.suspended = []
+
+        statistics = self.statistics
+        collision_table = None
+        if self.batch_children:
+            collision_table = CollisionTable(self.cats, self.ignored_paths, self.problem.tables.width,
+                                             len(self.problem.tables.coordinates))
         loop_counter = 0
+        next_collapse = self.next_collapse
+        check_interval = self.deadline.check_interval
         while frontier:
-            node = heappop(frontier)
-            if node.value >= self.max_cost:
+            if len(frontier) > statistics.frontier_peak:
+                statistics.frontier_peak = len(frontier)
+            lower_bound = frontier.get_lower_bound()
+            if lower_bound >= self.max_cost:
                 # Current solution will not improve existing solution
                 return None
+            node = frontier.pop()
+            if node.value >= self.max_cost:
+                # Focal search can select nodes above the lower bound, but these can not improve the solution either
+                if self.resumable:
+                    self.suspended.append(node)
+                continue
+
+            # Intermediate nodes of operator decomposition are not in the closed table and can not be a solution
+            if node.next_agent > 0:
+                next_value = self.expand_agent(node, closed, frontier)
+                # Nodes above the maximum cost are kept in the open list of a resumable search
+                if next_value < self.max_cost or (self.resumable and next_value != float('inf')):
+                    node.delta_f = next_value
+                    node.value = node.cost + node.heuristic + node.delta_f
+                    frontier.push(node)
+                continue
 
-            # Don't evaluate node if its state is already fully expanded
-            if node.state in fully_expanded:
+            # Don't evaluate node if its state is already fully expanded or has been reached with a lower cost
+            if self.release_states and node.delta_f > 0:
+                self.problem.restore_state(node, self.agents)
+            key = self.problem.get_key(node.state)
+            entry = closed[key]
+            if entry & FULLY_EXPANDED or node.cost > entry >> COST_SHIFT:
+                continue
+            if self.subdimensional and node.collision_set != self.collision_sets[key].collision_set:
+                # The collision set of the state has grown, so the state has been re-opened with a new node
                 continue
             loop_counter += 1
+            if loop_counter % check_interval == 0:
+                self.deadline.check()
 
             # Check if the current state is a solution to the problem
-            if self.problem.is_solved(node.state):
-                return convert_path(get_path(node)), node.cost
+            if self.search_options.debug_checks:
+                assert node.agents_on_goal == self.problem.count_agents_on_goal(node.state)
+            if node.agents_on_goal == self.num_agents:
+                self.stat_tracker.solution_found(node.cost, lower_bound)
+                if self.compact_parents:
+                    paths = self.problem.replay_path(self.agents, arena.get_moves(node.parent))
+                elif self.packed_states:
+                    paths = self.problem.convert_path(get_path(node))
+                else:
+                    paths = convert_path(get_path(node))
+                self.solution = paths, node.cost
+                return self.solution
+
+            if self.search_options.operator_decomposition:
+                next_value = self.expand_agent(node, closed, frontier)
+                statistics.expanded += 1
+                if node.delta_f > 0:
+                    statistics.re_expansions += 1
+                if next_value == float('inf'):
+                    closed[key] = (node.cost << COST_SHIFT) | FULLY_EXPANDED
+                elif next_value < self.max_cost or self.resumable:
+                    node.delta_f = next_value
+                    node.value = node.cost + node.heuristic + node.delta_f
+                    frontier.push(node)
+                continue
 
             # Expand the current node
-            child_states, next_value = self.problem.expand(node)
-            nodes_expanded += 1
-            for child_state, cost in child_states:
-                if child_state not in seen and child_state != node.state:
-                    # Create Node
-                    heuristic = self.problem.get_heuristic(child_state)
-                    time = node.time + 1
-                    collisions = 0
-                    for agent in child_state.agents:
-                        collisions += sum(cat.get_cat(ignored_paths, agent.coord, time) for cat in self.cats)
-                    child_node = Node(child_state, cost, heuristic, collisions, time, parent=node)
-
-                    seen.add(child_state)
-                    heappush(frontier, child_node)
+            # Conflicting children and duplicates that are not reached with a lower cost are already filtered out.
+            # Cheaper duplicates re-open their state, even if it has already been fully expanded.
+            if self.batch_children:
+                # All children of the partial expansion are evaluated at once and added to the open list
+                next_value = self.expand_batch(node, key, closed, frontier, arena, collision_table)
+                child_states = ()
+            elif self.subdimensional:
+                next_value = self.expand_subdimensional(node, key, closed, frontier, arena)
+                child_states = ()
+            else:
+                child_states, next_value = self.problem.expand(node, closed, self.search_options)
+            statistics.expanded += 1
+            if node.delta_f > 0:
+                statistics.re_expansions += 1
+
+            # The Δf values of the operators of every agent sum to the Δf value of the node. Since the Δf value of an
+            # operator is 1 plus the change in heuristic, all children have the same heuristic.
+            heuristic = node.heuristic + node.delta_f - self.num_agents
+            for child_key, child_state, cost, waiting_costs, agents_on_goal in child_states:
+                if self.search_options.debug_checks:
+                    assert heuristic == self.problem.get_heuristic(child_state)
+                    assert cost == self.problem.calculate_cost(node, child_state)
+
+                # Create Node
+                time = node.time + 1
+                collisions = self.problem.get_collisions(child_state, time, self.cats, self.ignored_paths)
+                # With compact parents, the node only refers to its own entry in the node arena
+                parent = arena.add(node.parent, self.problem.get_moves(key, child_key)) if arena is not None else node
+                child_node = self.node_class(child_state, cost, heuristic, collisions, time, parent=parent,
+                                             waiting_costs=waiting_costs, agents_on_goal=agents_on_goal)
+
+                closed[child_key] = cost << COST_SHIFT
+                frontier.push(child_node)
+                statistics.generated += 1
 
             # Check if the node can be expanded again
             if next_value == float('inf'):
-                fully_expanded.add(node.state)
-            elif next_value < self.max_cost:
+                # A state that has been re-opened with a larger collision set during the expansion stays open
+                if not self.subdimensional or node.collision_set == self.collision_sets[key].collision_set:
+                    closed[key] = (node.cost << COST_SHIFT) | FULLY_EXPANDED
+            elif next_value < self.max_cost or self.resumable:
                 node.delta_f = next_value
                 node.value = node.cost + node.heuristic + node.delta_f
-                heappush(frontier, node)
+                if self.release_states:
+                    self.problem.release_state(node, key)
+                frontier.push(node)
+
+            # Free memory if the node limit is reached
+            if 0 < next_collapse < len(frontier) + len(closed):
+                frontier = self.collapse(frontier, closed)
+                self.frontier = frontier
+                # If not enough leaves could be collapsed, continue unbounded for a while to avoid collapsing again
+                # after every expansion
+                next_collapse = max(self.node_limit, len(frontier) + len(closed) + self.node_limit // 4)
+                self.next_collapse = next_collapse
         return None
+
+    def expand_agent(self, node: Node, closed: Dict, frontier) -> int:
+        """
+        Expands a standard or intermediate node with operator decomposition and adds the children to the open list
+        :param node:        The node
+        :param closed:      Closed table of the search
+        :param frontier:    Open list of the search
+        :return:            The next Δf value of the node
+        """
+        agent = node.next_agent
+        child_states, next_value = self.problem.expand_agent(node, closed)
+
+        # The Δf value of a single agent operator is 1 plus the change in heuristic
+        heuristic = node.heuristic + node.delta_f - 1
+
+        # Intermediate nodes point to the standard node of their time step, so only standard nodes are in the path
+        base = node.parent if agent > 0 else node
+        for child_key, child_state, cost, waiting_costs, agents_on_goal in child_states:
+            if self.search_options.debug_checks:
+                assert heuristic == self.problem.get_heuristic(child_state)
+                assert agents_on_goal == self.problem.count_agents_on_goal(child_state)
+
+            time = base.time + 1
+            if child_key is None:
+                # Only the collisions of the agents that have moved are counted for intermediate nodes
+                collisions = (node.collisions if agent > 0 else 0) + \
+                    self.problem.get_agent_collisions(child_state[agent], time, self.cats, self.ignored_paths)
+                child_node = ODNode(child_state, cost, heuristic, collisions, base.time, parent=base,
+                                    waiting_costs=waiting_costs, agents_on_goal=agents_on_goal, next_agent=agent + 1)
+            else:
+                collisions = self.problem.get_collisions(child_state, time, self.cats, self.ignored_paths)
+                child_node = self.node_class(child_state, cost, heuristic, collisions, time, parent=base,
+                                             waiting_costs=waiting_costs, agents_on_goal=agents_on_goal)
+                closed[child_key] = cost << COST_SHIFT
+            frontier.push(child_node)
+            self.statistics.generated += 1
+        return next_value
+
+    def expand_batch(self, node: Node, key, closed: Dict, frontier, arena: Optional[NodeArena],
+                     collision_table: CollisionTable) -> int:
+        """
+        Expands a node with the batched evaluation of its children and adds the children to the open list
+        :param node:            The node
+        :param key:             Key of the state of the node
+        :param closed:          Closed table of the search
+        :param frontier:        Open list of the search
+        :param arena:           Node arena of the search if compact parents are used, otherwise None
+        :param collision_table: Collisions of every cell at every time step
+        :return:                The next Δf value of the node
+        """
+        child_states, next_value = self.problem.expand_batch(node, closed, self.search_options, collision_table)
+        heuristic = node.heuristic + node.delta_f - self.num_agents
+        time = node.time + 1
+        for child_state, cost, waiting_costs, agents_on_goal, collisions in child_states:
+            if self.search_options.debug_checks:
+                assert heuristic == self.problem.get_heuristic(child_state)
+                assert cost == self.problem.calculate_cost(node, child_state)
+                assert collisions == self.problem.get_collisions(child_state, time, self.cats, self.ignored_paths)
+                assert agents_on_goal == self.problem.count_agents_on_goal(child_state)
+
+            parent = arena.add(node.parent, self.problem.get_moves(key, child_state)) if arena is not None else node
+            child_node = self.node_class(child_state, cost, heuristic, collisions, time, parent=parent,
+                                         waiting_costs=waiting_costs, agents_on_goal=agents_on_goal)
+            closed[child_state] = cost << COST_SHIFT
+            frontier.push(child_node)
+            self.statistics.generated += 1
+        return next_value
+
+    def expand_subdimensional(self, node: Node, key: PackedState, closed: Dict, frontier,
+                              arena: Optional[NodeArena]) -> int:
+        """
+        Expands a node with subdimensional expansion (M*) and adds the children to the open list.
+        Only the agents in the collision set of the node branch, while the other agents follow their individually
+        optimal policy. The node is added to the back-propagation set of every child. A child with a conflict is not
+        added to the open list. Instead, the agents in the conflict are back-propagated to the node and its ancestors.
+        The collision set of a child that has been reached before is back-propagated as well.
+        :param node:        The node
+        :param key:         Key of the state of the node
+        :param closed:      Closed table of the search
+        :param frontier:    Open list of the search
+        :param arena:       Node arena of the search if compact parents are used, otherwise None
+        :return:            The next Δf value of the node
+        """
+        collision_sets = self.collision_sets
+        children, next_value = self.problem.get_children(node, node.delta_f, self.search_options, node.collision_set)
+        valid_children = []
+        for child_state in children:
+            entry = collision_sets.get(child_state)
+            conflicts = self.problem.get_conflicts(key, child_state)
+            if conflicts:
+                self.back_propagate(key, conflicts | (entry.collision_set if entry is not None else 0), closed,
+                                    frontier)
+                continue
+            if entry is None:
+                entry = CollisionSetEntry()
+                collision_sets[child_state] = entry
+            entry.parents.add(key)
+            if entry.collision_set:
+                self.back_propagate(key, entry.collision_set, closed, frontier)
+            valid_children.append(child_state)
+
+        heuristic = node.heuristic + node.delta_f - self.num_agents
+        time = node.time + 1
+        for _, child_state, cost, waiting_costs, agents_on_goal in self.problem.select_children(node, valid_children,
+                                                                                               closed, False):
+            if self.search_options.debug_checks:
+                assert heuristic == self.problem.get_heuristic(child_state)
+                assert cost == self.problem.calculate_cost(node, child_state)
+
+            collisions = self.problem.get_collisions(child_state, time, self.cats, self.ignored_paths)
+            parent = arena.add(node.parent, self.problem.get_moves(key, child_state)) if arena is not None else node
+            child_node = self.node_class(child_state, cost, heuristic, collisions, time, parent=parent,
+                                         waiting_costs=waiting_costs, agents_on_goal=agents_on_goal)
+            entry = collision_sets[child_state]
+            child_node.collision_set = entry.collision_set
+            entry.node = child_node
+            closed[child_state] = cost << COST_SHIFT
+            frontier.push(child_node)
+            self.statistics.generated += 1
+        return next_value
+
+    def back_propagate(self, state: PackedState, collision_set: int, closed: Dict, frontier) -> None:
+        """
+        Adds agents to the collision set of a state and to the collision sets of all states in its back-propagation
+        set, recursively. A state whose collision set grows is re-opened with a new node, so it is expanded again with
+        the additional agents branching. The closed entry of the state is reset, since it may have been fully expanded.
+        :param state:           The state
+        :param collision_set:   Bit mask of the agents that are added
+        :param closed:          Closed table of the search
+        :param frontier:        Open list of the search
+        """
+        stack = [(state, collision_set)]
+        while stack:
+            state, collision_set = stack.pop()
+            entry = self.collision_sets[state]
+            if not collision_set & ~entry.collision_set:
+                continue
+            entry.collision_set |= collision_set
+            node = entry.node
+            reopened = SubdimensionalNode(node.state, node.cost, node.heuristic, node.collisions, node.time,
+                                          parent=node.parent, waiting_costs=node.waiting_costs,
+                                          agents_on_goal=node.agents_on_goal)
+            reopened.collision_set = entry.collision_set
+            entry.node = reopened
+            closed[state] = node.cost << COST_SHIFT
+            frontier.push(reopened)
+            stack.extend((parent, entry.collision_set) for parent in entry.parents)
+
+    def collapse(self, frontier, closed: Dict):
+        """
+        Collapses the worst leaves of the search tree into their parents until the number of nodes in the open list and
+        the closed table is below COLLAPSE_RATIO times the node limit (SMA*).
+        A leaf is a node in the open list that has not been expanded yet. Leaves that can be selected next, because they
+        have the lowest f-value or are within the focal bound, are never collapsed, so the search always makes progress.
+        The closed entry of a collapsed leaf is removed and its parent is re-opened with the backed-up f-value of its
+        forgotten children as Δf value. This Δf value is at most the Δf value of the layer that generated a child, so
+        the parent generates its forgotten children again when it is expanded. Since the parent is not selected after
+        its forgotten children would have been, the search stays optimal.
+        :param frontier:    Open list of the search
+        :param closed:      Closed table of the search
+        :return:            New open list that contains the remaining nodes and the re-opened parents
+        """
+        if not self.bounded:
+            self.bounded = True
+            self.stat_tracker.search_bounded()
+        self.statistics.closed_size = max(self.statistics.closed_size, len(closed))
+        # Nodes up to this value can be selected next. With focal search, this is the bound of the focal list.
+        best_value = int(self.search_options.focal_weight * frontier.get_lower_bound())
+        nodes = list(frontier)
+        excess = len(nodes) + len(closed) - int(self.node_limit * COLLAPSE_RATIO)
+        leaves = sorted((node for node in nodes if node.delta_f == 0 and node.parent is not None
+                         and node.value > best_value), reverse=True)
+
+        collapsed = set()
+        parents: Dict[int, Tuple[Node, int]] = dict()
+        for leaf in leaves:
+            if excess <= 0:
+                break
+            parent = leaf.parent
+            parent_entry = closed.get(self.problem.get_key(parent.state))
+            if parent_entry is None or parent.cost != parent_entry >> COST_SHIFT:
+                # The parent has been collapsed itself or has been reached with a lower cost, so it can not be re-opened
+                continue
+            key = self.problem.get_key(leaf.state)
+            entry = closed[key]
+            collapsed.add(id(leaf))
+            excess -= 1
+            if entry & FULLY_EXPANDED or leaf.cost > entry >> COST_SHIFT:
+                # Outdated leaf, its state is kept by a node with a lower cost
+                continue
+            del closed[key]
+            excess -= 1
+            delta_f = leaf.value - parent.cost - parent.heuristic
+            if id(parent) in parents:
+                delta_f = min(delta_f, parents[id(parent)][1])
+            parents[id(parent)] = (parent, delta_f)
+
+        remaining = [node for node in nodes if id(node) not in collapsed]
+        in_frontier = set(id(node) for node in remaining)
+        for parent, delta_f in parents.values():
+            closed[self.problem.get_key(parent.state)] = parent.cost << COST_SHIFT
+            if id(parent) in in_frontier:
+                parent.delta_f = min(parent.delta_f, delta_f)
+            else:
+                parent.delta_f = delta_f
+                remaining.append(parent)
+            parent.value = parent.cost + parent.heuristic + parent.delta_f
+        self.stat_tracker.nodes_collapsed(len(collapsed))
+        if self.profile is not None:
+            self.profile.reopened.update(parent for parent, _ in parents.values())
+
+        frontier = self.create_frontier()
+        for node in remaining:
+            frontier.push(node)
+        return frontier
+
+    def create_frontier(self):
+        """
+        Creates the open list that is selected in the search options, which spills nodes to disk if a spill distance is
+        set
+        :return:    Empty open list
+        """
+        frontier = create_frontier(self.search_options.frontier, self.search_options.focal_weight)
+        if self.spill_distance > 0:
+            return SpillFrontier(frontier, self.closed, self.spill_distance, self.num_agents, self.node_class,
+                                 self.stat_tracker, self.search_options.spill_directory)
+        return frontier
@@ -0,0 +1,201 @@
+from time import perf_counter
+from typing import List, Optional, Tuple, Dict, Iterator, Set
+
+from src.solver.epeastar.frontier import get_admissible_value
+from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.packed_mapf_problem import PackedMAPFProblem
+from src.solver.epeastar.search_options import SearchOptions
+from src.util.agent import Agent
+from src.util.cat import CAT
+from src.util.deadline import Deadline
+from src.util.node import Node
+from src.util.path import Path
+from src.util.state import PackedState
+from src.util.statistic_tracker import StatisticTracker, SearchStatistics
+
+
+class EPEIDAStar:
+    """
+    Enhanced Partial Expansion Iterative Deepening A* (EPE-IDA*).
+    Low-memory counterpart of EPEA*, which runs depth-first passes that are bounded by a threshold on the admissible
+    value of the nodes (see get_admissible_value). A node is expanded one Δf layer at a time, and only the layers that
+    keep the admissible value within the threshold are generated. The lowest admissible value of a layer above the
+    threshold is the threshold of the next pass. The children of a layer are searched in the order of their collisions
+    with the collision avoidance tables.
+    Since every solution passes through a layer that was cut off in the previous pass, the threshold never exceeds the
+    optimal cost. Waiting on a goal adds to Δf but not to the cost, so a layer within the threshold can still generate
+    a solution with a cost above it. Such a solution is not returned, and its cost is a candidate for the next
+    threshold instead, so the first solution with a cost within the threshold is optimal.
+    Only the nodes on the current path and the remaining children of their layers are kept, so the memory grows with
+    the depth of the solution instead of the number of explored states. States on the current path are never
+    generated again. An optional transposition table of bounded size skips states that have been reached with a lower
+    cost, or with the same cost in the same pass.
+    """
+
+    def __init__(self,
+                 problem: MAPFProblem,
+                 agents: List[Agent],
+                 cats: List[CAT],
+                 stat_tracker: StatisticTracker,
+                 max_cost=float('inf'),
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None):
+        """
+        Constructs an EPEIDAStar instance.
+        :param problem:         The MAPFProblem that should be solved
+        :param agents:          The moving agents
+        :param cats:            Collision avoidance tables
+        :param stat_tracker:    Statistic tracker
+        :param max_cost:        The maximum cost of the solution. Stop the solver if exceeded.
+        :param search_options:  Options that select the variant of EPEA*. Always uses packed states.
+        :param deadline:        Deadline after which the search is aborted with SolverTimeout
+        """
+        self.search_options = search_options if search_options is not None else SearchOptions()
+        self.problem = PackedMAPFProblem(problem, agents)
+        self.agents = agents
+        self.cats = cats
+        self.ignored_paths = [agent.identifier for agent in agents]
+        self.num_agents = len(agents)
+        self.stat_tracker = stat_tracker
+        self.max_cost = max_cost
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.table_size = self.search_options.transposition_table_size
+        # Lowest cost of every state in the transposition table and the threshold of the pass in which it was reached
+        self.table: Dict[PackedState, Tuple[int, int]] = dict()
+        self.path_states: Set[PackedState] = set()
+        self.next_threshold = float('inf')
+        self.statistics: Optional[SearchStatistics] = None
+        self.node_class = self.search_options.get_node_class()
+
+    def solve(self) -> Optional[Tuple[List[Path], int]]:
+        """
+        Solves the problem instance in self.problem.
+        The statistics of the search are reported to the statistic tracker, also when the search is aborted. The
+        frontier peak is the deepest path of the search.
+        :return: Path for every agent if a solution was found, otherwise None
+        """
+        self.statistics = SearchStatistics(self.num_agents)
+        start_time = perf_counter()
+        try:
+            solution = self.search()
+        finally:
+            self.statistics.time = perf_counter() - start_time
+            self.statistics.closed_size = len(self.table)
+            self.table = dict()
+            self.path_states = set()
+            self.stat_tracker.search_finished(self.statistics)
+        if solution is not None:
+            self.statistics.cost = solution[1]
+        return solution
+
+    def search(self) -> Optional[Tuple[List[Path], int]]:
+        """
+        Runs depth-first passes with increasing thresholds until a solution is found or the threshold reaches the
+        maximum cost
+        :return: Path for every agent if a solution was found, otherwise None
+        """
+        initial_state = self.problem.initial_state
+        root = self.node_class(initial_state, self.num_agents, self.problem.get_heuristic(initial_state), 0, 0,
+                               waiting_costs=tuple(agent.waiting_cost for agent in self.agents),
+                               agents_on_goal=self.problem.count_agents_on_goal(initial_state))
+        threshold = root.value
+        while threshold < self.max_cost:
+            self.next_threshold = float('inf')
+            nodes = self.search_pass(root, threshold)
+            if nodes is not None:
+                self.stat_tracker.solution_found(nodes[-1].cost, threshold)
+                return self.problem.convert_states([node.state for node in nodes]), nodes[-1].cost
+            threshold = self.next_threshold
+        return None
+
+    def search_pass(self, root: Node, threshold: int) -> Optional[List[Node]]:
+        """
+        Searches depth-first for a solution within the threshold
+        :param root:        The node of the initial state
+        :param threshold:   Maximum admissible value of an expanded layer
+        :return:            Nodes on the path to the first solution with a cost within the threshold, or None if there
+                            is no such solution
+        """
+        if root.agents_on_goal == self.num_agents:
+            return [root]
+        statistics = self.statistics
+        path_states = self.path_states
+        path_states.add(root.state)
+        stack: List[Tuple[Node, Iterator[Node]]] = [(root, self.generate(root, threshold))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                path_states.discard(node.state)
+                continue
+            if child.agents_on_goal == self.num_agents:
+                if child.cost <= threshold:
+                    return [frame[0] for frame in stack] + [child]
+                self.next_threshold = min(self.next_threshold, child.cost)
+                continue
+            path_states.add(child.state)
+            stack.append((child, self.generate(child, threshold)))
+            if len(stack) > statistics.frontier_peak:
+                statistics.frontier_peak = len(stack)
+        return None
+
+    def generate(self, node: Node, threshold: int) -> Iterator[Node]:
+        """
+        Expands a node one Δf layer at a time while its admissible value is within the threshold. The next layer is
+        only expanded when the children of the previous layer have been searched.
+        :param node:        The node
+        :param threshold:   Maximum admissible value of an expanded layer
+        :return:            Iterator over the children of the node
+        """
+        problem = self.problem
+        statistics = self.statistics
+        # Duplicates are detected with the path and the transposition table instead of a closed table
+        closed = dict()
+        node.delta_f = 0
+        node.value = node.cost + node.heuristic
+        time = node.time + 1
+        while get_admissible_value(node) <= threshold:
+            child_states, next_value = problem.expand(node, closed, self.search_options)
+            statistics.expanded += 1
+            if statistics.expanded % self.deadline.check_interval == 0:
+                self.deadline.check()
+            if node.delta_f > 0:
+                statistics.re_expansions += 1
+
+            heuristic = node.heuristic + node.delta_f - self.num_agents
+            layer = []
+            for _, child_state, cost, waiting_costs, agents_on_goal in child_states:
+                if child_state in self.path_states or not self.visit(child_state, cost, threshold):
+                    continue
+                collisions = problem.get_collisions(child_state, time, self.cats, self.ignored_paths)
+                layer.append(self.node_class(child_state, cost, heuristic, collisions, time,
+                                             waiting_costs=waiting_costs, agents_on_goal=agents_on_goal))
+            statistics.generated += len(layer)
+            layer.sort(key=lambda child: child.collisions)
+            yield from layer
+
+            if next_value == float('inf'):
+                return
+            node.delta_f = next_value
+            node.value = node.cost + node.heuristic + node.delta_f
+        self.next_threshold = min(self.next_threshold, get_admissible_value(node))
+
+    def visit(self, state: PackedState, cost: int, threshold: int) -> bool:
+        """
+        Checks a child state against the transposition table and records its cost
+        :param state:       The child state
+        :param cost:        The cost of the child
+        :param threshold:   Threshold of the current pass
+        :return:            False if the state has been reached with a lower cost, or with the same cost in this pass
+        """
+        if self.table_size == 0:
+            return True
+        entry = self.table.get(state)
+        if entry is not None:
+            if entry[0] < cost or entry == (cost, threshold):
+                return False
+            self.table[state] = (cost, threshold)
+        elif len(self.table) < self.table_size:
+            self.table[state] = (cost, threshold)
+        return True
@@ -0,0 +1,251 @@
+import itertools
+from enum import Enum
+from heapq import heappush, heappop
+from typing import Dict, List, Iterator, Tuple
+
+from src.util.node import Node
+
+# Number of bits reserved for the collisions and the heuristic in a packed priority key
+KEY_BITS = 24
+KEY_MASK = (1 << KEY_BITS) - 1
+
+
+def get_admissible_value(node: Node) -> int:
+    """
+    Computes a lower bound on the cost of every solution that can be found from a node in the open list.
+    The value of a node that is not partially expanded is its cost plus the admissible heuristic. The value of a
+    partially expanded node includes the Δf value of its next layer, in which every agent on a goal that waits adds 1
+    to Δf but nothing to the cost, so these agents are subtracted.
+    :param node:    The node
+    :return:        The lower bound
+    """
+    return node.value - node.agents_on_goal if node.delta_f > 0 else node.value
+
+
+class FrontierType(Enum):
+    """
+    Enum of the different open list implementations of EPEA*
+    """
+    Heap = 'heap'
+    Bucket = 'bucket'
+
+
+def create_frontier(frontier_type: FrontierType, focal_weight: float = 1.0):
+    """
+    Creates an empty open list
+    :param frontier_type:   Type of the open list. Ignored for focal search.
+    :param focal_weight:    Suboptimality factor of focal search. Focal search is used if the factor is above 1.
+    :return:                The open list
+    """
+    if focal_weight > 1:
+        return FocalFrontier(focal_weight)
+    if frontier_type is FrontierType.Bucket:
+        return BucketFrontier()
+    return HeapFrontier()
+
+
+class HeapFrontier:
+    """
+    Open list that stores nodes in a binary heap. Nodes are ordered with Node.__lt__.
+    """
+
+    __slots__ = 'heap'
+
+    def __init__(self):
+        self.heap: List[Node] = []
+
+    def push(self, node: Node) -> None:
+        """
+        Adds a node to the open list
+        :param node:    The node
+        """
+        heappush(self.heap, node)
+
+    def pop(self) -> Node:
+        """
+        Removes and returns the node with the lowest value, collisions and heuristic
+        :return:    The node
+        """
+        return heappop(self.heap)
+
+    def get_lower_bound(self) -> int:
+        """
+        Returns the lowest value in the open list. Since waiting on a goal does not add to the cost, the cost of a
+        solution can be up to the number of agents below this value.
+        :return:    The lowest value in the open list
+        """
+        return self.heap[0].value
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.heap)
+
+
+class BucketFrontier:
+    """
+    Open list that stores nodes in buckets with equal value, collisions and heuristic.
+    Since these are all small integers, they are packed into a single integer key. Only the distinct keys are kept in a
+    heap, so pushing to an existing bucket and popping from a non-empty bucket do not need any comparisons.
+    Nodes within a bucket are popped in LIFO order.
+    """
+
+    __slots__ = 'buckets', 'keys', 'size'
+
+    def __init__(self):
+        self.buckets: Dict[int, List[Node]] = dict()
+        self.keys: List[int] = []
+        self.size = 0
+
+    def push(self, node: Node) -> None:
+        """
+        Adds a node to the open list
+        :param node:    The node
+        """
+        assert node.collisions <= KEY_MASK and node.heuristic <= KEY_MASK
+        key = (node.value << (2 * KEY_BITS)) | (node.collisions << KEY_BITS) | node.heuristic
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = [node]
+            heappush(self.keys, key)
+        else:
+            bucket.append(node)
+        self.size += 1
+
+    def pop(self) -> Node:
+        """
+        Removes and returns the node with the lowest value, collisions and heuristic
+        :return:    The node
+        """
+        key = self.keys[0]
+        bucket = self.buckets[key]
+        node = bucket.pop()
+        if not bucket:
+            del self.buckets[key]
+            heappop(self.keys)
+        self.size -= 1
+        return node
+
+    def get_lower_bound(self) -> int:
+        """
+        Returns the lowest value in the open list. Since waiting on a goal does not add to the cost, the cost of a
+        solution can be up to the number of agents below this value.
+        :return:    The lowest value in the open list
+        """
+        return self.keys[0] >> (2 * KEY_BITS)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self) -> Iterator[Node]:
+        return itertools.chain.from_iterable(self.buckets.values())
+
+
+class FocalFrontier:
+    """
+    Open list for bounded-suboptimal focal search.
+    The lower bound is the highest lowest admissible value (see get_admissible_value) in the open list so far. Nodes
+    with a value of at most the weight times the lower bound are in the focal list, from which the node with the fewest
+    collisions and then the lowest heuristic is popped. Other nodes are kept in buckets with equal value until the lower
+    bound has increased enough.
+    Unlike the value, the admissible value never exceeds the cost of the solutions below a node. The optimal solution
+    is always below a node in the open list, so the lower bound never exceeds the optimal cost, and every popped
+    solution is within the weight of the optimal cost.
+    """
+
+    __slots__ = 'weight', 'focal', 'pending', 'pending_keys', 'counts', 'values', 'lower_bound', 'bound', 'size', \
+        'counter'
+
+    def __init__(self, weight: float):
+        """
+        Constructs an empty FocalFrontier
+        :param weight:  Suboptimality factor
+        """
+        self.weight = weight
+        # Heap of (collisions, heuristic, admissible value, counter, node). The counter prevents comparisons between
+        # nodes.
+        self.focal: List[Tuple[int, int, int, int, Node]] = []
+        # Buckets of (admissible value, node) with equal value
+        self.pending: Dict[int, List[Tuple[int, Node]]] = dict()
+        self.pending_keys: List[int] = []
+        # Number of nodes with every admissible value, and a heap of the admissible values in which removed values are
+        # skipped lazily
+        self.counts: Dict[int, int] = dict()
+        self.values: List[int] = []
+        self.lower_bound = 0
+        self.bound = 0
+        self.size = 0
+        self.counter = itertools.count()
+
+    def push(self, node: Node) -> None:
+        """
+        Adds a node to the open list
+        :param node:    The node
+        """
+        admissible = get_admissible_value(node)
+        count = self.counts.get(admissible)
+        if count is None:
+            self.counts[admissible] = 1
+            heappush(self.values, admissible)
+        else:
+            self.counts[admissible] = count + 1
+        self.size += 1
+
+        value = node.value
+        if value <= self.bound:
+            heappush(self.focal, (node.collisions, node.heuristic, admissible, next(self.counter), node))
+            return
+        bucket = self.pending.get(value)
+        if bucket is None:
+            self.pending[value] = [(admissible, node)]
+            heappush(self.pending_keys, value)
+        else:
+            bucket.append((admissible, node))
+
+    def pop(self) -> Node:
+        """
+        Removes and returns the node in the focal list with the fewest collisions and the lowest heuristic
+        :return:    The node
+        """
+        self.update_bound()
+        _, _, admissible, _, node = heappop(self.focal)
+        count = self.counts[admissible] - 1
+        if count:
+            self.counts[admissible] = count
+        else:
+            del self.counts[admissible]
+        self.size -= 1
+        return node
+
+    def get_lower_bound(self) -> int:
+        """
+        Returns a lower bound on the cost of every solution that can still be found from the open list
+        :return:    The highest lowest admissible value in the open list so far
+        """
+        self.update_bound()
+        return self.lower_bound
+
+    def update_bound(self) -> None:
+        """
+        Raises the lower bound to the lowest admissible value in the open list and moves the nodes that are within the
+        new bound to the focal list
+        """
+        values = self.values
+        while values[0] not in self.counts:
+            heappop(values)
+        if values[0] <= self.lower_bound:
+            return
+        self.lower_bound = values[0]
+        self.bound = int(self.weight * self.lower_bound)
+        pending_keys = self.pending_keys
+        while pending_keys and pending_keys[0] <= self.bound:
+            for admissible, node in self.pending.pop(heappop(pending_keys)):
+                heappush(self.focal, (node.collisions, node.heuristic, admissible, next(self.counter), node))
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self) -> Iterator[Node]:
+        return itertools.chain((entry[-1] for entry in self.focal),
+                               (entry[1] for entry in itertools.chain.from_iterable(self.pending.values())))
@@ -1,15 +1,22 @@
-from heapq import heappush, heappop
-from typing import Dict, List, Any
+from collections import deque
+from typing import Dict, List
 
+import numpy as np
 from mapfmclient import MarkedLocation
 
-from src.util.coordinate import Coordinate
+from src.util.direction import Direction
 from src.util.grid import Grid
 
+# Heuristic value of the cells from which no goal of the color can be reached
+UNREACHABLE = np.iinfo(np.int32).max
+
 
 class Heuristic:
     """
     Contains the precomputed heuristic function. Values are computed when instance is constructed.
+    The table of every color is a NumPy int32 array of shape (height, width), indexed with [y, x]. Cells from which no
+    goal of the color can be reached, including the walls, contain UNREACHABLE. Single values should be read with
+    table.item(y, x), which returns a Python int that can not overflow in sums.
     """
 
     def __init__(self, grid: Grid, goals: List[MarkedLocation]):
@@ -19,7 +26,7 @@ class Heuristic:
         :param goals:   List of goals
         """
         self.grouped_goals = self.__group_by_color(goals)
-        self.heuristic: Dict[int, List[List[Any]]] = {}
+        self.heuristic: Dict[int, np.ndarray] = {}
         self.__compute_sic_heuristic(grid)
 
     def __getitem__(self, item):
@@ -27,29 +34,43 @@ class Heuristic:
 
     def __compute_sic_heuristic(self, grid: Grid) -> None:
         """
-        Computes the Sum of Individual Costs (SIC) heuristic for each color by performing a bread-first search from all
-        goals of the color.
+        Computes the Sum of Individual Costs (SIC) heuristic for each color by performing a breadth-first search from
+        all goals of the color.
+        The search runs over flat cell indices with a FIFO queue, so every cell is visited once with its distance.
         :param grid:    2D grid of the problem instance
         """
-        for color, goals in self.grouped_goals.items():
-            self.heuristic[color] = [[float('inf')] * grid.width for _ in range(grid.height)]
-            assert len(self.heuristic[color][0]) == grid.width
-            assert len(self.heuristic[color]) == grid.height
+        width = grid.width
+        size = width * grid.height
+        # The rows of the grid can be longer than the width, so only the cells within the width are flattened
+        traversable = [row[x] != 1 for row in grid.grid[:grid.height] for x in range(width)]
+
+        # Offsets of the neighbors of a cell, together with the column on which the move would leave the grid
+        moves = []
+        for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]:
+            dx, dy = direction.value
+            moves.append((dy * width + dx, width - 1 if dx == 1 else 0 if dx == -1 else -1))
 
-            seen = set()
-            frontier: List[BFSNode] = []
+        for color, goals in self.grouped_goals.items():
+            distances = [UNREACHABLE] * size
+            frontier = deque()
             for goal in goals:
-                heappush(frontier, BFSNode(Coordinate(goal.x, goal.y), 0))
-                seen.add(Coordinate(goal.x, goal.y))
+                cell = goal.y * width + goal.x
+                if distances[cell] == UNREACHABLE:
+                    distances[cell] = 0
+                    frontier.append(cell)
 
             while frontier:
-                node = heappop(frontier)
-                self.heuristic[color][node.pos.y][node.pos.x] = node.cost
-                neighbors = grid.get_neighbors(node.pos)
-                for neighbor in neighbors:
-                    if neighbor not in seen:
-                        seen.add(neighbor)
-                        heappush(frontier, BFSNode(neighbor, node.cost + 1))
+                cell = frontier.popleft()
+                distance = distances[cell] + 1
+                x = cell % width
+                for offset, edge in moves:
+                    neighbor = cell + offset
+                    if x != edge and 0 <= neighbor < size and traversable[neighbor] and \
+                            distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = distance
+                        frontier.append(neighbor)
+
+            self.heuristic[color] = np.array(distances, dtype=np.int32).reshape(grid.height, width)
 
     @staticmethod
     def __group_by_color(goals: List[MarkedLocation]) -> Dict[int, List[MarkedLocation]]:
@@ -65,36 +86,3 @@ class Heuristic:
             else:
                 grouped[goal.color] = [goal]
         return grouped
-
-
-class BFSNode:
-    """
-    Node used for breadth-first search for precomputing the heuristic
-    """
-
-    __slots__ = 'pos', 'cost'
-
-    def __init__(self, pos: Coordinate, cost: int):
-        """
-        Constructs a BFSNode instance
-        :param pos:     Position coordinate
-        :param cost:    Cost of reaching the position
-        """
-        self.pos = pos
-        self.cost = cost
-
-    def __eq__(self, other):
-        """
-        Returns whether this node equals the other node
-        :param other:   Node to compare with
-        :return:        True if equal, False otherwise
-        """
-        return self.pos == other.pos and self.cost == other.cost
-
-    def __lt__(self, other):
-        """
-        Returns whether this node has a lower cost than the other node. This allows nodes to be sorted on cost.
-        :param other:   Other node
-        :return:        True if this node has a lower cost than the other node, False otherwise
-        """
-        return self.cost < other.cost
@@ -1,10 +1,13 @@
 from copy import copy
 from typing import List, Tuple, Optional
 
-from src.solver.epeastar.epeastar import EPEAStar
+from src.solver.epeastar.low_level_solver import LowLevelSolver, create_solver
 from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.search_cache import SearchCache
+from src.solver.epeastar.search_options import SearchOptions
 from src.util.agent import Agent
 from src.util.cat import CAT
+from src.util.deadline import Deadline
 from src.util.path import Path
 from src.util.path_set import PathSet
 
@@ -33,7 +36,10 @@ class IDSolver:
                  agents: List[Agent],
                  cat: Optional[CAT],
                  stat_tracker,
-                 max_value=float('inf')):
+                 max_value=float('inf'),
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None,
+                 search_cache: Optional[SearchCache] = None):
         """
         Constructs an IDSolver instance
         :param problem:         MAPF problem instance that needs to be solved
@@ -41,6 +47,9 @@ class IDSolver:
         :param cat:             Additional Collision Avoidance Table that should be used in calculating the result
         :param stat_tracker     Statistic tracker
         :param max_value:       Maximum allowed value of the solver. Stop the solver if the value is exceeded
+        :param search_options:  Options that select the variant of EPEA*
+        :param deadline:        Deadline after which the solver is aborted with SolverTimeout
+        :param search_cache:    Cache of resumable searches that is shared with other ID solvers on the same problem
         """
         self.problem = problem
         self.agents = agents
@@ -51,6 +60,9 @@ class IDSolver:
             self.cats.append(cat)
         self.cats.append(self.path_set.cat)
         self.stat_tracker = stat_tracker
+        self.search_options = search_options
+        self.deadline = deadline
+        self.search_cache = search_cache
 
     def solve(self) -> Optional[Tuple[list, int]]:
         """
@@ -63,8 +75,8 @@ class IDSolver:
         # Solve for every group
         for agent in agents:
             self.agents = [agent]
-            solver = EPEAStar(self.problem, self.agents, self.cats, self.stat_tracker,
-                              max_cost=self.path_set.get_remaining_cost([agent.identifier], self.max_value))
+            solver = self.create_solver(self.agents, self.cats,
+                                        self.path_set.get_remaining_cost([agent.identifier], self.max_value))
             solution = solver.solve()
             if solution is None:
                 return None
@@ -118,8 +130,9 @@ class IDSolver:
 
         # Try to solve new group
         self.agents = new_agents
-        solver = EPEAStar(self.problem, self.agents, cats, self.stat_tracker,
-                          self.path_set.get_remaining_cost([agent.identifier for agent in new_agents], self.max_value))
+        solver = self.create_solver(self.agents, cats,
+                                    self.path_set.get_remaining_cost([agent.identifier for agent in new_agents],
+                                                                     self.max_value))
 
         solution = solver.solve()
         if solution is None:
@@ -132,3 +145,18 @@ class IDSolver:
         groups.remove(group_b)
 
         return groups
+
+    def create_solver(self, agents: List[Agent], cats: List[CAT], max_cost) -> LowLevelSolver:
+        """
+        Creates the low-level search for a group of agents, or resumes it from the search cache. Single agents are
+        never cached, since space-time A* solves them faster than a suspended search can be resumed.
+        :param agents:      Agents of the group
+        :param cats:        List of Collision Avoidance Tables
+        :param max_cost:    Maximum cost of the solution of the group
+        :return:            The search
+        """
+        if self.search_cache is not None and len(agents) > 1:
+            return self.search_cache.get_solver(self.problem, agents, cats, max_cost, self.search_options,
+                                                self.deadline)
+        return create_solver(self.problem, agents, cats, self.stat_tracker, max_cost,
+                             search_options=self.search_options, deadline=self.deadline)
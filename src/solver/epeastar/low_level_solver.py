@@ -0,0 +1,49 @@
+import multiprocessing
+from typing import List, Optional, Union
+
+from src.solver.epeastar.epeastar import EPEAStar
+from src.solver.epeastar.epeidastar import EPEIDAStar
+from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.parallel_epeastar import ParallelEPEAStar, PARALLEL_MIN_AGENTS
+from src.solver.epeastar.search_options import SearchOptions
+from src.solver.epeastar.space_time_astar import SpaceTimeAStar
+from src.util.agent import Agent
+from src.util.cat import CAT
+from src.util.deadline import Deadline
+from src.util.statistic_tracker import StatisticTracker
+
+LowLevelSolver = Union[EPEAStar, ParallelEPEAStar, EPEIDAStar, SpaceTimeAStar]
+
+
+def create_solver(problem: MAPFProblem,
+                  agents: List[Agent],
+                  cats: List[CAT],
+                  stat_tracker: StatisticTracker,
+                  max_cost=float('inf'),
+                  search_options: Optional[SearchOptions] = None,
+                  deadline: Optional[Deadline] = None) -> LowLevelSolver:
+    """
+    Creates the low-level search for a group of agents. Single agents are solved with space-time A*, unless profiling
+    is set in the search options, in which case they are solved with EPEA* so that the profile covers every search.
+    Other groups are solved with EPE-IDA* if iterative deepening is set, large groups with parallel EPEA* if workers
+    are set, and all other groups with EPEA*.
+    :param problem:         The MAPFProblem that should be solved
+    :param agents:          The moving agents
+    :param cats:            Collision avoidance tables
+    :param stat_tracker:    Statistic tracker
+    :param max_cost:        The maximum cost of the solution
+    :param search_options:  Options that select the variant of EPEA*
+    :param deadline:        Deadline after which the search is aborted with SolverTimeout
+    :return:                The search, which is started with solve
+    """
+    if len(agents) == 1 and (search_options is None or not search_options.profile):
+        return SpaceTimeAStar(problem, agents[0], cats, stat_tracker, max_cost, search_options, deadline)
+    if search_options is not None and search_options.iterative_deepening:
+        return EPEIDAStar(problem, agents, cats, stat_tracker, max_cost, search_options, deadline)
+    if search_options is not None and search_options.workers > 1 and len(agents) >= PARALLEL_MIN_AGENTS and \
+            not search_options.operator_decomposition and search_options.node_limit == 0 and \
+            search_options.focal_weight == 1 and not search_options.profile and \
+            not search_options.subdimensional_expansion and \
+            'fork' in multiprocessing.get_all_start_methods():
+        return ParallelEPEAStar(problem, agents, cats, stat_tracker, max_cost, search_options, deadline)
+    return EPEAStar(problem, agents, cats, stat_tracker, max_cost, search_options=search_options, deadline=deadline)
@@ -1,32 +1,144 @@
 import itertools
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Iterator, Optional, Sequence, Hashable
 
 from mapfmclient import MarkedLocation
 
 from src.solver.epeastar.heuristic import Heuristic
+from src.solver.epeastar.operator_cache import OperatorCache
 from src.solver.epeastar.operator_finder import OperatorFinder
-from src.solver.epeastar.pdb_generator import PDB
+from src.solver.epeastar.pdb_generator import PDB, PDBTable
+from src.solver.epeastar.search_options import SearchOptions
 from src.util.agent import Agent
+from src.util.cat import CAT
+from src.util.coordinate import Coordinate
 from src.util.direction import Direction
 from src.util.node import Node
+from src.util.node_arena import DIRECTIONS, MOVE_CODES
+from src.util.path import Path
 from src.util.state import State
 
+# The closed table of EPEA* maps the key of every generated state to (g << COST_SHIFT) | status, where g is the lowest
+# cost with which the state has been reached and status is FULLY_EXPANDED once a node with that cost has been fully
+# expanded.
+COST_SHIFT = 1
+FULLY_EXPANDED = 1
+
+
+def find_operators(v: int,
+                   tables: List[PDBTable],
+                   operator_cache: Optional[OperatorCache],
+                   reachable_sums: Optional[Tuple[int, ...]] = None) -> Tuple[list, int]:
+    """
+    Finds the operators of a node with the operator finder.
+    If an operator cache is given, the operator finder only picks the operators of the first half of the agents. The
+    operators of the second half of the agents only depend on their tables and on the Δf value that is left, so they
+    are retrieved from the operator cache. Since the positions of a subset of the agents repeat much more often than
+    the positions of all agents, this gives a much higher hit rate than caching the operators of all agents.
+    The operators and the next Δf value are equal to those of a single operator finder in both cases.
+    :param v:               The Δf value
+    :param tables:          Pattern database table of every agent
+    :param operator_cache:  Operator cache, or None if operators should not be cached
+    :param reachable_sums:  Reachable sums of the tables. If given, the next Δf value is exact.
+    :return:                The operator rows of every agent that sum to v and the next Δf value
+    """
+    operator_finder = OperatorFinder(v, tables, reachable_sums=reachable_sums)
+    split = len(tables) // 2
+    if operator_cache is None or split == 0:
+        operator_finder.find_operators()
+        return operator_finder.operators, operator_finder.next_target_value
+
+    # The tables are shared by all agents with the same color and position, so their identities identify the operators
+    suffix_tables = tables[split:]
+    suffix_key = tuple(map(id, suffix_tables))
+    suffix_reachable_sums = reachable_sums[split:] if reachable_sums is not None else None
+
+    operators = []
+    next_target_value = float('inf')
+    for prefix, prefix_sum in operator_finder.iterate_operators(split):
+        key = (v - prefix_sum,) + suffix_key
+        entry = operator_cache.get(key)
+        if entry is None:
+            suffix_finder = OperatorFinder(v - prefix_sum, suffix_tables, reachable_sums=suffix_reachable_sums)
+            suffix_finder.find_operators()
+            entry = suffix_finder.operators, suffix_finder.next_target_value
+            operator_cache.put(key, *entry)
+        suffix_operators, suffix_next_target_value = entry
+        operators.extend(prefix + suffix for suffix in suffix_operators)
+        next_target_value = min(next_target_value, prefix_sum + suffix_next_target_value)
+    if reachable_sums is not None:
+        return operators, operator_finder.next_target_value
+    return operators, min(next_target_value, operator_finder.next_target_value)
+
+
+def get_reachable_sums(parent: Node, tables: List[PDBTable], search_options: SearchOptions) -> Optional[
+        Tuple[int, ...]]:
+    """
+    Retrieves the reachable Δf values of the operators of a node. They are computed on the first expansion of the node
+    and stored in the node, so that later partial expansions of the node can continue with the next Δf layer directly.
+    :param parent:          The node that is expanded
+    :param tables:          Pattern database table of every agent
+    :param search_options:  Options of the search
+    :return:                The reachable sums, or None if Δf layers are not used
+    """
+    if not search_options.delta_f_layers:
+        return None
+    if parent.reachable_sums is None:
+        parent.reachable_sums = OperatorFinder.get_reachable_sums(tables)
+    return parent.reachable_sums
+
+
+def create_conflict_free_finder(v: int, tables: List[PDBTable], positions: Sequence[Hashable],
+                                reachable_sums: Optional[Tuple[int, ...]]) -> OperatorFinder:
+    """
+    Creates the operator finder of a conflict-free expansion. The conflict-free operators are produced lazily by
+    iterate_conflict_free_operators, which needs the reachable sums, so they are computed for this expansion if Δf
+    layers are not used. The next target value of the finder is then the next Δf value without taking conflicts into
+    account, which is a lower bound on the next Δf value of a conflict-free joint move that is known before any joint
+    move is produced.
+    :param v:               The Δf value
+    :param tables:          Pattern database table of every agent, with the target positions in its rows
+    :param positions:       Current position of every agent
+    :param reachable_sums:  Reachable sums of the tables, or None if Δf layers are not used
+    :return:                The operator finder
+    """
+    if reachable_sums is None:
+        reachable_sums = OperatorFinder.get_reachable_sums(tables)
+    return OperatorFinder(v, tables, positions, reachable_sums)
+
 
 class MAPFProblem:
     """
     Contains methods that are used by the EPEA* solver that are specific to the MAPF(M) problem.
     """
 
-    def __init__(self, goals: List[MarkedLocation], pdb: PDB, heuristic: Heuristic):
+    def __init__(self,
+                 goals: List[MarkedLocation],
+                 pdb: PDB,
+                 heuristic: Heuristic,
+                 operator_cache: Optional[OperatorCache] = None):
         """
         Creates an instance of MAPFProblem.
-        :param goals:       List of goals
-        :param pdb:         Precomputed pattern database
-        param heuristic:    Precomputed heuristic values
+        :param goals:           List of goals
+        :param pdb:             Precomputed pattern database
+        param heuristic:        Precomputed heuristic values
+        :param operator_cache:  Cache for the results of the operator finder that is shared by all searches on the
+                                problem. Operators are not cached if no cache is given.
         """
         self.osf = pdb
         self.goals = goals
         self.heuristic = heuristic
+        self.operator_cache = operator_cache
+
+        # Grid for every color that is True on the goals of the color, which makes on_goal a constant-time check
+        self.goal_grids: Dict[int, List[List[bool]]] = dict()
+        for color, table in heuristic.heuristic.items():
+            height, width = table.shape
+            self.goal_grids[color] = [[False] * width for _ in range(height)]
+        for goal in goals:
+            self.goal_grids[goal.color][goal.y][goal.x] = True
+
+        # Flattened lookup tables for packed states. Built on first use by PackedMAPFProblem and shared by all searches.
+        self.packed_tables = None
 
     def on_goal(self, agent: Agent) -> bool:
         """
@@ -34,10 +146,7 @@ class MAPFProblem:
         :param agent:   Agent to check if it is on its goal
         :returns:        True if the agent is on a goal, False otherwise
         """
-        for goal in self.goals:
-            if goal.x == agent.coord.x and goal.y == agent.coord.y and goal.color == agent.color:
-                return True
-        return False
+        return self.goal_grids[agent.color][agent.coord.y][agent.coord.x]
 
     def is_solved(self, state: State) -> bool:
         """
@@ -45,41 +154,146 @@ class MAPFProblem:
         :param state:   State for which it should be checked
         :returns:       True if state is a solution, False otherwise
         """
-        return all(self.on_goal(agent) for agent in state.agents)
+        return self.count_agents_on_goal(state) == len(state.agents)
 
-    def expand(self, node: Node) -> Tuple[List[Tuple[State, int]], int]:
+    def count_agents_on_goal(self, state: State) -> int:
+        """
+        Counts the agents that are on a goal of the correct color
+        :param state:   The state
+        :returns:       The number of agents on a goal
+        """
+        return sum(1 for agent in state.agents if self.on_goal(agent))
+
+    def expand(self, node: Node, closed: Dict[Tuple[Coordinate, ...], int], search_options: SearchOptions) -> Tuple[
+            Iterator[Tuple[Tuple[Coordinate, ...], State, int, None, int]], int]:
         """
         Expands an A* search tree node.
-        :param node:    parent node
-        :returns:       List of child nodes and the next Δf value for the parent node
-        """
-        v = node.delta_f
-        children, next_value = self.get_children(node, v)
-
-        # Check constraints
-        selected_children = []
-        for child_state, cost in children:
-            coords = set()
-            edge_conflict = False
-            vertex_conflict = False
-            for i, agent in enumerate(child_state.agents):
-                # Check vertex conflict
-                if agent.coord in coords:
-                    vertex_conflict = True
-                    break
-                coords.add(agent.coord)
-
-                # Check edge conflicts
-                for j in range(i + 1, len(node.state.agents)):
-                    if child_state.agents[i].coord == node.state.agents[j].coord and child_state.agents[j].coord == \
-                            node.state.agents[i].coord:
+        The children are produced lazily. Children with vertex or edge conflicts and children whose state has already
+        been reached with the same or a lower cost are skipped before any Agent or State objects are created.
+        :param node:            parent node
+        :param closed:          Closed table of the search, keyed with get_key
+        :param search_options:  Options of the search
+        :returns:               Iterator over the child states with their key, cost, waiting costs (always None,
+                                since the agents keep track of their own waiting costs) and number of agents on a goal
+                                and the next Δf value for the parent node
+        """
+        children, next_value = self.get_children(node, node.delta_f, search_options)
+        return self.select_children(node, children, closed, not search_options.conflict_free_operators), next_value
+
+    def select_children(self,
+                        parent: Node,
+                        children: Iterator[Tuple[Coordinate, ...]],
+                        closed: Dict[Tuple[Coordinate, ...], int],
+                        check_conflicts: bool = True) -> Iterator[
+            Tuple[Tuple[Coordinate, ...], State, int, None, int]]:
+        """
+        Filters the children of a node and creates the states of the remaining children
+        :param parent:          The parent node
+        :param children:        The target coordinate of every agent for every child
+        :param closed:          Closed table of the search
+        :param check_conflicts: Whether children with vertex or edge conflicts have to be filtered out
+        :returns:               Iterator over the remaining child states with their key, cost, waiting costs and number
+                                of agents on a goal
+        """
+        agents = parent.state.agents
+        n = len(agents)
+        parent_coords = [agent.coord for agent in agents]
+        parent_indices = dict((coord, i) for i, coord in enumerate(parent_coords))
+        on_goal = [self.on_goal(agent) for agent in agents]
+        goal_grids = [self.goal_grids[agent.color] for agent in agents]
+
+        # Agents that are not on a goal always add 1 to the cost. Agents on a goal only add to the cost when they move.
+        base_cost = parent.cost + on_goal.count(False)
+        goal_agents = [(i, agent.coord, agent.waiting_cost + 1) for i, agent in enumerate(agents) if on_goal[i]]
+
+        for coords in children:
+            if check_conflicts:
+                # Check vertex conflicts
+                if len(set(coords)) < n:
+                    continue
+
+                # Check edge conflicts: agent i moves to the position of agent j while agent j moves to the position
+                # of agent i
+                edge_conflict = False
+                for i, coord in enumerate(coords):
+                    j = parent_indices.get(coord)
+                    if j is not None and j != i and coords[j] == parent_coords[i]:
                         edge_conflict = True
                         break
                 if edge_conflict:
-                    break
-            if not vertex_conflict and not edge_conflict:
-                selected_children.append((child_state, cost))
-        return selected_children, next_value
+                    continue
+
+            # Check duplicates
+            cost = self.get_cost(base_cost, coords, goal_agents)
+            entry = closed.get(coords)
+            if entry is not None and entry >> COST_SHIFT <= cost:
+                continue
+
+            child, agents_on_goal = self.get_child(parent, coords, on_goal, goal_grids)
+            yield coords, child, cost, None, agents_on_goal
+
+    @staticmethod
+    def get_key(state: State) -> Tuple[Coordinate, ...]:
+        """
+        Creates the key of a state in the closed table.
+        Within a search the colors of the agents do not change, so the coordinates identify the state.
+        :param state:   The state
+        :returns:       Tuple with the coordinate of every agent
+        """
+        return tuple(agent.coord for agent in state.agents)
+
+    @staticmethod
+    def release_state(node: Node, key: Tuple[Coordinate, ...]) -> None:
+        """
+        Replaces the state of a partially expanded node by its key and the waiting costs of its agents, so the agents
+        of the state can be freed until the node is expanded again
+        :param node:    The node
+        :param key:     Key of the state of the node
+        """
+        node.waiting_costs = tuple(agent.waiting_cost for agent in node.state.agents)
+        node.state = key
+
+    @staticmethod
+    def restore_state(node: Node, agents: List[Agent]) -> None:
+        """
+        Restores the state of a node that has been released with release_state
+        :param node:    The node
+        :param agents:  The agents of the search, which provide the colors and identifiers
+        """
+        node.state = State([Agent(coord, agent.color, agent.identifier, waiting_cost)
+                            for coord, agent, waiting_cost in zip(node.state, agents, node.waiting_costs)])
+        node.waiting_costs = None
+
+    @staticmethod
+    def get_moves(parent_key: Tuple[Coordinate, ...], child_key: Tuple[Coordinate, ...]) -> bytes:
+        """
+        Encodes the moves of the agents from a parent to a child for the node arena
+        :param parent_key:  Key of the parent state
+        :param child_key:   Key of the child state
+        :return:            Move code of every agent
+        """
+        return bytes(MOVE_CODES[(child.x - parent.x, child.y - parent.y)]
+                     for parent, child in zip(parent_key, child_key))
+
+    @staticmethod
+    def replay_path(agents: List[Agent], moves: List[bytes]) -> List[Path]:
+        """
+        Reconstructs the paths of the agents by replaying moves from the node arena
+        :param agents:  The agents in their initial state
+        :param moves:   Move codes of every agent for every time step
+        :return:        List of paths
+        """
+        paths = []
+        for i, agent in enumerate(agents):
+            x, y = agent.coord.x, agent.coord.y
+            path = [(x, y)]
+            for step in moves:
+                dx, dy = DIRECTIONS[step[i]].value
+                x += dx
+                y += dy
+                path.append((x, y))
+            paths.append(Path(path, agent.identifier))
+        return paths
 
     def get_heuristic(self, state: State) -> int:
         """
@@ -89,49 +303,115 @@ class MAPFProblem:
         """
         total = 0
         for agent in state.agents:
-            total += self.heuristic.heuristic[agent.color][agent.coord.y][agent.coord.x]
+            total += self.heuristic.heuristic[agent.color].item(agent.coord.y, agent.coord.x)
         return total
 
-    def get_child(self, parent: Node, operator: Tuple[Direction, ...]) -> Tuple[State, int]:
+    @staticmethod
+    def get_collisions(state: State, time: int, cats: List[CAT], ignored_paths: List[int]) -> int:
+        """
+        Counts the collisions of a state with the paths in the collision avoidance tables
+        :param state:           The state
+        :param time:            The time step of the state
+        :param cats:            Collision avoidance tables
+        :param ignored_paths:   Identifiers of the paths that should be ignored
+        :returns:               The number of collisions
+        """
+        collisions = 0
+        for agent in state.agents:
+            collisions += sum(cat.get_cat(ignored_paths, agent.coord, time) for cat in cats)
+        return collisions
+
+    @staticmethod
+    def get_cost(base_cost: int, coords: Tuple[Coordinate, ...], goal_agents: List[Tuple[int, Coordinate, int]]) -> int:
+        """
+        Calculates the cost of a child node incrementally. Only the agents that are on a goal in the parent state have
+        to be checked.
+        :param base_cost:   Cost of the parent node plus the number of agents that are not on a goal
+        :param coords:      Target coordinate for every agent. Waiting agents keep their own Coordinate object.
+        :param goal_agents: Index, coordinate and cost of moving away (waiting cost + 1) of every agent on a goal
+        :returns:           The cost of the child node
+        """
+        cost = base_cost
+        for i, coord, move_cost in goal_agents:
+            if coords[i] is not coord:
+                cost += move_cost
+        return cost
+
+    def calculate_cost(self, parent: Node, state: State) -> int:
         """
-        Applies an operator to a parent node to create a child node
+        Calculates the cost of a child node from scratch. Used to check the incremental cost in debug mode.
+        :param parent:  The parent node
+        :param state:   The child state
+        :returns:       The cost of the child node
+        """
+        cost = parent.cost
+        for agent, child_agent in zip(parent.state.agents, state.agents):
+            if not self.on_goal(agent):
+                cost += 1
+            elif child_agent.coord != agent.coord:
+                cost += agent.waiting_cost + 1
+        return cost
+
+    @staticmethod
+    def get_child(parent: Node,
+                  coords: Tuple[Coordinate, ...],
+                  on_goal: List[bool],
+                  goal_grids: List[List[List[bool]]]) -> Tuple[State, int]:
+        """
+        Applies an operator to a parent node to create a child state
         :param parent:      The parent node
-        :param operator:    Tuple of Directions of length |agents|
-        :returns:           The child node with the additional cost
+        :param coords:      Target coordinate for every agent. Waiting agents keep their own Coordinate object.
+        :param on_goal:     For every agent whether it is on a goal in the parent state
+        :param goal_grids:  For every agent the grid with the goals of its color
+        :returns:           The child state and the number of agents on a goal in the child state
         """
-        assert len(operator) == len(parent.state.agents)
+        assert len(coords) == len(parent.state.agents)
 
         agents = []
-        costs = parent.cost
+        agents_on_goal = 0
         for i, agent in enumerate(parent.state.agents):
-            waiting_costs = 0
-            if self.on_goal(agent):
-                if operator[i] is not Direction.WAIT:
-                    costs += agent.waiting_cost + 1
-                else:
-                    waiting_costs = agent.waiting_cost + 1
+            target = coords[i]
+            if target is agent.coord:
+                # Waiting agents stay on or off their goal
+                waiting_cost = agent.waiting_cost + 1 if on_goal[i] else 0
+                agents_on_goal += on_goal[i]
             else:
-                costs += 1
-            agents.append(
-                Agent(agent.coord.move(operator[i]), agent.color, agent.identifier, waiting_cost=waiting_costs))
-
-        child_state = State(agents)
-        return child_state, costs
+                waiting_cost = 0
+                agents_on_goal += goal_grids[i][target.y][target.x]
+            agents.append(Agent(target, agent.color, agent.identifier, waiting_cost=waiting_cost))
+        return State(agents), agents_on_goal
 
-    def get_children(self, parent: Node, v: int) -> Tuple[List[Tuple[State, int]], int]:
+    def get_children(self, parent: Node, v: int, search_options: SearchOptions) -> Tuple[
+            Iterator[Tuple[Coordinate, ...]], int]:
         """
         Uses the operator selection function (OSF) to get all relevant children from the parent node.
-        :param parent:  Parent node
-        :param v:       The Δf value.
-        :returns:       List of child states together with their costs and next Δf value for the parent node
+        :param parent:          Parent node
+        :param v:               The Δf value.
+        :param search_options:  Options of the search, which select the variant of the operator finder
+        :returns:               Iterator that lazily produces the target coordinate of every agent for every child and
+                                the next Δf value for the parent node
         """
-        operator_finder = OperatorFinder(v, [self.osf.pdb[agent.color][agent.coord.y][agent.coord.x] for agent in
-                                             parent.state.agents])
-        operator_finder.find_operators(0, [], 0)
+        agents = parent.state.agents
+        tables = [self.osf.pdb[agent.color][agent.coord.y][agent.coord.x] for agent in agents]
+
+        # Target coordinates are created once per expansion and shared by all children. Waiting agents keep their own
+        # Coordinate object, so waiting can be detected with an identity check.
+        targets = []
+        for agent in agents:
+            agent_targets = dict((direction, agent.coord.move(direction)) for direction in Direction)
+            agent_targets[Direction.WAIT] = agent.coord
+            targets.append(agent_targets)
 
-        expanded_operators = []
-        for operator in operator_finder.operators:
-            expanded_operators += list(itertools.product(*operator))
+        reachable_sums = get_reachable_sums(parent, tables, search_options)
+        if search_options.conflict_free_operators:
+            target_tables = [[(tuple(targets[i][direction] for direction in directions), delta_f)
+                              for directions, delta_f in table] for i, table in enumerate(tables)]
+            operator_finder = create_conflict_free_finder(v, target_tables, [agent.coord for agent in agents],
+                                                          reachable_sums)
+            return operator_finder.iterate_conflict_free_operators(), operator_finder.next_target_value
 
-        children = [self.get_child(parent, operator) for operator in expanded_operators]
-        return children, operator_finder.next_target_value
+        operators, next_target_value = find_operators(v, tables, self.operator_cache, reachable_sums)
+        children = (itertools.product(*[[targets[i][direction] for direction in directions]
+                                        for i, directions in enumerate(operator)])
+                    for operator in operators)
+        return itertools.chain.from_iterable(children), next_target_value
@@ -0,0 +1,81 @@
+import sys
+import typing
+from collections import OrderedDict
+from typing import List, Tuple, Optional
+
+from src.util.statistic_tracker import StatisticTracker
+
+# Estimated memory of an entry in the ordered dictionary itself, excluding the key and the value
+ENTRY_OVERHEAD = 200
+
+# Operator rows of every agent that sum to the target Δf value, and the next Δf value
+CacheEntry = Tuple[List[tuple], int]
+
+
+class OperatorCache:
+    """
+    Least recently used (LRU) cache for the results of the operator finder.
+    The operators only depend on the pattern database tables of the agents and the target Δf value, so they can be
+    reused by all nodes (and all searches on the same problem) in which the agents have the same colors and positions.
+    The memory of the cache is estimated from the sizes of the keys and the operator lists. The rows themselves are
+    shared with the pattern database and are therefore not counted.
+    """
+
+    __slots__ = 'entries', 'max_memory', 'memory', 'stat_tracker'
+
+    def __init__(self, max_memory: int, stat_tracker: StatisticTracker):
+        """
+        Constructs an empty OperatorCache
+        :param max_memory:      Memory ceiling of the cache in bytes
+        :param stat_tracker:    Statistic tracker that counts the hits, misses and evictions
+        """
+        self.entries: typing.OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self.max_memory = max_memory
+        self.memory = 0
+        self.stat_tracker = stat_tracker
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        """
+        Looks up the operators of a key and marks the key as most recently used
+        :param key: The key, which contains the target Δf value and the identities of the pattern database tables
+        :return:    The operators and the next Δf value if the key is in the cache, otherwise None
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stat_tracker.operator_cache_missed()
+            return None
+        self.entries.move_to_end(key)
+        self.stat_tracker.operator_cache_hit()
+        return entry
+
+    def put(self, key: tuple, operators: List[tuple], next_target_value: int) -> None:
+        """
+        Adds the operators of a key to the cache and evicts the least recently used entries until the memory of the
+        cache is below the ceiling
+        :param key:                 The key, which contains the target Δf value and the identities of the tables
+        :param operators:           The operators for the key
+        :param next_target_value:   The next Δf value for the key
+        """
+        size = self.get_size(key, operators)
+        if size > self.max_memory:
+            return
+        self.entries[key] = (operators, next_target_value)
+        self.memory += size
+        while self.memory > self.max_memory:
+            evicted_key, (evicted_operators, _) = self.entries.popitem(last=False)
+            self.memory -= self.get_size(evicted_key, evicted_operators)
+            self.stat_tracker.operator_cache_evicted()
+
+    @staticmethod
+    def get_size(key: tuple, operators: List[tuple]) -> int:
+        """
+        Estimates the memory of an entry
+        :param key:         The key of the entry
+        :param operators:   The operators of the entry
+        :return:            The estimated memory in bytes
+        """
+        return ENTRY_OVERHEAD + sys.getsizeof(key) + sum(sys.getsizeof(item) for item in key) + \
+            sys.getsizeof(operators) + sum(sys.getsizeof(operator) for operator in operators)
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,5 +1,4 @@
-from copy import copy
-from typing import List
+from typing import List, Optional, Sequence, Dict, Hashable, Iterator, Tuple
 
 from src.solver.epeastar.pdb_generator import PDBTable
 from src.util.direction import Direction
@@ -10,65 +9,311 @@ class OperatorFinder:
     Implements a more efficient way of selecting operators. The speed of this algorithm is crucial for the performance
     of EPEA* since every node expansion an OperatorFinder is constructed and find_operators is executed.
     find_operators .
+
+    In conflict-aware mode the rows of the tables contain the positions that the agents move to instead of directions.
+    iterate_conflict_free_operators then picks a single position per agent and prunes a branch as soon as the chosen
+    position of an agent causes a vertex or edge conflict with an agent that has a lower index.
+
+    If the reachable sums of the tables are given (see get_reachable_sums), only operators that lead to a combination
+    with the target sum are tried and next_target_value is the exact next Δf value instead of a lower bound. The
+    reachable sums only depend on the tables, so they can be stored in a node and reused for every partial expansion.
     """
 
-    __slots__ = 'operators', 'target_sum', 'agent_operators', 'next_target_value', 'min_values', 'max_values'
+    __slots__ = 'operators', 'target_sum', 'agent_operators', 'next_target_value', 'min_values', 'max_values', \
+        'positions', 'reachable_sums'
 
-    def __init__(self, target_sum: int, agent_operators: List[PDBTable]):
+    def __init__(self,
+                 target_sum: int,
+                 agent_operators: List[PDBTable],
+                 positions: Optional[Sequence[Hashable]] = None,
+                 reachable_sums: Optional[Sequence[int]] = None):
         """
         Constructs an OperatorFinder instance
         :param target_sum:      Target value to reach
         :param agent_operators: Pattern database table for each agent
+        :param positions:       Current position of each agent. Only required for iterate_conflict_free_operators,
+                                in which case the rows of agent_operators should contain target positions.
+        :param reachable_sums:  Reachable sums of agent_operators, as computed by get_reachable_sums
         """
-        self.operators: List[List[List[Direction]]] = []
+        self.operators: List = []
         self.target_sum = target_sum
         self.agent_operators = agent_operators
+        self.positions = positions
+        self.reachable_sums = reachable_sums
         self.next_target_value = float('inf')
-        self.min_values = []
-        self.max_values = []
+        if reachable_sums is not None:
+            self.next_target_value = get_next_reachable_sum(reachable_sums[0], target_sum)
+
+        # Bounds on the sum of delta values of the agents after each agent, computed in a single backward pass
+        n = len(agent_operators)
+        self.min_values = [0] * n
+        self.max_values = [0] * n
         s_min = 0
         s_max = 0
-        for operators in reversed(agent_operators):
-            self.min_values.append(s_min)
-            self.max_values.append(s_max)
-            s_min += operators[0][1]
-            s_max += operators[-1][1]
-        self.min_values.reverse()
-        self.max_values.reverse()
-
-    def find_operators(self,
-                       current_agent: int,
-                       previous_operators: List[List[Direction]],
-                       previous_sum: int) -> None:
+        for i in range(n - 1, 0, -1):
+            s_min += agent_operators[i][0][1]
+            s_max += agent_operators[i][-1][1]
+            self.min_values[i - 1] = s_min
+            self.max_values[i - 1] = s_max
+
+    def find_operators(self) -> None:
         """
         Finds all combinations of operators where the sum of delta values is equal to self.target_sum.
         Results are stored in self.operators
-        :param current_agent:       Index of the agent for which operators are being evaluated (recursive tree depth)
-        :param previous_operators:  Operators that were picked for agents with a lower index
-        :param previous_sum:        Sum of delta values for all previous operators
-        :return:                    Nothing
+        :return:    Nothing
+        """
+        self.operators.extend(operators for operators, _ in self.iterate_operators(len(self.agent_operators)))
+
+    @staticmethod
+    def get_reachable_sums(agent_operators: List[PDBTable]) -> Tuple[int, ...]:
+        """
+        Computes which sums of delta values can be reached by the agents after each agent.
+        :param agent_operators: Pattern database table for each agent
+        :return:                Bitmask for every agent and one for the end, in which bit s is set if the agents from
+                                that agent onwards can reach a sum of s
+        """
+        reachable_sums = [1] * (len(agent_operators) + 1)
+        for i in range(len(agent_operators) - 1, -1, -1):
+            reachable = 0
+            for _, delta in agent_operators[i]:
+                assert delta >= 0
+                reachable |= reachable_sums[i + 1] << delta
+            reachable_sums[i] = reachable
+        return tuple(reachable_sums)
+
+    def iterate_operators(self, depth: int) -> Iterator[Tuple[Tuple[List[Direction], ...], int]]:
+        """
+        Lazily produces combinations of operators for the first depth agents.
+        Uses the reachable sums if they are available and otherwise the bounds on the delta values.
+        :param depth:   Number of agents for which operators are picked
+        :return:        Iterator over the combinations and the sums of their delta values
+        """
+        if self.reachable_sums is not None:
+            return self.__iterate_reachable_operators(depth)
+        return self.__iterate_bounded_operators(depth)
+
+    def __iterate_bounded_operators(self, depth: int) -> Iterator[Tuple[Tuple[List[Direction], ...], int]]:
+        """
+        Lazily produces combinations of operators for the first depth agents.
+        If depth is the number of agents, all combinations where the sum of delta values is equal to self.target_sum
+        are produced. Otherwise, all partial combinations are produced for which the target sum can still be reached
+        with the operators of the remaining agents.
+        The search tree over the agents is traversed depth-first with an explicit stack. The chosen operators are
+        written into a buffer with one slot per agent, so only the produced combinations are allocated.
+        self.next_target_value is only complete once the iterator is exhausted. For partial combinations, it does not
+        take the values below the produced combinations into account.
+        :param depth:   Number of agents for which operators are picked
+        :return:        Iterator over the combinations and the sums of their delta values
         """
-        # For each operator of the current agent
-        for i, operator in enumerate(self.agent_operators[current_agent]):
-            current_operators = copy(previous_operators)
-            current_operators.append(operator[0])
-            current_sum = previous_sum + operator[1]
-
-            # If the minimum possible value is larger than the target value, return and update the next target value
-            if current_sum + self.min_values[current_agent] > self.target_sum:
-                self.next_target_value = min(self.next_target_value, current_sum + self.min_values[current_agent])
-                return
-
-            # If this is the bottom of the recursive tree, check if the target sum is reached
-            if current_agent == len(self.agent_operators) - 1:
-                if current_sum == self.target_sum:
-                    self.operators.append(current_operators)
+        agent_operators = self.agent_operators
+        min_values = self.min_values
+        max_values = self.max_values
+        target_sum = self.target_sum
+        complete = depth == len(agent_operators)
+        last_agent = depth - 1
+
+        # Operators that are picked for every agent, the index of the next operator row of every agent and the sum of
+        # delta values of all previous agents
+        buffer: List[Optional[List[Direction]]] = [None] * depth
+        next_rows = [0] * depth
+        previous_sums = [0] * depth
+
+        current_agent = 0
+        while current_agent >= 0:
+            operators = agent_operators[current_agent]
+            row = next_rows[current_agent]
+
+            # All operators of the current agent have been tried, go back to the previous agent
+            if row == len(operators):
+                current_agent -= 1
+                continue
+            next_rows[current_agent] = row + 1
+
+            directions, delta = operators[row]
+            current_sum = previous_sums[current_agent] + delta
+
+            # If the minimum possible value is larger than the target value, go back to the previous agent and update
+            # the next target value
+            if current_sum + min_values[current_agent] > target_sum:
+                self.next_target_value = min(self.next_target_value, current_sum + min_values[current_agent])
+                current_agent -= 1
+                continue
+
+            buffer[current_agent] = directions
+
+            # If this is the bottom of the search tree, check if the target sum is reached
+            if complete and current_agent == last_agent:
+                if current_sum == target_sum:
+                    yield tuple(buffer), current_sum
+                continue
+
+            # If the maximum possible value is smaller than the target value, do not go deeper in the search tree
+            if current_sum + max_values[current_agent] < target_sum:
                 continue
 
-            # If the maximum possible value is smaller than the target value, do not go deeper in recursion
-            if current_sum + self.max_values[current_agent] < self.target_sum:
+            # A partial combination that can still reach the target value
+            if current_agent == last_agent:
+                yield tuple(buffer), current_sum
                 continue
 
             # Find assignments for remaining agents
-            self.find_operators(current_agent + 1, current_operators, current_sum)
-            assert self.next_target_value > self.target_sum
+            current_agent += 1
+            next_rows[current_agent] = 0
+            previous_sums[current_agent] = current_sum
+
+        assert self.next_target_value > self.target_sum
+
+    def __iterate_reachable_operators(self, depth: int) -> Iterator[Tuple[Tuple[List[Direction], ...], int]]:
+        """
+        Lazily produces combinations of operators for the first depth agents, for which the target sum is reached (or
+        can still be reached with the operators of the remaining agents).
+        Operators are only picked if the remaining agents can reach the remaining sum, so every branch of the search
+        tree leads to a combination. The search tree is traversed in the same order as in __iterate_bounded_operators.
+        :param depth:   Number of agents for which operators are picked
+        :return:        Iterator over the combinations and the sums of their delta values
+        """
+        agent_operators = self.agent_operators
+        reachable_sums = self.reachable_sums
+        target_sum = self.target_sum
+        last_agent = depth - 1
+
+        buffer: List[Optional[List[Direction]]] = [None] * depth
+        next_rows = [0] * depth
+        previous_sums = [0] * depth
+
+        current_agent = 0
+        while current_agent >= 0:
+            operators = agent_operators[current_agent]
+            row = next_rows[current_agent]
+            if row == len(operators):
+                current_agent -= 1
+                continue
+            next_rows[current_agent] = row + 1
+
+            directions, delta = operators[row]
+            current_sum = previous_sums[current_agent] + delta
+
+            # The rows are sorted on their delta value, so the remaining rows exceed the target value as well
+            remaining_sum = target_sum - current_sum
+            if remaining_sum < 0:
+                current_agent -= 1
+                continue
+
+            # Skip the operator if the remaining agents can not reach the remaining sum
+            if not (reachable_sums[current_agent + 1] >> remaining_sum) & 1:
+                continue
+
+            buffer[current_agent] = directions
+            if current_agent == last_agent:
+                yield tuple(buffer), current_sum
+                continue
+
+            current_agent += 1
+            next_rows[current_agent] = 0
+            previous_sums[current_agent] = current_sum
+
+    def iterate_conflict_free_operators(self) -> Iterator[Tuple[Hashable, ...]]:
+        """
+        Lazily produces all conflict-free joint moves where the sum of delta values is equal to self.target_sum, as
+        tuples with the target position of every agent.
+        Requires the reachable sums of the tables, so every branch of the search tree that is not pruned because of a
+        conflict leads to a joint move. The search tree is traversed depth-first with an explicit stack, in the same
+        order as __iterate_reachable_operators, and within a row the targets are tried in order. The chosen targets
+        are written into a buffer with one slot per agent, so only the produced joint moves are allocated.
+        :return:    Iterator over the joint moves
+        """
+        agent_operators = self.agent_operators
+        reachable_sums = self.reachable_sums
+        positions = self.positions
+        target_sum = self.target_sum
+        n = len(agent_operators)
+        last_agent = n - 1
+
+        # Target that is picked for every agent, the index of the current operator row and of the next target in that
+        # row for every agent, and the sum of delta values of all previous agents
+        buffer: List[Optional[Hashable]] = [None] * n
+        rows = [0] * n
+        next_targets = [0] * n
+        previous_sums = [0] * n
+        # Maps the target position of every agent before the current agent to its current position
+        reserved: Dict[Hashable, Hashable] = dict()
+
+        current_agent = 0
+        while current_agent >= 0:
+            # Release the target that the agent picked before
+            if current_agent < last_agent and buffer[current_agent] is not None:
+                del reserved[buffer[current_agent]]
+                buffer[current_agent] = None
+
+            operators = agent_operators[current_agent]
+            # An agent that moves from the target position of a previous agent to the position of that agent swaps
+            # places with it
+            swap_target = reserved.get(positions[current_agent])
+
+            # The last agent has to reach the target sum exactly, so all its joint moves are produced at once
+            if current_agent == last_agent:
+                remaining_sum = target_sum - previous_sums[current_agent]
+                for targets, delta in operators:
+                    if delta < remaining_sum:
+                        continue
+                    if delta > remaining_sum:
+                        break
+                    for target in targets:
+                        if target not in reserved and (swap_target is None or swap_target != target):
+                            buffer[current_agent] = target
+                            yield tuple(buffer)
+                current_agent -= 1
+                continue
+
+            row = rows[current_agent]
+            index = next_targets[current_agent]
+            previous_sum = previous_sums[current_agent]
+            reachable = reachable_sums[current_agent + 1]
+            target = None
+            while row < len(operators):
+                targets, delta = operators[row]
+                remaining_sum = target_sum - previous_sum - delta
+                # The rows are sorted on their delta value, so the remaining rows exceed the target value as well
+                if remaining_sum < 0:
+                    break
+                # Skip the row if the remaining agents can not reach the remaining sum
+                if index > 0 or (reachable >> remaining_sum) & 1:
+                    while index < len(targets):
+                        candidate = targets[index]
+                        index += 1
+                        # Check vertex and edge conflicts with the previous agents
+                        if candidate not in reserved and (swap_target is None or swap_target != candidate):
+                            target = candidate
+                            break
+                    if target is not None:
+                        break
+                row += 1
+                index = 0
+
+            # All operators of the current agent have been tried, go back to the previous agent
+            if target is None:
+                current_agent -= 1
+                continue
+            rows[current_agent] = row
+            next_targets[current_agent] = index
+
+            buffer[current_agent] = target
+            reserved[target] = positions[current_agent]
+            previous_sums[current_agent + 1] = previous_sum + delta
+            current_agent += 1
+            rows[current_agent] = 0
+            next_targets[current_agent] = 0
+            buffer[current_agent] = None
+
+
+def get_next_reachable_sum(reachable: int, target_sum: int) -> int:
+    """
+    Finds the lowest reachable sum that is larger than the target sum
+    :param reachable:   Bitmask of reachable sums
+    :param target_sum:  Target sum
+    :return:            The lowest larger reachable sum, or infinity if no larger sum can be reached
+    """
+    larger = reachable >> (target_sum + 1)
+    if larger == 0:
+        return float('inf')
+    return target_sum + (larger & -larger).bit_length()
@@ -0,0 +1,572 @@
+import itertools
+from math import prod
+from operator import contains, sub
+from typing import Dict, List, Tuple, FrozenSet, Iterator, Optional
+
+import numpy as np
+
+from src.solver.epeastar.collision_table import CollisionTable
+from src.solver.epeastar.mapf_problem import MAPFProblem, COST_SHIFT, find_operators, get_reachable_sums, \
+    create_conflict_free_finder
+from src.solver.epeastar.pdb_generator import PDBTable, PDBRow
+from src.solver.epeastar.search_options import SearchOptions
+from src.util.agent import Agent
+from src.util.agent_table import AgentTable
+from src.util.cat import CAT
+from src.util.coordinate import Coordinate
+from src.util.direction import Direction
+from src.util.node import Node
+from src.util.node_arena import DIRECTIONS
+from src.util.path import Path
+from src.util.state import PackedState
+
+# Minimum number of candidate children of a partial expansion for which the children are evaluated as a NumPy array.
+# Smaller expansions are faster to evaluate per child than with the overhead of the array operations.
+BATCH_MIN_CHILDREN = 256
+
+
+class PackedTables:
+    """
+    Flattened versions of the heuristic, the pattern database and the goals that can be indexed with grid cell indices.
+    The tables do not depend on the agents, so they are computed once and shared by all searches on the same problem.
+    """
+
+    __slots__ = 'width', 'heuristic', 'pdb', 'policy_pdb', 'goal_cells', 'coordinates'
+
+    def __init__(self, problem: MAPFProblem):
+        """
+        Constructs a PackedTables instance
+        :param problem: The problem of which the tables should be flattened
+        """
+        height, width = next(iter(problem.heuristic.heuristic.values())).shape
+        self.width = width
+
+        # Offset of the cell index for every move
+        offsets = dict((direction, direction.value[1] * width + direction.value[0]) for direction in Direction)
+
+        self.heuristic: Dict[int, List[int]] = dict()
+        for color, table in problem.heuristic.heuristic.items():
+            self.heuristic[color] = table.ravel().tolist()
+
+        # The directions in the PDB rows are replaced by the cell indices that the agent ends up in. As a result, the
+        # cartesian product of the rows of all agents directly contains the child states.
+        self.pdb: Dict[int, List[PDBTable]] = dict()
+        for color, table in problem.osf.pdb.items():
+            self.pdb[color] = [
+                PDBTable([PDBRow((tuple(y * width + x + offsets[direction] for direction in directions), delta_f))
+                          for directions, delta_f in table[y][x]])
+                for y in range(height) for x in range(width)]
+
+        # Tables with only the move of the individually optimal policy of an agent: the first move of the row with the
+        # lowest Δf value. Used for the agents outside the collision set with subdimensional expansion.
+        self.policy_pdb: Dict[int, List[PDBTable]] = dict()
+        for color, tables in self.pdb.items():
+            self.policy_pdb[color] = [PDBTable([PDBRow(((table[0][0][0],), table[0][1]))]) if table else table
+                                      for table in tables]
+
+        goal_cells: Dict[int, set] = dict()
+        for goal in problem.goals:
+            goal_cells.setdefault(goal.color, set()).add(goal.y * width + goal.x)
+        self.goal_cells: Dict[int, FrozenSet[int]] = dict((color, frozenset(cells)) for color, cells in
+                                                          goal_cells.items())
+
+        # Coordinates of every cell, which avoids creating Coordinate objects for every lookup in a CAT
+        self.coordinates = [Coordinate(x, y) for y in range(height) for x in range(width)]
+
+
+class PackedMAPFProblem:
+    """
+    Contains the methods of MAPFProblem for packed states.
+    In a packed state every agent is represented only by the index of its grid cell. The colors and identifiers of
+    the agents are stored once in an AgentTable and the waiting costs are stored in the search nodes.
+    An instance is created for every search, since the agent table differs between searches.
+    """
+
+    def __init__(self, problem: MAPFProblem, agents: List[Agent]):
+        """
+        Creates an instance of PackedMAPFProblem.
+        :param problem: The problem that should be solved
+        :param agents:  The agents of the search
+        """
+        if problem.packed_tables is None:
+            problem.packed_tables = PackedTables(problem)
+        self.tables: PackedTables = problem.packed_tables
+        self.agent_table = AgentTable(agents, self.tables.width)
+        self.initial_state: PackedState = self.agent_table.pack(agents)
+
+        # Lookup tables for the colors of the agents in the search
+        self.heuristics = [self.tables.heuristic[color] for color in self.agent_table.colors]
+        self.pdbs = [self.tables.pdb[color] for color in self.agent_table.colors]
+        self.policy_pdbs = [self.tables.policy_pdb[color] for color in self.agent_table.colors]
+        self.goal_cells = [self.tables.goal_cells[color] for color in self.agent_table.colors]
+        self.operator_cache = problem.operator_cache
+
+        # Offset of the cell index for every move code of the node arena, and the move code of every offset
+        width = self.tables.width
+        self.move_offsets = [direction.value[1] * width + direction.value[0] for direction in DIRECTIONS]
+        self.move_codes: Dict[int, int] = dict()
+        for code, offset in enumerate(self.move_offsets):
+            self.move_codes.setdefault(offset, code)
+
+        # For every agent and grid cell whether the cell is a goal of the agent, created on the first batch expansion
+        self.goal_mask: Optional[np.ndarray] = None
+
+    def is_solved(self, state: PackedState) -> bool:
+        """
+        Checks if the given state is a valid solution to the problem.
+        :param state:   State for which it should be checked
+        :returns:       True if state is a solution, False otherwise
+        """
+        return self.count_agents_on_goal(state) == len(state)
+
+    def count_agents_on_goal(self, state: PackedState) -> int:
+        """
+        Counts the agents that are on a goal of the correct color
+        :param state:   The state
+        :returns:       The number of agents on a goal
+        """
+        return sum(map(contains, self.goal_cells, state))
+
+    def expand(self, node: Node, closed: Dict[PackedState, int], search_options: SearchOptions) -> Tuple[
+            Iterator[Tuple[PackedState, PackedState, int, Tuple[int, ...], int]], int]:
+        """
+        Expands an A* search tree node.
+        The children are produced lazily. Children with vertex or edge conflicts and children whose state has already
+        been reached with the same or a lower cost are skipped before their waiting costs are computed.
+        :param node:            parent node
+        :param closed:          Closed table of the search
+        :param search_options:  Options of the search
+        :returns:               Iterator over the child states with their key (the state itself), cost, waiting costs
+                                and number of agents on a goal and the next Δf value for the parent node
+        """
+        children, next_value = self.get_children(node, node.delta_f, search_options)
+        return self.select_children(node, children, closed, not search_options.conflict_free_operators), next_value
+
+    def select_children(self,
+                        parent: Node,
+                        children: Iterator[PackedState],
+                        closed: Dict[PackedState, int],
+                        check_conflicts: bool = True) -> Iterator[
+            Tuple[PackedState, PackedState, int, Tuple[int, ...]]]:
+        """
+        Filters the children of a node and computes the cost and waiting costs of the remaining children
+        :param parent:          The parent node
+        :param children:        The child states
+        :param closed:          Closed table of the search
+        :param check_conflicts: Whether children with vertex or edge conflicts have to be filtered out
+        :returns:               Iterator over the remaining child states with their key, cost, waiting costs and number
+                                of agents on a goal
+        """
+        parent_cells = parent.state
+        parent_indices = dict((cell, i) for i, cell in enumerate(parent_cells))
+        n = len(parent_cells)
+        on_goal = [cell in goal_cells for cell, goal_cells in zip(parent_cells, self.goal_cells)]
+
+        # Agents that are not on a goal always add 1 to the cost. Agents on a goal only add to the cost when they move.
+        base_cost = parent.cost + on_goal.count(False)
+        goal_agents = [(i, parent_cells[i], parent.waiting_costs[i] + 1) for i in range(n) if on_goal[i]]
+
+        for child_state in children:
+            if check_conflicts:
+                # Check vertex conflicts
+                if len(set(child_state)) < n:
+                    continue
+
+                # Check edge conflicts: agent i moves to the cell of agent j while agent j moves to the cell of agent i
+                edge_conflict = False
+                for i, cell in enumerate(child_state):
+                    j = parent_indices.get(cell)
+                    if j is not None and j != i and child_state[j] == parent_cells[i]:
+                        edge_conflict = True
+                        break
+                if edge_conflict:
+                    continue
+
+            # Check duplicates
+            cost = self.get_cost(base_cost, child_state, goal_agents)
+            entry = closed.get(child_state)
+            if entry is not None and entry >> COST_SHIFT <= cost:
+                continue
+
+            yield child_state, child_state, cost, self.get_waiting_costs(parent, child_state, on_goal), \
+                self.count_agents_on_goal(child_state)
+
+    def expand_agent(self, node: Node, closed: Dict[PackedState, int]) -> Tuple[
+            Iterator[Tuple[Optional[PackedState], PackedState, int, Tuple[int, ...], int]], int]:
+        """
+        Expands a node of the search with operator decomposition (OD).
+        Only the next agent of the node (node.next_agent) is moved. The agents before it have already been moved in
+        this time step and the agents after it are still on their position in the standard node that the time step
+        started from, which is the parent of an intermediate node. The children of the last agent are standard nodes.
+        :param node:    The standard or intermediate node
+        :param closed:  Closed table of the search, which only contains standard states
+        :returns:       Iterator over the children with their key (None for intermediate children), state, cost,
+                        waiting costs and number of agents on a goal and the next Δf value for the node
+        """
+        agent = node.next_agent
+        base_cells = node.parent.state if agent > 0 else node.state
+        cell = node.state[agent]
+
+        # Targets of the rows of the agent with the Δf value of the node
+        targets = ()
+        next_value = float('inf')
+        for row_targets, delta_f in self.pdbs[agent][cell]:
+            if delta_f == node.delta_f:
+                targets = row_targets
+            elif delta_f > node.delta_f:
+                next_value = delta_f
+                break
+        return self.select_agent_children(node, agent, base_cells, targets, closed), next_value
+
+    def select_agent_children(self,
+                              node: Node,
+                              agent: int,
+                              base_cells: PackedState,
+                              targets: Tuple[int, ...],
+                              closed: Dict[PackedState, int]) -> Iterator[
+            Tuple[Optional[PackedState], PackedState, int, Tuple[int, ...], int]]:
+        """
+        Filters the moves of a single agent and computes the children of the remaining moves
+        :param node:        The standard or intermediate node
+        :param agent:       Index of the agent that moves
+        :param base_cells:  State of the standard node from which the time step started
+        :param targets:     Cells to which the agent can move
+        :param closed:      Closed table of the search
+        :returns:           Iterator over the remaining children with their key, state, cost, waiting costs and number
+                            of agents on a goal
+        """
+        cell = node.state[agent]
+        moved_cells = node.state[:agent]
+        on_goal = cell in self.goal_cells[agent]
+        waiting_cost = node.waiting_costs[agent]
+        last_agent = agent == len(node.state) - 1
+
+        for target in targets:
+            # Check vertex conflicts with the agents that have already moved
+            if target in moved_cells:
+                continue
+
+            # Check edge conflicts: an agent that has already moved went from the target to the cell of this agent
+            if target != cell and target in base_cells:
+                j = base_cells.index(target)
+                if j < agent and moved_cells[j] == cell:
+                    continue
+
+            # Agents on a goal only pay for waiting when they move away
+            if target == cell:
+                cost = node.cost + (0 if on_goal else 1)
+                child_waiting_cost = waiting_cost + 1 if on_goal else 0
+            else:
+                cost = node.cost + (waiting_cost + 1 if on_goal else 1)
+                child_waiting_cost = 0
+
+            child_state = moved_cells + (target,) + node.state[agent + 1:]
+            child_key = None
+            if last_agent:
+                # Check duplicates of standard states
+                entry = closed.get(child_state)
+                if entry is not None and entry >> COST_SHIFT <= cost:
+                    continue
+                child_key = child_state
+
+            waiting_costs = node.waiting_costs[:agent] + (child_waiting_cost,) + node.waiting_costs[agent + 1:]
+            agents_on_goal = node.agents_on_goal - on_goal + (target in self.goal_cells[agent])
+            yield child_key, child_state, cost, waiting_costs, agents_on_goal
+
+    def expand_batch(self,
+                     node: Node,
+                     closed: Dict[PackedState, int],
+                     search_options: SearchOptions,
+                     collision_table: CollisionTable) -> Tuple[
+            Iterator[Tuple[PackedState, int, Tuple[int, ...], int, int]], int]:
+        """
+        Expands a node like expand, but evaluates the children of a large partial expansion at once.
+        If the operators of the node produce at least BATCH_MIN_CHILDREN candidate children, the child states are built
+        as a NumPy array with a row of cells for every child, in the same order as expand produces them, and evaluated
+        by select_batch. Smaller expansions are evaluated per child, which is faster for a handful of children. In both
+        cases, the collisions are looked up in the dense collision table. All children have the same heuristic, which
+        is therefore not evaluated.
+        :param node:            parent node
+        :param closed:          Closed table of the search
+        :param search_options:  Options of the search
+        :param collision_table: Collisions of every cell at every time step
+        :returns:               Iterator over the child states with their cost, waiting costs, number of agents on a
+                                goal and number of collisions, and the next Δf value for the parent node
+        """
+        n = len(node.state)
+        tables = [pdb[cell] for cell, pdb in zip(node.state, self.pdbs)]
+        reachable_sums = get_reachable_sums(node, tables, search_options)
+        check_conflicts = not search_options.conflict_free_operators
+        if search_options.conflict_free_operators:
+            operator_finder = create_conflict_free_finder(node.delta_f, tables, node.state, reachable_sums)
+            next_value = operator_finder.next_target_value
+            # The number of conflict-free children is only known once they are produced, so only the first children
+            # are collected to choose between the evaluation per child and the batch
+            children = operator_finder.iterate_conflict_free_operators()
+            first_children = list(itertools.islice(children, BATCH_MIN_CHILDREN))
+            batched = len(first_children) == BATCH_MIN_CHILDREN
+            children = itertools.chain(first_children, children)
+            num_children = -1
+        else:
+            operators, next_value = find_operators(node.delta_f, tables, self.operator_cache, reachable_sums)
+            children = itertools.chain.from_iterable(itertools.product(*operator) for operator in operators)
+            num_children = sum(prod(map(len, operator)) for operator in operators)
+            batched = num_children >= BATCH_MIN_CHILDREN
+
+        time = node.time + 1
+        if not batched:
+            collisions = collision_table.get_list(time)
+            return ((child_state, cost, waiting_costs, agents_on_goal, sum(map(collisions.__getitem__, child_state)))
+                    for _, child_state, cost, waiting_costs, agents_on_goal
+                    in self.select_children(node, children, closed, check_conflicts)), next_value
+
+        batch = np.fromiter(itertools.chain.from_iterable(children), dtype=np.int32,
+                            count=num_children * n if num_children >= 0 else -1).reshape(-1, n)
+        return self.select_batch(node, batch, closed, check_conflicts, collision_table.get_row(time)), next_value
+
+    def select_batch(self,
+                     parent: Node,
+                     batch: np.ndarray,
+                     closed: Dict[PackedState, int],
+                     check_conflicts: bool,
+                     collisions: np.ndarray) -> Iterator[Tuple[PackedState, int, Tuple[int, ...], int, int]]:
+        """
+        Filters a batch of children of a node and computes the cost, waiting costs, agents on a goal and collisions of
+        the remaining children with array operations
+        :param parent:          The parent node
+        :param batch:           Array with the cells of a child state in every row
+        :param closed:          Closed table of the search
+        :param check_conflicts: Whether children with vertex or edge conflicts have to be filtered out
+        :param collisions:      Number of collisions of every cell at the time step of the children
+        :returns:               Iterator over the remaining child states with their cost, waiting costs, number of
+                                agents on a goal and number of collisions
+        """
+        n = len(parent.state)
+        if self.goal_mask is None:
+            self.goal_mask = np.zeros((n, len(self.tables.coordinates)), dtype=bool)
+            for i, goal_cells in enumerate(self.goal_cells):
+                self.goal_mask[i, list(goal_cells)] = True
+        parent_cells = np.array(parent.state, dtype=np.int32)
+        agents = np.arange(n)
+        on_goal = self.goal_mask[agents, parent_cells]
+        waiting_costs = np.array(parent.waiting_costs, dtype=np.int32)
+
+        if check_conflicts:
+            # Vertex conflicts: two agents in the same cell
+            ordered = np.sort(batch, axis=1)
+            valid = (ordered[:, 1:] != ordered[:, :-1]).all(axis=1)
+            # Edge conflicts: agent i moves to the cell of agent j while agent j moves to the cell of agent i
+            moves_to = batch[:, :, None] == parent_cells[None, None, :]
+            swaps = moves_to & moves_to.transpose(0, 2, 1)
+            swaps[:, agents, agents] = False
+            valid &= ~swaps.any(axis=(1, 2))
+            batch = batch[valid]
+
+        # Agents that are not on a goal always add 1 to the cost. Agents on a goal only add to the cost when they move.
+        stays = batch == parent_cells
+        costs = parent.cost + np.count_nonzero(~on_goal) + ((~stays & on_goal) * (waiting_costs + 1)).sum(axis=1)
+        child_waiting_costs = np.where(stays & on_goal, waiting_costs + 1, 0)
+        agents_on_goal = self.goal_mask[agents, batch].sum(axis=1)
+        child_collisions = collisions[batch].sum(axis=1)
+
+        # Check duplicates
+        for cells, cost, waiting_cost_row, child_agents_on_goal, child_collision_count in \
+                zip(batch.tolist(), costs.tolist(), child_waiting_costs.tolist(), agents_on_goal.tolist(),
+                    child_collisions.tolist()):
+            child_state = tuple(cells)
+            entry = closed.get(child_state)
+            if entry is not None and entry >> COST_SHIFT <= cost:
+                continue
+            yield child_state, cost, tuple(waiting_cost_row), child_agents_on_goal, child_collision_count
+
+    @staticmethod
+    def get_key(state: PackedState) -> PackedState:
+        """
+        Creates the key of a state in the closed table. Packed states are used as their own key.
+        :param state:   The state
+        :returns:       The key
+        """
+        return state
+
+    def get_heuristic(self, state: PackedState) -> int:
+        """
+        Calculates the heuristic for the given state
+        :param state:   state to calculate the heuristic for
+        :returns:       heuristic value for the state
+        """
+        total = 0
+        for cell, heuristic in zip(state, self.heuristics):
+            total += heuristic[cell]
+        return total
+
+    def get_collisions(self, state: PackedState, time: int, cats: List[CAT], ignored_paths: List[int]) -> int:
+        """
+        Counts the collisions of a state with the paths in the collision avoidance tables
+        :param state:           The state
+        :param time:            The time step of the state
+        :param cats:            Collision avoidance tables
+        :param ignored_paths:   Identifiers of the paths that should be ignored
+        :returns:               The number of collisions
+        """
+        coordinates = self.tables.coordinates
+        collisions = 0
+        for cell in state:
+            collisions += sum(cat.get_cat(ignored_paths, coordinates[cell], time) for cat in cats)
+        return collisions
+
+    def get_agent_collisions(self, cell: int, time: int, cats: List[CAT], ignored_paths: List[int]) -> int:
+        """
+        Counts the collisions of a single agent with the paths in the collision avoidance tables
+        :param cell:            Cell of the agent
+        :param time:            The time step
+        :param cats:            Collision avoidance tables
+        :param ignored_paths:   Identifiers of the paths that should be ignored
+        :returns:               The number of collisions
+        """
+        coordinate = self.tables.coordinates[cell]
+        return sum(cat.get_cat(ignored_paths, coordinate, time) for cat in cats)
+
+    @staticmethod
+    def get_cost(base_cost: int, child_state: PackedState, goal_agents: List[Tuple[int, int, int]]) -> int:
+        """
+        Calculates the cost of a child state incrementally. Only the agents that are on a goal in the parent state have
+        to be checked.
+        :param base_cost:   Cost of the parent node plus the number of agents that are not on a goal
+        :param child_state: The child state
+        :param goal_agents: Index, cell and cost of moving away (waiting cost + 1) of every agent on a goal
+        :returns:           The cost of the child state
+        """
+        cost = base_cost
+        for i, cell, move_cost in goal_agents:
+            if child_state[i] != cell:
+                cost += move_cost
+        return cost
+
+    def calculate_cost(self, parent: Node, child_state: PackedState) -> int:
+        """
+        Calculates the cost of a child state from scratch. Used to check the incremental cost in debug mode.
+        :param parent:      The parent node
+        :param child_state: The child state
+        :returns:           The cost of the child state
+        """
+        cost = parent.cost
+        for i, cell in enumerate(parent.state):
+            if cell not in self.goal_cells[i]:
+                cost += 1
+            elif child_state[i] != cell:
+                cost += parent.waiting_costs[i] + 1
+        return cost
+
+    @staticmethod
+    def get_waiting_costs(parent: Node, child_state: PackedState, on_goal: List[bool]) -> Tuple[int, ...]:
+        """
+        Calculates the waiting costs of the agents in a child state
+        :param parent:      The parent node
+        :param child_state: The child state
+        :param on_goal:     For every agent whether it is on a goal in the parent state
+        :returns:           The waiting cost of every agent
+        """
+        return tuple(waiting_cost + 1 if on_goal[i] and child_state[i] == cell else 0
+                     for i, (cell, waiting_cost) in enumerate(zip(parent.state, parent.waiting_costs)))
+
+    def get_children(self, parent: Node, v: int, search_options: SearchOptions,
+                     collision_set: Optional[int] = None) -> Tuple[Iterator[PackedState], int]:
+        """
+        Uses the operator selection function (OSF) to get all relevant children from the parent node.
+        :param parent:          Parent node
+        :param v:               The Δf value.
+        :param search_options:  Options of the search, which select the variant of the operator finder
+        :param collision_set:   Bit mask of the agents that branch with subdimensional expansion. The other agents
+                                only follow their individually optimal policy. All agents branch if None.
+                                Subdimensional expansion grows the collision sets from the conflicts of the children,
+                                so conflict-free operators are not used if a collision set is given.
+        :returns:               Iterator that lazily produces the child states and the next Δf value for the parent
+                                node
+        """
+        if collision_set is None:
+            tables = [pdb[cell] for cell, pdb in zip(parent.state, self.pdbs)]
+        else:
+            tables = [(pdb if collision_set >> i & 1 else policy_pdb)[cell]
+                      for i, (cell, pdb, policy_pdb) in enumerate(zip(parent.state, self.pdbs, self.policy_pdbs))]
+        reachable_sums = get_reachable_sums(parent, tables, search_options)
+        if search_options.conflict_free_operators and collision_set is None:
+            operator_finder = create_conflict_free_finder(v, tables, parent.state, reachable_sums)
+            return operator_finder.iterate_conflict_free_operators(), operator_finder.next_target_value
+
+        operators, next_target_value = find_operators(v, tables, self.operator_cache, reachable_sums)
+
+        # The rows of the packed PDB contain the cells that the agents move to, so the cartesian product of the rows
+        # directly contains the child states
+        children = (itertools.product(*operator) for operator in operators)
+        return itertools.chain.from_iterable(children), next_target_value
+
+    @staticmethod
+    def get_conflicts(parent_state: PackedState, child_state: PackedState) -> int:
+        """
+        Finds the agents that are in a vertex or edge conflict in a child state
+        :param parent_state:    The parent state
+        :param child_state:     The child state
+        :return:                Bit mask of the agents in a conflict, 0 if there are no conflicts
+        """
+        conflicts = 0
+        if len(set(child_state)) < len(child_state):
+            agents: Dict[int, int] = dict()
+            for i, cell in enumerate(child_state):
+                j = agents.setdefault(cell, i)
+                if j != i:
+                    conflicts |= (1 << i) | (1 << j)
+
+        # Edge conflicts: agent i moves to the cell of agent j while agent j moves to the cell of agent i
+        parent_indices = dict((cell, i) for i, cell in enumerate(parent_state))
+        for i, cell in enumerate(child_state):
+            j = parent_indices.get(cell)
+            if j is not None and j != i and child_state[j] == parent_state[i]:
+                conflicts |= (1 << i) | (1 << j)
+        return conflicts
+
+    def get_moves(self, parent_key: PackedState, child_key: PackedState) -> bytes:
+        """
+        Encodes the moves of the agents from a parent to a child for the node arena
+        :param parent_key:  Key of the parent state
+        :param child_key:   Key of the child state
+        :return:            Move code of every agent
+        """
+        return bytes(map(self.move_codes.__getitem__, map(sub, child_key, parent_key)))
+
+    def replay_path(self, agents: List[Agent], moves: List[bytes]) -> List[Path]:
+        """
+        Reconstructs the paths of the agents by replaying moves from the node arena
+        :param agents:  The agents in their initial state
+        :param moves:   Move codes of every agent for every time step
+        :return:        List of paths
+        """
+        paths = []
+        for i, identifier in enumerate(self.agent_table.identifiers):
+            cell = self.initial_state[i]
+            path = [self.agent_table.to_coordinates(cell)]
+            for step in moves:
+                cell += self.move_offsets[step[i]]
+                path.append(self.agent_table.to_coordinates(cell))
+            paths.append(Path(path, identifier))
+        return paths
+
+    def convert_path(self, nodes: List[Node]) -> List[Path]:
+        """
+        Converts a list of nodes into a list of agent paths
+        :param nodes:   List of nodes
+        :return:        List of paths
+        """
+        assert nodes[-1].cost <= len(nodes) * len(self.agent_table)
+        return self.convert_states([node.state for node in nodes])
+
+    def convert_states(self, states: List[PackedState]) -> List[Path]:
+        """
+        Converts a list of states into a list of agent paths
+        :param states:  State of every time step
+        :return:        List of paths
+        """
+        paths = []
+        for i, identifier in enumerate(self.agent_table.identifiers):
+            path = [self.agent_table.to_coordinates(state[i]) for state in states]
+            paths.append(Path(path, identifier))
+        return paths
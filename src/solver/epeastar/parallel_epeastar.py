@@ -0,0 +1,492 @@
+import multiprocessing
+import queue
+from array import array
+from time import perf_counter
+from typing import List, Optional, Tuple, Dict
+
+from src.solver.epeastar.frontier import create_frontier, get_admissible_value
+from src.solver.epeastar.mapf_problem import MAPFProblem, COST_SHIFT, FULLY_EXPANDED
+from src.solver.epeastar.packed_mapf_problem import PackedMAPFProblem
+from src.solver.epeastar.search_options import SearchOptions
+from src.util.agent import Agent
+from src.util.cat import CAT
+from src.util.deadline import Deadline
+from src.util.path import Path
+from src.util.state import PackedState
+from src.util.statistic_tracker import StatisticTracker, SearchStatistics
+
+# Minimum number of agents in a group for which the parallel search is used. Smaller groups are solved faster than the
+# worker processes are started.
+PARALLEL_MIN_AGENTS = 5
+# Number of expansions of a worker between two checks of its inbox
+EXPANSIONS_PER_POLL = 64
+# Number of children for another worker after which they are sent, even if the expansions of the poll are not finished
+SEND_BATCH_SIZE = 256
+# Number by which the lower bound of a worker can exceed the lowest lower bound of all workers and of the children
+# underway before it waits for the other workers. Without a limit, a worker that keeps the CPU expands nodes far above
+# the current f-layer.
+LAYER_WINDOW = 1
+# Time in seconds after which the coordinator checks the deadline when no worker has become idle
+DEADLINE_CHECK_INTERVAL = 0.1
+
+# A child that is sent to the worker that owns its state: state, cost, waiting costs, number of agents on a goal,
+# heuristic, collisions, time and global arena index of the parent
+ChildRecord = Tuple[PackedState, int, Tuple[int, ...], int, int, int, int, int]
+
+
+class ParallelEPEAStar:
+    """
+    Hash-distributed parallel EPEA* (HDA*).
+    Every state is owned by one of the worker processes, which is selected by the hash of the state. Every worker has
+    its own open list and closed table, and expands the nodes of its own states with partial expansion. Children that
+    are owned by another worker are sent to it in batches through its inbox queue. Since the workers do not expand the
+    nodes in the global order of their values, a goal that a worker accepts is only an incumbent solution. The
+    incumbent is shared between the workers, which discard all nodes that can not lead to a cheaper solution.
+    The value of a partially expanded node is not a lower bound on the cost of its children, since an agent that waits
+    on its goal adds 1 to the Δf value of an operator but nothing to the cost. Sequential EPEA* reaches every state
+    with its lowest cost first, so this does not matter there, but a worker can reach a state again with a lower cost
+    after the incumbent has been found. Nodes are therefore only discarded if their admissible value (see
+    get_admissible_value) is at least the cost of the incumbent.
+    The workers expand the f-layers in step: a worker only expands nodes within LAYER_WINDOW of the lowest lower bound
+    of all workers, which includes the children that are underway to a worker, and otherwise blocks on its inbox until
+    a worker that raises the lowest lower bound wakes it.
+    The coordinator stops the search when no worker has a node below the incumbent and no children are underway. It
+    blocks until a worker becomes idle, and then reads the number of sent and received children twice. The search only
+    stops if both readings are equal, so a batch that is received between the readings is never missed. The incumbent
+    is then optimal.
+    Nodes refer to their parent by a global arena index, from which the coordinator reconstructs the path by asking the
+    worker that owns every state for its parent.
+    The workers are forked, so they share the problem and the collision avoidance tables with the coordinator.
+    """
+
+    def __init__(self,
+                 problem: MAPFProblem,
+                 agents: List[Agent],
+                 cats: List[CAT],
+                 stat_tracker: StatisticTracker,
+                 max_cost=float('inf'),
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None):
+        """
+        Constructs a ParallelEPEAStar instance.
+        :param problem:         The MAPFProblem that should be solved
+        :param agents:          The moving agents
+        :param cats:            Collision avoidance tables
+        :param stat_tracker:    Statistic tracker
+        :param max_cost:        The maximum cost of the solution. Stop the solver if exceeded.
+        :param search_options:  Options that select the variant of EPEA*. Always uses packed states.
+        :param deadline:        Deadline after which the search is aborted with SolverTimeout
+        """
+        self.search_options = search_options if search_options is not None else SearchOptions()
+        self.problem = PackedMAPFProblem(problem, agents)
+        self.agents = agents
+        self.cats = cats
+        self.stat_tracker = stat_tracker
+        self.max_cost = max_cost
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.workers = self.search_options.workers
+
+    def solve(self) -> Optional[Tuple[List[Path], int]]:
+        """
+        Solves the problem instance in self.problem with the worker processes.
+        The statistics of all workers are added up and reported to the statistic tracker as a single search.
+        :return: Path for every agent if a solution was found, otherwise None
+        """
+        statistics = SearchStatistics(len(self.agents))
+        start_time = perf_counter()
+        context = multiprocessing.get_context('fork')
+        workers = self.workers
+        inboxes = [context.Queue() for _ in range(workers)]
+        results = context.Queue()
+        # Idle workers notify the coordinator on this queue
+        events = context.Queue()
+        # Number of children that have been sent to and received by every worker. The sent children and the floor of
+        # a worker are guarded by the lock of its inbox.
+        inbox_locks = [context.Lock() for _ in range(workers)]
+        sent = context.RawArray('q', workers)
+        received = context.RawArray('q', workers)
+        lower_bounds = context.RawArray('d', [0.0] * workers)
+        # Lowest lower bound of the children that are underway to every worker
+        floors = context.RawArray('d', [float('inf')] * workers)
+        # Workers that wait for the other workers to catch up with the layer window
+        window_lock = context.Lock()
+        stalled = context.RawArray('b', workers)
+        incumbent = context.Value('d', self.max_cost)
+        goal = context.RawValue('q', -1)
+
+        processes = []
+        try:
+            for index in range(workers):
+                worker = SearchWorker(index, self.problem, self.cats, self.search_options, inboxes, results, events,
+                                      inbox_locks, sent, received, lower_bounds, floors, window_lock, stalled,
+                                      incumbent, goal)
+                process = context.Process(target=worker.run, daemon=True)
+                process.start()
+                processes.append(process)
+
+            initial_state = self.problem.initial_state
+            heuristic = self.problem.get_heuristic(initial_state)
+            agents_on_goal = self.problem.count_agents_on_goal(initial_state)
+            if len(self.agents) + heuristic - agents_on_goal < self.max_cost:
+                owner = hash(initial_state) % workers
+                sent[owner] = 1
+                inboxes[owner].put((
+                    'children',
+                    [(initial_state, len(self.agents), tuple(agent.waiting_cost for agent in self.agents),
+                      agents_on_goal, heuristic, 0, 0, -1)]))
+                self.wait(events, sent, received, lower_bounds, incumbent)
+
+            solution = None
+            if goal.value >= 0:
+                paths = self.problem.convert_states(self.get_states(goal.value, inboxes, results))
+                solution = paths, int(incumbent.value)
+                statistics.cost = solution[1]
+
+            for inbox in inboxes:
+                inbox.put(('stop',))
+            for _ in range(workers):
+                _, expanded, re_expansions, generated, frontier_peak, closed_size = results.get()
+                statistics.expanded += expanded
+                statistics.re_expansions += re_expansions
+                statistics.generated += generated
+                statistics.frontier_peak += frontier_peak
+                statistics.closed_size += closed_size
+            return solution
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            for inbox in inboxes:
+                inbox.cancel_join_thread()
+            statistics.time = perf_counter() - start_time
+            self.stat_tracker.search_finished(statistics)
+
+    def wait(self, events, sent, received, lower_bounds, incumbent) -> None:
+        """
+        Waits until no worker has a node with a value below the incumbent and no children are underway. The state of
+        the workers is only read when a worker has become idle, or when the deadline is checked.
+        :param events:          Queue on which the workers notify that they have become idle
+        :param sent:            Number of children that have been sent to every worker
+        :param received:        Number of received children of every worker
+        :param lower_bounds:    Lower bound on the cost of the solutions in the open list of every worker
+        :param incumbent:       Cost of the best solution so far
+        """
+        while True:
+            try:
+                events.get(timeout=DEADLINE_CHECK_INTERVAL)
+            except queue.Empty:
+                pass
+            self.deadline.check()
+            total_received, idle, total_sent = self.read_progress(sent, received, lower_bounds, incumbent)
+            if idle and total_sent == total_received and \
+                    self.read_progress(sent, received, lower_bounds, incumbent) == (total_received, idle, total_sent):
+                return
+
+    @staticmethod
+    def read_progress(sent, received, lower_bounds, incumbent) -> Tuple[int, bool, int]:
+        """
+        Reads the progress of the workers
+        :param sent:            Number of children that have been sent to every worker
+        :param received:        Number of received children of every worker
+        :param lower_bounds:    Lower bound on the cost of the solutions in the open list of every worker
+        :param incumbent:       Cost of the best solution so far
+        :return:                The total number of received children, whether all workers are idle, and the total
+                                number of sent children
+        """
+        # The received children are read first, since a worker updates its lower bound before it counts them
+        total_received = sum(received)
+        idle = all(lower_bound >= incumbent.value for lower_bound in lower_bounds)
+        return total_received, idle, sum(sent)
+
+    def get_states(self, goal: int, inboxes, results) -> List[PackedState]:
+        """
+        Reconstructs the states of the path to a goal from the arenas of the workers
+        :param goal:    Global arena index of the goal
+        :param inboxes: Inbox of every worker
+        :param results: Queue on which the workers reply
+        :return:        State of every time step
+        """
+        states = []
+        index = goal
+        while index >= 0:
+            inboxes[index % self.workers].put(('path', index // self.workers))
+            _, index, state = results.get()
+            states.append(state)
+        states.reverse()
+        return states
+
+
+class SearchWorker:
+    """
+    Worker process of parallel EPEA*, which searches the states that it owns
+    """
+
+    __slots__ = 'index', 'problem', 'cats', 'ignored_paths', 'search_options', 'inboxes', 'results', 'events', \
+        'inbox_locks', 'sent', 'received', 'lower_bounds', 'floors', 'window_lock', 'stalled', 'incumbent', 'goal', \
+        'workers', 'num_agents', 'frontier', 'closed', 'parents', 'states', 'outboxes', 'expanded', 're_expansions', \
+        'generated', 'frontier_peak', 'node_class'
+
+    def __init__(self, index: int, problem: PackedMAPFProblem, cats: List[CAT], search_options: SearchOptions,
+                 inboxes, results, events, inbox_locks, sent, received, lower_bounds, floors, window_lock, stalled,
+                 incumbent, goal):
+        """
+        Constructs a SearchWorker instance
+        :param index:           Index of the worker
+        :param problem:         The problem of the search
+        :param cats:            Collision avoidance tables
+        :param search_options:  Options of the search
+        :param inboxes:         Inbox of every worker
+        :param results:         Queue on which the workers reply to the coordinator
+        :param events:          Queue on which the workers notify the coordinator that they have become idle
+        :param inbox_locks:     Lock of every worker that guards its sent children and its floor
+        :param sent:            Shared number of children that have been sent to every worker
+        :param received:        Shared number of received children of every worker
+        :param lower_bounds:    Shared lower bound on the cost of the solutions in the open list of every worker
+        :param floors:          Shared lowest lower bound of the children that are underway to every worker
+        :param window_lock:     Lock that guards the stalled workers
+        :param stalled:         Shared flag of every worker that waits for the other workers to catch up
+        :param incumbent:       Shared cost of the best solution so far
+        :param goal:            Shared global arena index of the best solution so far
+        """
+        self.index = index
+        self.problem = problem
+        self.cats = cats
+        self.ignored_paths = list(problem.agent_table.identifiers)
+        self.search_options = search_options
+        self.inboxes = inboxes
+        self.results = results
+        self.events = events
+        self.inbox_locks = inbox_locks
+        self.sent = sent
+        self.received = received
+        self.lower_bounds = lower_bounds
+        self.floors = floors
+        self.window_lock = window_lock
+        self.stalled = stalled
+        self.incumbent = incumbent
+        self.goal = goal
+        self.workers = len(inboxes)
+        self.num_agents = len(problem.agent_table)
+        self.frontier = create_frontier(search_options.frontier)
+        self.node_class = search_options.get_node_class()
+        self.closed: Dict[PackedState, int] = dict()
+        # Global arena index of the parent and state of every node that this worker has accepted
+        self.parents = array('q')
+        self.states: List[PackedState] = []
+        self.outboxes: List[List[ChildRecord]] = [[] for _ in range(self.workers)]
+        self.expanded = 0
+        self.re_expansions = 0
+        self.generated = 0
+        self.frontier_peak = 0
+
+    def run(self) -> None:
+        """
+        Main loop of the worker, which alternates between expansions and the messages in its inbox until it is stopped
+        """
+        inbox = self.inboxes[self.index]
+        self.publish()
+        while True:
+            if self.is_active():
+                try:
+                    message = inbox.get_nowait()
+                except queue.Empty:
+                    message = None
+            else:
+                message = self.wait(inbox)
+            # A wake message only makes the worker check its state again
+            if message is not None:
+                if message[0] == 'children':
+                    self.receive(message[1])
+                elif message[0] == 'path':
+                    self.results.put(('path', self.parents[message[1]], self.states[message[1]]))
+                elif message[0] == 'stop':
+                    self.results.put(('statistics', self.expanded, self.re_expansions, self.generated,
+                                      self.frontier_peak, len(self.closed)))
+                    # The coordinator no longer reads the notifications of idle workers
+                    self.events.cancel_join_thread()
+                    return
+            if self.is_active():
+                self.expand()
+            self.publish()
+
+    def wait(self, inbox) -> Optional[Tuple]:
+        """
+        Blocks until a message arrives. A worker that still has nodes below the incumbent waits for the other workers
+        to catch up, and is marked as stalled so that it is woken when the layer window moves. Otherwise, the worker is
+        idle and notifies the coordinator.
+        :param inbox:   Inbox of the worker
+        :return:        The message, or None if the worker became active before it was marked as stalled
+        """
+        with self.window_lock:
+            if self.is_active():
+                return None
+            stalled = self.get_lower_bound() < self.incumbent.value
+            self.stalled[self.index] = stalled
+        if not stalled:
+            self.events.put(self.index)
+        message = inbox.get()
+        self.stalled[self.index] = False
+        return message
+
+    def wake_stalled(self) -> None:
+        """
+        Wakes the stalled workers whose lower bound is within the layer window. Called after the lowest lower bound of
+        all workers may have been raised.
+        """
+        with self.window_lock:
+            if not any(self.stalled):
+                return
+            limit = self.get_limit()
+            for worker, stalled in enumerate(self.stalled):
+                if stalled and self.lower_bounds[worker] < limit:
+                    self.stalled[worker] = False
+                    self.inboxes[worker].put(('wake',))
+
+    def is_active(self) -> bool:
+        """
+        Checks if the worker can have a node that improves the incumbent, and is not too far ahead of the other workers
+        :return:    True if the lower bound of the open list is below the cost of the incumbent and below the limit of
+                    the layer window
+        """
+        return self.get_lower_bound() < self.get_limit()
+
+    def get_limit(self) -> float:
+        """
+        Computes the lower bound up to which the worker expands nodes
+        :return:    The lowest of the cost of the incumbent and the end of the layer window
+        """
+        return min(self.incumbent.value, min(min(self.lower_bounds), min(self.floors)) + LAYER_WINDOW + 1)
+
+    def get_lower_bound(self) -> float:
+        """
+        Computes a lower bound on the cost of every solution that can still be found from the open list. Every agent
+        can be on its goal, so this is the lowest value in the open list minus the number of agents.
+        :return:    The lower bound, or infinity if the open list is empty
+        """
+        return self.frontier.get_lower_bound() - self.num_agents if self.frontier else float('inf')
+
+    def publish(self) -> None:
+        """
+        Publishes the lower bound of the open list of the worker to the other workers and the coordinator, and wakes
+        the stalled workers if it has been raised
+        """
+        lower_bound = self.get_lower_bound()
+        raised = lower_bound > self.lower_bounds[self.index]
+        self.lower_bounds[self.index] = lower_bound
+        if raised:
+            self.wake_stalled()
+
+    def receive(self, children: List[ChildRecord]) -> None:
+        """
+        Adds the children that another worker has sent to the open list. The lower bound is published before the
+        children are counted, so the coordinator never sees the children as received while the worker seems idle. The
+        floor of the worker is lifted once all children that have been sent to it are received.
+        :param children:    The children
+        """
+        for child in children:
+            self.accept(child)
+        self.publish()
+        with self.inbox_locks[self.index]:
+            self.received[self.index] += len(children)
+            raised = self.received[self.index] == self.sent[self.index] and self.floors[self.index] < float('inf')
+            if raised:
+                self.floors[self.index] = float('inf')
+        if raised:
+            self.wake_stalled()
+
+    def accept(self, child: ChildRecord) -> None:
+        """
+        Adds a child to the open list and the closed table, unless its state has been reached with the same or a lower
+        cost. A goal replaces the incumbent instead if it is cheaper.
+        :param child:   The child
+        """
+        state, cost, waiting_costs, agents_on_goal, heuristic, collisions, time, parent = child
+        entry = self.closed.get(state)
+        if entry is not None and entry >> COST_SHIFT <= cost:
+            return
+        self.closed[state] = cost << COST_SHIFT
+        index = len(self.parents) * self.workers + self.index
+        self.parents.append(parent)
+        self.states.append(state)
+        if agents_on_goal == self.num_agents:
+            # A goal is never expanded, so it becomes the incumbent as soon as it is accepted
+            with self.incumbent.get_lock():
+                if cost < self.incumbent.value:
+                    self.incumbent.value = cost
+                    self.goal.value = index
+            return
+        self.frontier.push(self.node_class(state, cost, heuristic, collisions, time, parent=index,
+                                           waiting_costs=waiting_costs, agents_on_goal=agents_on_goal))
+        if len(self.frontier) > self.frontier_peak:
+            self.frontier_peak = len(self.frontier)
+
+    def expand(self) -> None:
+        """
+        Expands the nodes with the lowest values in the open list, and sends the children that are owned by other
+        workers
+        """
+        frontier = self.frontier
+        closed = self.closed
+        problem = self.problem
+        workers = self.workers
+        limit = self.get_limit()
+        for _ in range(EXPANSIONS_PER_POLL):
+            if not frontier:
+                break
+            node = frontier.pop()
+            if node.value - self.num_agents >= limit:
+                # All other nodes in the open list have a value of at least the value of this node
+                frontier.push(node)
+                break
+            if get_admissible_value(node) >= self.incumbent.value:
+                continue
+            key = node.state
+            entry = closed[key]
+            if entry & FULLY_EXPANDED or node.cost > entry >> COST_SHIFT:
+                continue
+
+            child_states, next_value = problem.expand(node, closed, self.search_options)
+            self.expanded += 1
+            if node.delta_f > 0:
+                self.re_expansions += 1
+            heuristic = node.heuristic + node.delta_f - self.num_agents
+            time = node.time + 1
+            for child_key, child_state, cost, waiting_costs, agents_on_goal in child_states:
+                collisions = problem.get_collisions(child_state, time, self.cats, self.ignored_paths)
+                child = (child_state, cost, waiting_costs, agents_on_goal, heuristic, collisions, time, node.parent)
+                self.generated += 1
+                owner = hash(child_key) % workers
+                if owner == self.index:
+                    self.accept(child)
+                else:
+                    outbox = self.outboxes[owner]
+                    outbox.append(child)
+                    if len(outbox) >= SEND_BATCH_SIZE:
+                        self.send(owner)
+
+            if next_value == float('inf'):
+                closed[key] = (node.cost << COST_SHIFT) | FULLY_EXPANDED
+            elif node.cost + node.heuristic + next_value - node.agents_on_goal < self.incumbent.value:
+                node.delta_f = next_value
+                node.value = node.cost + node.heuristic + node.delta_f
+                frontier.push(node)
+
+        for owner, outbox in enumerate(self.outboxes):
+            if outbox:
+                self.send(owner)
+
+    def send(self, owner: int) -> None:
+        """
+        Sends the children in the outbox of another worker. The children are counted and the floor of the worker is
+        lowered to their lowest lower bound before they are sent.
+        :param owner:   Index of the worker
+        """
+        children = self.outboxes[owner]
+        self.outboxes[owner] = []
+        lower_bound = min(child[1] + child[4] for child in children) - self.num_agents
+        with self.inbox_locks[owner]:
+            self.sent[owner] += len(children)
+            if lower_bound < self.floors[owner]:
+                self.floors[owner] = lower_bound
+        self.inboxes[owner].put(('children', children))
@@ -1,6 +1,6 @@
 from typing import NewType, List, Tuple, Dict
 
-from src.solver.epeastar.heuristic import Heuristic
+from src.solver.epeastar.heuristic import Heuristic, UNREACHABLE
 from src.util.direction import Direction
 from src.util.grid import Grid
 
@@ -33,11 +33,11 @@ class PDB:
         :param heuristic:   Precomputed heuristic function
         """
         single_color_osf: List[List[PDBTable]] = []
+        table = heuristic.heuristic[color]
         for y in range(grid.height):
             osf_grid_row = []
             for x in range(grid.width):
-                h = heuristic.heuristic[color][y][x]
-                if h != float('inf'):
+                if table.item(y, x) != UNREACHABLE:
                     osf_table = self.generate_osf_table(grid, x, y, heuristic, color)
                     osf_grid_row.append(osf_table)
                 else:
@@ -58,14 +58,15 @@ class PDB:
         :param color:           color for the OSF
         :returns:               OSF table with Δf values for each move, sorted on Δf
         """
-        location_heuristic = heuristic.heuristic[color][y][x]
+        table = heuristic.heuristic[color]
+        location_heuristic = table.item(y, x)
         expanded_table = []
         for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]:
             dx, dy = direction.value
             new_x: int = x + dx
             new_y: int = y + dy
             if grid.traversable_coords(new_x, new_y):
-                delta_f: int = 1 + heuristic.heuristic[color][new_y][new_x] - location_heuristic
+                delta_f: int = 1 + table.item(new_y, new_x) - location_heuristic
                 expanded_table.append((direction, delta_f))
 
         expanded_table.append((Direction.WAIT, 1))
@@ -0,0 +1,77 @@
+import typing
+from collections import OrderedDict
+from typing import List, Optional
+
+from src.solver.epeastar.epeastar import EPEAStar
+from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.search_options import SearchOptions, NODE_MEMORY
+from src.util.agent import Agent
+from src.util.cat import CAT
+from src.util.deadline import Deadline
+from src.util.statistic_tracker import StatisticTracker
+
+
+class SearchCache:
+    """
+    Least recently used (LRU) cache of resumable EPEA* searches.
+    Independence detection solves the same group of agents again for every goal assignment in which the agents have the
+    same goals, each time with a different maximum cost. The cache keeps the searches of these groups, so a search that
+    was suspended at its maximum cost continues with its open list and closed table instead of starting over, and a
+    search that has found its solution returns it directly. The memory of the cache is estimated from the number of
+    nodes that the suspended searches keep.
+    """
+
+    __slots__ = 'searches', 'max_nodes', 'stat_tracker'
+
+    def __init__(self, max_memory: int, stat_tracker: StatisticTracker):
+        """
+        Constructs an empty SearchCache
+        :param max_memory:      Memory ceiling of the cache in bytes
+        :param stat_tracker:    Statistic tracker that counts the resumed searches
+        """
+        self.searches: typing.OrderedDict[tuple, EPEAStar] = OrderedDict()
+        self.max_nodes = max(1, max_memory // NODE_MEMORY)
+        self.stat_tracker = stat_tracker
+
+    def get_solver(self,
+                   problem: MAPFProblem,
+                   agents: List[Agent],
+                   cats: List[CAT],
+                   max_cost,
+                   search_options: Optional[SearchOptions],
+                   deadline: Optional[Deadline]) -> EPEAStar:
+        """
+        Looks up the search of a group of agents, or creates a new resumable search if the group is not in the cache
+        :param problem:         The MAPFProblem of the group, which must be the same for all calls
+        :param agents:          The agents of the group
+        :param cats:            Collision avoidance tables
+        :param max_cost:        The maximum cost of the solution
+        :param search_options:  Options that select the variant of EPEA*
+        :param deadline:        Deadline after which the search is aborted with SolverTimeout
+        :return:                The search, which is ready to be solved with the new maximum cost
+        """
+        key = tuple((agent.identifier, agent.coord, agent.color) for agent in agents)
+        solver = self.searches.get(key)
+        if solver is not None:
+            self.searches.move_to_end(key)
+            solver.prepare(cats, max_cost)
+            self.stat_tracker.search_resumed()
+            return solver
+
+        self.evict()
+        solver = EPEAStar(problem, agents, cats, self.stat_tracker, max_cost, search_options=search_options,
+                          deadline=deadline, resumable=True)
+        self.searches[key] = solver
+        return solver
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used searches until the suspended searches keep fewer nodes than the ceiling
+        """
+        size = sum(solver.get_size() for solver in self.searches.values())
+        while size >= self.max_nodes and self.searches:
+            _, solver = self.searches.popitem(last=False)
+            size -= solver.get_size()
+
+    def __len__(self):
+        return len(self.searches)
@@ -0,0 +1,221 @@
+from typing import Optional, Type
+
+from src.solver.epeastar.frontier import FrontierType
+from src.solver.epeastar.operator_cache import OperatorCache
+from src.util.node import Node, LayeredNode, SubdimensionalNode
+from src.util.statistic_tracker import StatisticTracker
+
+# Estimated memory in bytes of a node in the open list including its state, or of an entry in the closed table
+NODE_MEMORY = 250
+
+
+class SearchOptions:
+    """
+    Options that select the variant of the low-level EPEA* search. The default options correspond to plain EPEA*.
+    Groups of a single agent are solved with space-time A*, to which only the debug checks apply, unless profiling is
+    enabled. Workers, iterative deepening and the other options that change the search do not apply to these groups.
+    """
+
+    __slots__ = 'packed_states', 'frontier', 'conflict_free_operators', 'operator_cache_memory', 'delta_f_layers', \
+        'debug_checks', 'operator_decomposition', 'node_limit', 'focal_weight', \
+        'compact_parents', 'profile', 'search_cache_memory', 'batch_children', 'spill_distance', 'spill_directory', \
+        'workers', 'iterative_deepening', 'transposition_table_size', 'subdimensional_expansion', 'record_statistics'
+
+    def __init__(self,
+                 packed_states: bool = False,
+                 frontier: FrontierType = FrontierType.Heap,
+                 conflict_free_operators: bool = False,
+                 operator_cache_memory: int = 0,
+                 delta_f_layers: bool = False,
+                 debug_checks: bool = False,
+                 operator_decomposition: bool = False,
+                 node_limit: int = 0,
+                 memory_limit: int = 0,
+                 focal_weight: float = 1.0,
+                 compact_parents: bool = False,
+                 profile: bool = False,
+                 search_cache_memory: int = 0,
+                 batch_children: bool = False,
+                 spill_distance: int = 0,
+                 spill_directory: Optional[str] = None,
+                 workers: int = 1,
+                 iterative_deepening: bool = False,
+                 transposition_table_size: int = 1000000,
+                 subdimensional_expansion: bool = False,
+                 record_statistics: bool = False):
+        """
+        Constructs a SearchOptions instance
+        :param packed_states:           When set to true, EPEA* stores states as tuples of grid cell indices instead of
+                                        tuples of agents
+        :param frontier:                Implementation of the open list
+        :param conflict_free_operators: When set to true, the operator finder prunes joint moves with vertex or edge
+                                        conflicts while they are enumerated
+        :param operator_cache_memory:   Memory ceiling in bytes of the LRU cache for the results of the operator finder.
+                                        The cache is disabled when set to 0. Conflict-free operators depend on the
+                                        positions of the agents and are never cached.
+        :param delta_f_layers:          When set to true, the reachable Δf values of the operators of a node are stored
+                                        in the node on its first expansion. Later partial expansions then skip all
+                                        operators that can not reach the Δf value and continue with the next reachable
+                                        Δf value instead of a lower bound on it.
+        :param debug_checks:            When set to true, the incrementally computed cost and heuristic of every child
+                                        are checked against a computation from scratch. Space-time A* checks the
+                                        value of every child against the Δf value of its PDB row.
+        :param operator_decomposition:  When set to true, EPEA* moves a single agent per node with operator
+                                        decomposition (OD). OD always uses packed states. Conflict-free operators, Δf
+                                        layers and the operator cache only apply to joint operators and are not used.
+        :param node_limit:              Maximum number of nodes in the open list and the closed table of a search. When
+                                        the limit is reached, the worst leaves of the search tree are collapsed into
+                                        their parents. 0 means no limit. Not used with operator decomposition.
+        :param memory_limit:            Maximum memory of a search in bytes, which is converted into a node limit with
+                                        an estimate of the memory per node. 0 means no limit.
+        :param focal_weight:            Suboptimality factor. When above 1, EPEA* uses focal search, which selects the
+                                        node with the fewest collisions and then the lowest heuristic among the nodes
+                                        with a value of at most the factor times the lower bound. The lower bound is
+                                        the lowest value in the open list minus the agents on a goal of partially
+                                        expanded nodes, since waiting on a goal adds to Δf but not to the cost. It
+                                        never exceeds the optimal cost, so the cost of every solution is at most the
+                                        factor times the optimal cost.
+        :param compact_parents:         When set to true, nodes refer to their parent by an index in a node arena, which
+                                        stores the moves of the agents. Expanded nodes and their states can then be
+                                        freed, and the paths are reconstructed by replaying the moves. Partially
+                                        expanded nodes in the open list only keep the key of their state until they are
+                                        expanded again. Not used with operator decomposition or a node limit, which
+                                        need the parent nodes.
+        :param profile:                 When set to true, the time spent in every phase of the searches and counters of
+                                        the expansions and children are collected in a SearchProfile in the statistic
+                                        tracker. Profiling slows down the search, but has no cost when disabled.
+                                        Groups of a single agent are then solved with EPEA* instead of space-time A*,
+                                        so the profile covers every search.
+        :param search_cache_memory:     Memory ceiling in bytes of the LRU cache of resumable searches, which lets
+                                        independence detection continue the search of a group of agents that has been
+                                        solved before in another goal assignment with a different maximum cost. The
+                                        cache is disabled when set to 0.
+        :param batch_children:          When set to true, the children of partial expansions with many candidate
+                                        children are built as a NumPy array and their conflicts, costs and collisions
+                                        are computed with array operations. The collisions of all children are looked up
+                                        in a dense collision table. Always uses packed states. Not used with operator
+                                        decomposition.
+        :param spill_distance:          When above 0, nodes with a value of at least this distance above the current
+                                        f-layer are spilled from the open list to files on disk, from which they are
+                                        reloaded when the search reaches their value. Always uses packed states and
+                                        compact parents. Not used with operator decomposition, a node limit or focal
+                                        search.
+        :param spill_directory:         Directory in which the files of the spilled nodes are created. The default
+                                        temporary directory is used if None.
+        :param workers:                 Number of worker processes of hash-distributed parallel EPEA*, which is used for
+                                        groups of at least PARALLEL_MIN_AGENTS agents when above 1. Always uses packed
+                                        states. Not used with operator decomposition, a node limit, focal search,
+                                        profiling or the search cache. Compact parents, batched children and spilling do
+                                        not apply to the workers.
+        :param iterative_deepening:     When set to true, groups are solved with EPE-IDA*, which only keeps the current
+                                        path in memory. Always uses packed states. Takes precedence over workers, and
+                                        the search cache is not used. Groups of a single agent are solved with
+                                        space-time A*, unless profiling is enabled.
+        :param transposition_table_size:    Maximum number of states in the transposition table of EPE-IDA*. Disabled
+                                            if 0, in which case duplicates are only detected on the current path and
+                                            EPE-IDA* explores every path to a state again, which is only feasible for
+                                            very small groups.
+        :param subdimensional_expansion:    When set to true, EPEA* uses subdimensional expansion (M*): only the agents
+                                            in the collision set of a node branch, while the other agents follow their
+                                            individually optimal policy. Conflicts add their agents to the collision
+                                            sets of the node and its ancestors, which are then expanded again. Always
+                                            uses packed states. Not used with operator decomposition, a node limit or
+                                            spilling, and not used by parallel EPEA* and EPE-IDA*. Batched children and
+                                            conflict-free operators do not apply, since the conflicts of the children
+                                            grow the collision sets.
+        :param record_statistics:       When set to true, the statistic tracker of the solver keeps the statistics of
+                                        every low-level search, every evaluated goal assignment and every merge instead
+                                        of only the totals. The records grow with the number of searches.
+        """
+        self.packed_states = packed_states
+        self.frontier = frontier
+        self.conflict_free_operators = conflict_free_operators
+        self.operator_cache_memory = operator_cache_memory
+        self.delta_f_layers = delta_f_layers
+        self.debug_checks = debug_checks
+        self.operator_decomposition = operator_decomposition
+        self.node_limit = node_limit
+        if memory_limit > 0:
+            memory_node_limit = max(1, memory_limit // NODE_MEMORY)
+            self.node_limit = min(self.node_limit, memory_node_limit) if self.node_limit > 0 else memory_node_limit
+        assert focal_weight >= 1
+        self.focal_weight = focal_weight
+        self.compact_parents = compact_parents
+        self.profile = profile
+        self.search_cache_memory = search_cache_memory
+        self.batch_children = batch_children
+        self.spill_distance = spill_distance
+        self.spill_directory = spill_directory
+        self.workers = workers
+        self.iterative_deepening = iterative_deepening
+        self.transposition_table_size = transposition_table_size
+        self.subdimensional_expansion = subdimensional_expansion
+        self.record_statistics = record_statistics
+
+    def get_name(self) -> str:
+        """
+        Creates a textual description of the options that differ from plain EPEA*
+        :return:    String with the description, empty if the default options are used
+        """
+        features = []
+        if self.operator_decomposition:
+            features.append('OD')
+        if self.packed_states:
+            features.append('packed states')
+        if self.frontier is not FrontierType.Heap:
+            features.append(f'{self.frontier.value} frontier')
+        if self.conflict_free_operators:
+            features.append('conflict-free operators')
+        if self.operator_cache_memory > 0:
+            features.append(f'operator cache {self.operator_cache_memory // (1024 * 1024)} MiB')
+        if self.delta_f_layers:
+            features.append('Δf layers')
+        if self.debug_checks:
+            features.append('debug checks')
+        if self.node_limit > 0:
+            features.append(f'node limit {self.node_limit}')
+        if self.focal_weight > 1:
+            features.append(f'focal w={self.focal_weight:g}')
+        if self.compact_parents:
+            features.append('compact parents')
+        if self.profile:
+            features.append('profiling')
+        if self.search_cache_memory > 0:
+            features.append(f'search cache {self.search_cache_memory // (1024 * 1024)} MiB')
+        if self.batch_children:
+            features.append('batched children')
+        if self.spill_distance > 0:
+            features.append(f'spill distance {self.spill_distance}')
+        if self.workers > 1:
+            features.append(f'{self.workers} workers')
+        if self.iterative_deepening:
+            features.append('EPE-IDA*')
+            if self.transposition_table_size > 0:
+                features.append(f'transposition table {self.transposition_table_size}')
+        if self.subdimensional_expansion:
+            features.append('subdimensional expansion')
+        if self.record_statistics:
+            features.append('statistic records')
+        return f" ({', '.join(features)})" if features else ''
+
+    def get_node_class(self, subdimensional: bool = False) -> Type[Node]:
+        """
+        Selects the class of the nodes of a search, so the nodes only store the fields of the modes that are used
+        :param subdimensional:  Whether the search uses subdimensional expansion
+        :return:                The node class
+        """
+        if subdimensional:
+            return SubdimensionalNode
+        if self.delta_f_layers:
+            return LayeredNode
+        return Node
+
+    def create_operator_cache(self, stat_tracker: StatisticTracker) -> Optional[OperatorCache]:
+        """
+        Creates the operator cache that is shared by all searches on a problem
+        :param stat_tracker:    Statistic tracker that counts the hits, misses and evictions of the cache
+        :return:                Empty operator cache, or None if the cache is disabled
+        """
+        if self.operator_cache_memory > 0:
+            return OperatorCache(self.operator_cache_memory, stat_tracker)
+        return None
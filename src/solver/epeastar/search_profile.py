@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, List, Iterator, Iterable, Callable, Set
+
+from src.util.node import Node
+
+# Phases of the search. Time is always attributed to the innermost phase, so the times add up to the search time.
+# operators:    Operator finder and the iteration over its operators
+# children:     Conflict checks, duplicate checks and the construction of child states
+# collisions:   Collision avoidance table lookups
+# heuristic:    Heuristic computations from scratch
+# frontier:     Open list operations
+# search:       Everything else in the main loop of EPEA*
+PHASES = ('search', 'operators', 'children', 'collisions', 'heuristic', 'frontier')
+
+# expansions:           Number of (partial) expansions, including single agent expansions with operator decomposition
+# re_expansions:        Expansions of nodes that had already been expanded before with a lower Δf value
+# reopened_expansions:  Expansions of nodes that have been re-opened because their children were collapsed
+# generated:            Candidate children produced by the operators
+# lookups:              Candidate children that passed the conflict checks and were looked up in the closed table
+# children:             Children that were added to the open list
+# intermediate_children:  Children added to the open list that are intermediate nodes of operator decomposition
+# frontier_pops:        Nodes popped from the open list
+# frontier_peak:        Highest number of nodes in the open list
+COUNTERS = ('expansions', 're_expansions', 'reopened_expansions', 'generated', 'lookups', 'children',
+            'intermediate_children', 'frontier_pops', 'frontier_peak')
+
+
+class SearchProfile:
+    """
+    Phase timers and counters of EPEA* searches.
+    The profile is only attached when it is enabled in the search options. It then replaces methods of the problem and
+    the open list of a search by timed wrappers for the duration of the search, so the search code itself does not
+    contain any instrumentation and runs at full speed when profiling is off. One profile accumulates all searches
+    that share a statistic tracker.
+    """
+
+    __slots__ = 'times', 'counts', 'stack', 'last', 'reopened'
+
+    def __init__(self):
+        """
+        Constructs an empty SearchProfile
+        """
+        self.times: Dict[str, float] = dict((phase, 0.0) for phase in PHASES)
+        self.counts: Dict[str, int] = dict((counter, 0) for counter in COUNTERS)
+        self.stack: List[str] = []
+        self.last = 0.0
+        # Nodes that have been re-opened by collapsing their children and have not been expanded since
+        self.reopened: Set[Node] = set()
+
+    def enter(self, phase: str) -> None:
+        """
+        Starts a phase within the current phase
+        :param phase:   Name of the phase
+        """
+        now = perf_counter()
+        self.times[self.stack[-1]] += now - self.last
+        self.stack.append(phase)
+        self.last = now
+
+    def exit(self) -> None:
+        """
+        Ends the current phase and continues with the phase that contains it
+        """
+        now = perf_counter()
+        self.times[self.stack.pop()] += now - self.last
+        self.last = now
+
+    def timed(self, function: Callable, phase: str) -> Callable:
+        """
+        Wraps a function so that its calls are attributed to a phase
+        :param function:    The function
+        :param phase:       Name of the phase
+        :return:            The wrapped function
+        """
+        def wrapper(*args):
+            self.enter(phase)
+            try:
+                return function(*args)
+            finally:
+                self.exit()
+        return wrapper
+
+    def timed_iterator(self, iterator: Iterable, phase: str, counter: str) -> Iterator:
+        """
+        Wraps a lazy iterator so that the production of its items is attributed to a phase
+        :param iterator:    The iterator
+        :param phase:       Name of the phase
+        :param counter:     Counter that is incremented for every item
+        :return:            Iterator over the same items
+        """
+        iterator = iter(iterator)
+        counts = self.counts
+        while True:
+            self.enter(phase)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            counts[counter] += 1
+            yield item
+
+    @contextmanager
+    def instrument(self, solver) -> Iterator[None]:
+        """
+        Attaches the profile to an EPEAStar solver for the duration of a search
+        :param solver:  The solver
+        """
+        problem = solver.problem
+        counts = self.counts
+        wrapped = []
+
+        def wrap(owner, name: str, wrapper: Callable) -> None:
+            if hasattr(owner, name):
+                setattr(owner, name, wrapper)
+                wrapped.append((owner, name))
+
+        def count_expansion(node: Node) -> None:
+            counts['expansions'] += 1
+            if node.delta_f > 0:
+                counts['re_expansions'] += 1
+            if node in self.reopened:
+                self.reopened.discard(node)
+                counts['reopened_expansions'] += 1
+
+        def expand(node, closed, search_options):
+            count_expansion(node)
+            return problem_expand(node, closed, search_options)
+
+        def expand_agent(node, closed):
+            count_expansion(node)
+            return problem_expand_agent(node, closed)
+
+        def expand_batch(node, closed, search_options, collision_table):
+            count_expansion(node)
+            return timed_expand_batch(node, closed, search_options, collision_table)
+
+        def select_children(parent, children, closed, check_conflicts=True):
+            # The operators produce the candidate children lazily while they are selected
+            children = self.timed_iterator(children, 'operators', 'generated')
+            children = problem_select_children(parent, children, CountingClosedTable(closed, counts), check_conflicts)
+            return self.count_children(self.timed_iterator(children, 'children', 'children'))
+
+        def select_batch(parent, batch, closed, check_conflicts, collisions):
+            counts['generated'] += len(batch)
+            children = problem_select_batch(parent, batch, CountingClosedTable(closed, counts), check_conflicts,
+                                            collisions)
+            return self.timed_iterator(children, 'children', 'children')
+
+        def select_agent_children(node, agent, base_cells, targets, closed):
+            counts['generated'] += len(targets)
+            children = problem_select_agent_children(node, agent, base_cells, targets,
+                                                     CountingClosedTable(closed, counts))
+            return self.count_children(self.timed_iterator(children, 'children', 'children'))
+
+        problem_expand = problem.expand
+        problem_expand_agent = getattr(problem, 'expand_agent', None)
+        timed_expand_batch = self.timed(problem.expand_batch, 'operators') if hasattr(problem, 'expand_batch') else None
+        problem_select_children = problem.select_children
+        problem_select_batch = getattr(problem, 'select_batch', None)
+        problem_select_agent_children = getattr(problem, 'select_agent_children', None)
+        solver_create_frontier = solver.create_frontier
+
+        wrap(problem, 'expand', expand)
+        wrap(problem, 'expand_agent', expand_agent)
+        wrap(problem, 'expand_batch', expand_batch)
+        wrap(problem, 'get_children', self.timed(problem.get_children, 'operators'))
+        wrap(problem, 'select_children', select_children)
+        wrap(problem, 'select_batch', select_batch)
+        wrap(problem, 'select_agent_children', select_agent_children)
+        for name in ('get_collisions', 'get_agent_collisions'):
+            if hasattr(problem, name):
+                wrap(problem, name, self.timed(getattr(problem, name), 'collisions'))
+        wrap(problem, 'get_heuristic', self.timed(problem.get_heuristic, 'heuristic'))
+        wrap(solver, 'create_frontier', lambda: ProfiledFrontier(solver_create_frontier(), self))
+
+        self.stack = ['search']
+        self.last = perf_counter()
+        try:
+            yield
+        finally:
+            self.times['search'] += perf_counter() - self.last
+            self.stack = []
+            for owner, name in wrapped:
+                delattr(owner, name)
+
+    def count_children(self, children: Iterator[tuple]) -> Iterator[tuple]:
+        """
+        Counts the intermediate nodes of operator decomposition among the children, which have no key
+        :param children:    Iterator over the children with their key
+        :return:            Iterator over the same children
+        """
+        counts = self.counts
+        for child in children:
+            if child[0] is None:
+                counts['intermediate_children'] += 1
+            yield child
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Collects the counters and phase times of the profile
+        :return:    Dictionary with every counter, the number of children pruned by the conflict and duplicate checks
+                    and the time in seconds of every phase
+        """
+        counts = self.counts
+        result: Dict[str, float] = dict(counts)
+        result['conflicts'] = counts['generated'] - counts['lookups'] - counts['intermediate_children']
+        result['duplicates'] = counts['lookups'] - (counts['children'] - counts['intermediate_children'])
+        for phase, duration in self.times.items():
+            result[f'{phase}_time'] = duration
+        return result
+
+
+class CountingClosedTable:
+    """
+    Closed table proxy that counts the duplicate checks of the children
+    """
+
+    __slots__ = 'table', 'counts'
+
+    def __init__(self, table: Dict, counts: Dict[str, int]):
+        """
+        Constructs a CountingClosedTable instance
+        :param table:   The closed table of the search
+        :param counts:  Counters of the profile
+        """
+        self.table = table
+        self.counts = counts
+
+    def get(self, key):
+        self.counts['lookups'] += 1
+        return self.table.get(key)
+
+
+class ProfiledFrontier:
+    """
+    Open list proxy that times the operations on the open list that it wraps and tracks its peak size
+    """
+
+    __slots__ = 'frontier', 'profile'
+
+    def __init__(self, frontier, profile: SearchProfile):
+        """
+        Constructs a ProfiledFrontier instance
+        :param frontier:    The open list
+        :param profile:     The profile
+        """
+        self.frontier = frontier
+        self.profile = profile
+
+    def push(self, node: Node) -> None:
+        profile = self.profile
+        profile.enter('frontier')
+        self.frontier.push(node)
+        profile.exit()
+        size = len(self.frontier)
+        if size > profile.counts['frontier_peak']:
+            profile.counts['frontier_peak'] = size
+
+    def pop(self) -> Node:
+        profile = self.profile
+        profile.enter('frontier')
+        node = self.frontier.pop()
+        profile.exit()
+        profile.counts['frontier_pops'] += 1
+        return node
+
+    def get_lower_bound(self) -> int:
+        profile = self.profile
+        profile.enter('frontier')
+        lower_bound = self.frontier.get_lower_bound()
+        profile.exit()
+        return lower_bound
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.frontier)
@@ -0,0 +1,168 @@
+from heapq import heappush, heappop
+from time import perf_counter
+from typing import List, Optional, Tuple, Dict
+
+from src.solver.epeastar.heuristic import UNREACHABLE
+from src.solver.epeastar.mapf_problem import MAPFProblem
+from src.solver.epeastar.search_options import SearchOptions
+from src.util.agent import Agent
+from src.util.cat import CAT
+from src.util.coordinate import Coordinate
+from src.util.deadline import Deadline
+from src.util.direction import Direction
+from src.util.path import Path
+from src.util.statistic_tracker import StatisticTracker, SearchStatistics
+
+
+class SpaceTimeAStar:
+    """
+    Space-time A* for a group of a single agent, which replaces EPEA* for the many singleton searches of independence
+    detection and exhaustive matching.
+    The search runs over flat grid cell indices and reads the moves of a cell directly from the rows of its PDB table,
+    so no operators, states or lookup tables are created. Like EPEA*, a node only generates the neighbors of one row
+    at a time and is added to the open list again with the Δf value of the next row, which saves the lookups in the
+    collision avoidance tables of most neighbors. Nodes are ordered on value, collisions with the collision avoidance
+    tables and heuristic, like the nodes of EPEA*.
+    A single agent never gains from waiting: it would pay 1 without getting closer to a goal, and the search ends as
+    soon as the agent reaches a goal. The time step of a node is therefore its cost minus 1 (the path includes the start
+    cell), and a cell identifies the state just like a packed state identifies the state in EPEA*. The costs are the
+    same as those of EPEA*.
+    Of the search options, only the debug checks apply. The search is optimal, so it also meets the bound of focal
+    search, and the other options only affect the representation and memory of multi-agent searches.
+    """
+
+    def __init__(self,
+                 problem: MAPFProblem,
+                 agent: Agent,
+                 cats: List[CAT],
+                 stat_tracker: StatisticTracker,
+                 max_cost=float('inf'),
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None):
+        """
+        Constructs a SpaceTimeAStar instance.
+        :param problem:         The MAPFProblem that should be solved
+        :param agent:           The moving agent
+        :param cats:            Collision avoidance tables
+        :param stat_tracker:    Statistic tracker
+        :param max_cost:        The maximum cost of the solution. Stop the solver if exceeded.
+        :param search_options:  Options of the search, of which only the debug checks are used
+        :param deadline:        Deadline after which the search is aborted with SolverTimeout
+        """
+        self.problem = problem
+        self.agent = agent
+        self.cats = cats
+        self.ignored_paths = [agent.identifier]
+        self.stat_tracker = stat_tracker
+        self.max_cost = max_cost
+        self.debug_checks = search_options is not None and search_options.debug_checks
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.width = problem.heuristic.heuristic[agent.color].shape[1]
+        self.statistics: Optional[SearchStatistics] = None
+
+    def solve(self) -> Optional[Tuple[List[Path], int]]:
+        """
+        Solves the problem instance for the agent.
+        The statistics of the search are reported to the statistic tracker, also when the search is aborted.
+        :return: Path of the agent if a solution was found, otherwise None
+        """
+        self.statistics = SearchStatistics(1)
+        start_time = perf_counter()
+        try:
+            solution = self.search()
+        finally:
+            self.statistics.time = perf_counter() - start_time
+            self.stat_tracker.search_finished(self.statistics)
+        if solution is not None:
+            self.statistics.cost = solution[1]
+        return solution
+
+    def search(self) -> Optional[Tuple[List[Path], int]]:
+        """
+        Runs the main loop of A*
+        :return: Path of the agent if a solution was found, otherwise None
+        """
+        color = self.agent.color
+        # Flat view of the heuristic table, indexed with cell indices
+        heuristic = self.problem.heuristic.heuristic[color].ravel()
+        pdb = self.problem.osf.pdb[color]
+        goal_grid = self.problem.goal_grids[color]
+        width = self.width
+        cats = self.cats
+        ignored_paths = self.ignored_paths
+        max_cost = self.max_cost
+        statistics = self.statistics
+        check_interval = self.deadline.check_interval
+        debug_checks = self.debug_checks
+
+        start = self.agent.coord.y * width + self.agent.coord.x
+        start_heuristic = heuristic.item(start)
+        if start_heuristic == UNREACHABLE or 1 + start_heuristic >= max_cost:
+            return None
+        # Lowest cost and parent cell of every generated cell
+        closed: Dict[int, int] = {start: 1}
+        parents: Dict[int, int] = {start: -1}
+        # Entries are (value, collisions, heuristic, cell, cost, row), so they are ordered like the nodes of EPEA*. The
+        # row is the index of the next row of the PDB table of the cell that is expanded.
+        frontier = [(1 + start_heuristic, 0, start_heuristic, start, 1, 0)]
+        try:
+            while frontier:
+                if len(frontier) > statistics.frontier_peak:
+                    statistics.frontier_peak = len(frontier)
+                value, collisions, h, cell, cost, row = heappop(frontier)
+                if value >= max_cost:
+                    return None
+                if cost > closed[cell]:
+                    continue
+                y, x = divmod(cell, width)
+                if goal_grid[y][x]:
+                    self.stat_tracker.solution_found(cost, value)
+                    return self.get_path(cell, parents), cost
+
+                statistics.expanded += 1
+                if statistics.expanded % check_interval == 0:
+                    self.deadline.check()
+                if row > 0:
+                    statistics.re_expansions += 1
+                table = pdb[y][x]
+                if row + 1 < len(table) and cost + h + table[row + 1][1] < max_cost:
+                    heappush(frontier, (cost + h + table[row + 1][1], collisions, h, cell, cost, row + 1))
+
+                # Time step of the children, which is equal to the cost of the node
+                time = cost
+                child_cost = cost + 1
+                for direction in table[row][0]:
+                    # Waiting and reaching a cell with the same or a higher cost never improve the solution
+                    if direction is Direction.WAIT:
+                        continue
+                    dx, dy = direction.value
+                    target = cell + dy * width + dx
+                    if closed.get(target, child_cost + 1) <= child_cost:
+                        continue
+                    coordinate = Coordinate(x + dx, y + dy)
+                    child_heuristic = heuristic.item(target)
+                    if debug_checks:
+                        assert child_cost + child_heuristic == cost + h + table[row][1]
+                    child_collisions = sum(cat.get_cat(ignored_paths, coordinate, time) for cat in cats)
+                    closed[target] = child_cost
+                    parents[target] = cell
+                    heappush(frontier, (child_cost + child_heuristic, child_collisions, child_heuristic, target,
+                                        child_cost, 0))
+                    statistics.generated += 1
+            return None
+        finally:
+            statistics.closed_size = len(closed)
+
+    def get_path(self, cell: int, parents: Dict[int, int]) -> List[Path]:
+        """
+        Reconstructs the path of the agent from the parent cells
+        :param cell:    The goal cell in which the path ends
+        :param parents: Parent cell of every generated cell, -1 for the start cell
+        :return:        List with the path of the agent
+        """
+        path = []
+        while cell != -1:
+            path.append((cell % self.width, cell // self.width))
+            cell = parents[cell]
+        path.reverse()
+        return [Path(path, self.agent.identifier)]
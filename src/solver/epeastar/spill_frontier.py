@@ -0,0 +1,192 @@
+import mmap
+import os
+import shutil
+import tempfile
+import weakref
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List, Iterator, Optional, Type
+
+from src.solver.epeastar.frontier import FocalFrontier
+from src.solver.epeastar.mapf_problem import COST_SHIFT, FULLY_EXPANDED
+from src.util.node import Node
+from src.util.statistic_tracker import StatisticTracker
+
+# Number of integers in the write buffer of a spilled bucket before it is appended to its file
+SPILL_BUFFER_SIZE = 1 << 16
+# Number of integers in a record after the cells and the waiting costs of the agents
+RECORD_FIELDS = 7
+
+
+class SpillFrontier:
+    """
+    Open list that keeps the nodes near the current f-value in memory and spills the nodes far above it to disk.
+    Nodes with a value of at least the spill distance above the current f-layer are stored in a bucket per value as
+    records of 32-bit integers: the cells and waiting costs of the agents, followed by the cost, heuristic, collisions,
+    time, Δf value, arena index of the parent and number of agents on a goal. The records of a bucket are buffered and
+    appended to a file of the bucket when the buffer is full.
+    When the search reaches the value of a bucket, its file is memory-mapped and its nodes are moved to the open list
+    in memory. Nodes whose state has been fully expanded or reached with a lower cost since they were spilled are
+    discarded at that point (delayed duplicate detection), so they never return to memory.
+    Records only contain packed states and arena indices, so the search must use packed states and compact parents.
+    The reachable Δf values of spilled nodes are not stored and are computed again on their next expansion.
+    The files are removed when the open list is freed.
+    """
+
+    __slots__ = 'frontier', 'closed', 'distance', 'num_agents', 'stat_tracker', 'directory', 'buffers', 'values', \
+        'layer', 'spilled', 'margin', 'node_class', 'finalizer', '__weakref__'
+
+    def __init__(self, frontier, closed: Dict, distance: int, num_agents: int, node_class: Type[Node],
+                 stat_tracker: StatisticTracker, directory: Optional[str] = None):
+        """
+        Constructs an empty SpillFrontier
+        :param frontier:        Open list that keeps the nodes in memory
+        :param closed:          Closed table of the search, against which reloaded nodes are checked
+        :param distance:        Minimum distance between the value of a spilled node and the current f-layer
+        :param num_agents:      Number of agents in the states of the search
+        :param node_class:      Class of the nodes of the search, with which the reloaded nodes are created
+        :param stat_tracker:    Statistic tracker that counts the spilled and discarded nodes
+        :param directory:       Directory in which the files are created, the default temporary directory if None
+        """
+        assert distance > 0
+        self.frontier = frontier
+        self.closed = closed
+        self.distance = distance
+        self.num_agents = num_agents
+        self.node_class = node_class
+        self.stat_tracker = stat_tracker
+        self.directory = tempfile.mkdtemp(prefix='epeastar-', dir=directory)
+        self.finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        # Write buffer of every spilled bucket, and a heap of the values of the buckets
+        self.buffers: Dict[int, array] = dict()
+        self.values: List[int] = []
+        # Highest value that has been popped
+        self.layer = 0
+        self.spilled = 0
+        # The lower bound of focal search is an admissible value, which can be up to the number of agents below the
+        # value of a node, so buckets are reloaded once their value is within that distance of the lower bound
+        self.margin = num_agents if isinstance(frontier, FocalFrontier) else 0
+
+    def push(self, node: Node) -> None:
+        """
+        Adds a node to the open list in memory, or to its bucket on disk if its value is far above the current f-layer
+        :param node:    The node
+        """
+        value = node.value
+        if value < self.layer + self.distance:
+            self.frontier.push(node)
+            return
+        buffer = self.buffers.get(value)
+        if buffer is None:
+            buffer = array('i')
+            self.buffers[value] = buffer
+            heappush(self.values, value)
+        buffer.extend(node.state)
+        buffer.extend(node.waiting_costs)
+        buffer.extend((node.cost, node.heuristic, node.collisions, node.time, node.delta_f, node.parent,
+                       node.agents_on_goal))
+        self.spilled += 1
+        self.stat_tracker.frontier_spilled()
+        if len(buffer) >= SPILL_BUFFER_SIZE:
+            with open(self.get_file(value), 'ab') as file:
+                buffer.tofile(file)
+            del buffer[:]
+
+    def pop(self) -> Node:
+        """
+        Removes and returns the node with the lowest value, collisions and heuristic
+        :return:    The node
+        """
+        self.reload()
+        node = self.frontier.pop()
+        if node.value > self.layer:
+            self.layer = node.value
+        return node
+
+    def get_lower_bound(self) -> int:
+        """
+        Returns the lower bound of the open list in memory, after the buckets that can affect it have been reloaded
+        :return:    The lower bound of the open list in memory
+        """
+        self.reload()
+        return self.frontier.get_lower_bound()
+
+    def reload(self) -> None:
+        """
+        Moves the spilled buckets with the lowest value to memory until the open list in memory contains the node with
+        the lowest value, and discards the reloaded nodes whose state is fully expanded or has been reached with a
+        lower cost
+        """
+        values = self.values
+        frontier = self.frontier
+        closed = self.closed
+        n = self.num_agents
+        while values and (not frontier or values[0] - self.margin <= frontier.get_lower_bound()):
+            value = heappop(values)
+            discarded = 0
+            for record in self.read_bucket(value):
+                self.spilled -= 1
+                state = tuple(record[:n])
+                cost = record[2 * n]
+                entry = closed[state]
+                if entry & FULLY_EXPANDED or cost > entry >> COST_SHIFT:
+                    discarded += 1
+                    continue
+                frontier.push(self.create_node(record, state))
+            del self.buffers[value]
+            path = self.get_file(value)
+            if os.path.exists(path):
+                os.remove(path)
+            self.stat_tracker.spill_duplicates_discarded(discarded)
+
+    def read_bucket(self, value: int) -> Iterator[List[int]]:
+        """
+        Reads the records of a spilled bucket from its memory-mapped file and its write buffer one at a time, so the
+        bucket is never in memory as a whole
+        :param value:   Value of the bucket
+        :return:        Iterator over the records
+        """
+        size = 2 * self.num_agents + RECORD_FIELDS
+        path = self.get_file(value)
+        if os.path.exists(path):
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view, view.cast('i') as integers:
+                    for i in range(0, len(integers), size):
+                        yield integers[i:i + size].tolist()
+        buffer = self.buffers[value]
+        for i in range(0, len(buffer), size):
+            yield buffer[i:i + size].tolist()
+
+    def create_node(self, record: List[int], state: tuple) -> Node:
+        """
+        Converts a record into a node
+        :param record:  The record
+        :param state:   The packed state of the record
+        :return:        The node
+        """
+        n = self.num_agents
+        cost, heuristic, collisions, time, delta_f, parent, agents_on_goal = record[2 * n:]
+        node = self.node_class(state, cost, heuristic, collisions, time, delta_f=delta_f, parent=parent,
+                               waiting_costs=tuple(record[n:2 * n]), agents_on_goal=agents_on_goal)
+        node.value += delta_f
+        return node
+
+    def get_file(self, value: int) -> str:
+        """
+        Determines the file of a spilled bucket
+        :param value:   Value of the bucket
+        :return:        Path of the file
+        """
+        return os.path.join(self.directory, f'{value}.bin')
+
+    def __len__(self):
+        if not self.frontier and self.values:
+            # The spilled nodes may all turn out to be duplicates
+            self.reload()
+        return len(self.frontier) + self.spilled
+
+    def __iter__(self) -> Iterator[Node]:
+        yield from self.frontier
+        for value in self.values:
+            for record in self.read_bucket(value):
+                yield self.create_node(record, tuple(record[:self.num_agents]))
@@ -6,13 +6,16 @@ from typing import List, Iterator, Tuple, Optional
 
 from mapfmclient import MarkedLocation
 
-from src.solver.epeastar.epeastar import EPEAStar
 from src.solver.epeastar.heuristic import Heuristic
 from src.solver.epeastar.independence_detection import IDSolver
+from src.solver.epeastar.low_level_solver import create_solver
 from src.solver.epeastar.mapf_problem import MAPFProblem
 from src.solver.epeastar.pdb_generator import PDB
+from src.solver.epeastar.search_cache import SearchCache
+from src.solver.epeastar.search_options import SearchOptions
 from src.util.agent import Agent
 from src.util.coordinate import Coordinate
+from src.util.deadline import Deadline
 from src.util.goal_assignment import GoalAssignment
 from src.util.grid import Grid
 from src.util.group import Group
@@ -46,7 +49,9 @@ class ExhaustiveMatchingSolver:
                  stat_tracker: StatisticTracker,
                  num_stored_problems: int = 0,
                  sorting: bool = False,
-                 independence_detection: bool = True):
+                 independence_detection: bool = True,
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None):
         """
         Constructs the ExhaustiveMatchingSolver object
         :param grid:                    The 2d grid on which the agents move
@@ -60,10 +65,14 @@ class ExhaustiveMatchingSolver:
         :param stat_tracker             Statistic tracker
         :param sorting                  Whether goal assignments should be sorted on initial heuristic
         :param independence_detection   Whether the MAPF solver should use independence detection (ID)
+        :param search_options           Options that select the variant of EPEA*
+        :param deadline                 Deadline after which the solver is aborted with SolverTimeout
         """
         self.num_stored_problems = num_stored_problems
         self.sorting = sorting
         self.independence_detection = independence_detection
+        self.search_options = search_options
+        self.deadline = deadline if deadline is not None else Deadline()
         self.stat_tracker = stat_tracker
 
         # Convert starting positions to agents
@@ -86,7 +95,13 @@ class ExhaustiveMatchingSolver:
         self.goal_assignments: Iterator[Tuple[int, ...]] = filter(lambda x: len(set(x)) == len(self.colored_agents),
                                                                   itertools.product(*goal_ids))
 
-        self.problem = MAPFProblem(self.goals, osf, heuristic)
+        operator_cache = search_options.create_operator_cache(stat_tracker) if search_options is not None else None
+        self.problem = MAPFProblem(self.goals, osf, heuristic, operator_cache)
+        # Searches of groups of agents that appear in multiple goal assignments are resumed instead of restarted
+        self.search_cache = None
+        if independence_detection and search_options is not None and search_options.search_cache_memory > 0 and \
+                not search_options.iterative_deepening:
+            self.search_cache = SearchCache(search_options.search_cache_memory, stat_tracker)
 
     def solve(self) -> List[Path]:
         """
@@ -205,11 +220,15 @@ class ExhaustiveMatchingSolver:
             # Goal id is equal to the goal color in exhaustive matching
             agents.append(Agent(agent.coord, goal_id, agent.identifier))
 
-        self.stat_tracker.assignment_evaluated()
+        self.deadline.check()
+        self.stat_tracker.assignment_evaluated(goal_assignment)
         if self.independence_detection:
-            solver = IDSolver(self.problem, agents, None, self.stat_tracker, min_cost)
+            solver = IDSolver(self.problem, agents, None, self.stat_tracker, min_cost,
+                              search_options=self.search_options, deadline=self.deadline,
+                              search_cache=self.search_cache)
         else:
-            solver = EPEAStar(self.problem, agents, [], self.stat_tracker, min_cost)
+            solver = create_solver(self.problem, agents, [], self.stat_tracker, min_cost,
+                                   search_options=self.search_options, deadline=self.deadline)
 
         return solver.solve()
 
@@ -222,6 +241,6 @@ class ExhaustiveMatchingSolver:
         res = 0
         for agent_id, goal_id in enumerate(goal_assignment):
             # Include the cost of the starting position since that is also done in the real cost
-            res += 1 + self.problem.heuristic.heuristic[self.goals[goal_id].color][
-                self.colored_agents[agent_id].coord.y][self.colored_agents[agent_id].coord.x]
+            coord = self.colored_agents[agent_id].coord
+            res += 1 + self.problem.heuristic.heuristic[self.goals[goal_id].color].item(coord.y, coord.x)
         return res
@@ -1,14 +1,17 @@
+from time import perf_counter
 from typing import Optional, List, Tuple
 
 from mapfmclient import Problem
 
-from src.solver.epeastar.epeastar import EPEAStar
 from src.solver.epeastar.heuristic import Heuristic
 from src.solver.epeastar.independence_detection import IDSolver
+from src.solver.epeastar.low_level_solver import create_solver
 from src.solver.epeastar.mapf_problem import MAPFProblem
 from src.solver.epeastar.pdb_generator import PDB
+from src.solver.epeastar.search_options import SearchOptions
 from src.util.agent import Agent
 from src.util.coordinate import Coordinate
+from src.util.deadline import Deadline, SolverTimeout
 from src.util.grid import Grid
 from src.util.path import Path
 from src.util.statistic_tracker import StatisticTracker
@@ -21,29 +24,41 @@ class HeuristicMatchingSolver:
     same color.
     """
 
-    def __init__(self, problem: Problem, independence_detection=True):
+    def __init__(self, problem: Problem, independence_detection=True, search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None):
         """
         Constructs a HeuristicMatchingSolver instance
         :param problem:                The MAPFM problem that has to be solved
         :param independence_detection: Whether Independence Detection (ID) should be used
+        :param search_options:         Options that select the variant of EPEA*
+        :param deadline:               Deadline after which the solver stops
         """
-        self.stat_tracker = StatisticTracker()
+        self.stat_tracker = StatisticTracker(search_options is not None and search_options.record_statistics)
         self.problem = problem
         self.independence_detection = independence_detection
         agents = [Agent(Coordinate(s.x, s.y), s.color, i) for i, s in enumerate(problem.starts)]
         self.grid = Grid(problem.width, problem.height, problem.grid)
 
+        start_time = perf_counter()
         heuristic = Heuristic(self.grid, problem.goals)
         osf = PDB(heuristic, self.grid)
-        mapf_problem = MAPFProblem(problem.goals, osf, heuristic)
+        self.stat_tracker.precomputation_finished(perf_counter() - start_time)
+        operator_cache = search_options.create_operator_cache(self.stat_tracker) if search_options is not None else None
+        mapf_problem = MAPFProblem(problem.goals, osf, heuristic, operator_cache)
         if self.independence_detection:
-            self.solver = IDSolver(mapf_problem, agents, None, self.stat_tracker)
+            self.solver = IDSolver(mapf_problem, agents, None, self.stat_tracker, search_options=search_options,
+                                   deadline=deadline)
         else:
-            self.solver = EPEAStar(mapf_problem, agents, [], self.stat_tracker)
+            self.solver = create_solver(mapf_problem, agents, [], self.stat_tracker, search_options=search_options,
+                                        deadline=deadline)
 
     def solve(self) -> Tuple[Optional[List[Path]], StatisticTracker]:
         """
         Solves the problem with which the solver instance was instantiated
-        :return:    Solution if it was found
+        :return:    Solution if it was found and statistic tracker, which reports if the deadline has passed
         """
-        return self.solver.solve()[0], self.stat_tracker
+        try:
+            return self.solver.solve()[0], self.stat_tracker
+        except SolverTimeout:
+            self.stat_tracker.solver_timed_out()
+            return None, self.stat_tracker
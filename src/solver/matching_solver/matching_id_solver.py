@@ -1,12 +1,15 @@
+from time import perf_counter
 from typing import List, Optional, Iterator, Tuple
 
 from mapfmclient import Problem, MarkedLocation
 
 from src.solver.epeastar.heuristic import Heuristic
 from src.solver.epeastar.pdb_generator import PDB
+from src.solver.epeastar.search_options import SearchOptions
 from src.solver.matching_solver.exhaustive_matching_solver import ExhaustiveMatchingSolver
 from src.util.agent import Agent
 from src.util.cat import CAT
+from src.util.deadline import Deadline, SolverTimeout
 from src.util.grid import Grid
 from src.util.group import Group, Groups
 from src.util.path import Path
@@ -20,7 +23,9 @@ class MatchingIDSolver:
                  num_goal_assignments: int = 10000000,
                  sorting: bool = False,
                  independence_detection: bool = True,
-                 matching_id: bool = True):
+                 matching_id: bool = True,
+                 search_options: Optional[SearchOptions] = None,
+                 deadline: Optional[Deadline] = None):
         """
         Solves MAPFM problems
         :param problem:                 The MAPFM problem to solve
@@ -29,42 +34,56 @@ class MatchingIDSolver:
                                         initial heuristic
         :param independence_detection:  Indicates whether EPEA* should use independence detection
         :param matching_id:             Indicates whether exhaustive matching should use independence detection
+        :param search_options:          Options that select the variant of EPEA*
+        :param deadline:                Deadline after which the solver stops
         """
         self.num_stored_problems = num_goal_assignments
         self.sorting = sorting
         self.independence_detection = independence_detection
         self.matching_id = matching_id
+        self.search_options = search_options
+        self.deadline = deadline
         self.grid = Grid(problem.width, problem.height, problem.grid)
         self.starts = problem.starts
         self.goals = problem.goals
+        start_time = perf_counter()
         self.heuristic = Heuristic(self.grid, [MarkedLocation(i, ml.x, ml.y) for i, ml in enumerate(problem.goals)])
         self.osf = PDB(self.heuristic, self.grid)
+        # Time to compute the heuristic and the pattern database, which is reported to the statistic tracker
+        self.precomputation_time = perf_counter() - start_time
 
     def solve(self) -> Optional[Tuple[List[Path], StatisticTracker]]:
         """
         Solves the problem with which the solver was instantiated
-        :return:    List of paths in the solution and statistic tracker
-        """
-        if self.matching_id:
-            return self.id_solve()
-        else:
-            return self.standard_solve()
-
-    def standard_solve(self) -> Optional[Tuple[List[Path], StatisticTracker]]:
+        :return:    List of paths in the solution and statistic tracker. If the deadline has passed, there are no paths
+                    and the statistic tracker reports the timeout.
+        """
+        stat_tracker = StatisticTracker(self.search_options is not None and self.search_options.record_statistics)
+        stat_tracker.precomputation_finished(self.precomputation_time)
+        try:
+            if self.matching_id:
+                return self.id_solve(stat_tracker)
+            else:
+                return self.standard_solve(stat_tracker)
+        except SolverTimeout:
+            stat_tracker.solver_timed_out()
+            return None, stat_tracker
+
+    def standard_solve(self, stat_tracker: StatisticTracker) -> Optional[Tuple[List[Path], StatisticTracker]]:
         """
         Solves the problem without using matching independence detection.
-        :return:    List of paths in the solution and statistic tracker
+        :param stat_tracker:    Statistic tracker
+        :return:                List of paths in the solution and statistic tracker
         """
-        stat_tracker = StatisticTracker()
         solver = self.create_solver(Group(list(range(len(self.starts)))), stat_tracker)
         return solver.solve(), stat_tracker
 
-    def id_solve(self) -> Optional[Tuple[List[Path], StatisticTracker]]:
+    def id_solve(self, stat_tracker: StatisticTracker) -> Optional[Tuple[List[Path], StatisticTracker]]:
         """
         Solves the problem using matching independence detection.
-        :return:    List of paths in the solution and statistic tracker
+        :param stat_tracker:    Statistic tracker
+        :return:                List of paths in the solution and statistic tracker
         """
-        stat_tracker = StatisticTracker()
         max_team = max(map(lambda x: x.color, self.starts))
         teams = [list() for _ in range(max_team + 1)]
         for i, start in enumerate(self.starts):
@@ -108,7 +127,9 @@ class MatchingIDSolver:
             stat_tracker=stat_tracker,
             num_stored_problems=self.num_stored_problems,
             sorting=self.sorting,
-            independence_detection=self.independence_detection
+            independence_detection=self.independence_detection,
+            search_options=self.search_options,
+            deadline=self.deadline
         )
 
 
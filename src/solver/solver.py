@@ -5,6 +5,7 @@ from mapfmclient import Problem
 from src.solver.algorithm_descriptor import Algorithm, AlgorithmDescriptor
 from src.solver.matching_solver.heuristic_matching_solver import HeuristicMatchingSolver
 from src.solver.matching_solver.matching_id_solver import MatchingIDSolver
+from src.util.deadline import Deadline
 from src.util.path import Path
 from src.util.statistic_tracker import StatisticTracker
 
@@ -14,36 +15,45 @@ class Solver:
     Solves a MAPFM problem using the algorithm described at construction
     """
 
-    def __init__(self, problem: Problem, algorithm: AlgorithmDescriptor):
+    def __init__(self, problem: Problem, algorithm: AlgorithmDescriptor, deadline: Optional[Deadline] = None):
         """
         Constructs a Solver instance
         :param problem:     Problem that the solver should solve
         :param algorithm:   Description of the algorithm that should be used to solve the problem
+        :param deadline:    Deadline or cancellation token after which the solver stops
         """
         if algorithm.algorithm is Algorithm.ExhaustiveMatching:
             self.solver = MatchingIDSolver(problem,
                                            sorting=False,
                                            independence_detection=algorithm.id,
-                                           matching_id=False)
+                                           matching_id=False,
+                                           search_options=algorithm.search_options,
+                                           deadline=deadline)
         elif algorithm.algorithm is Algorithm.ExhaustiveMatchingSorting:
             self.solver = MatchingIDSolver(problem,
                                            num_goal_assignments=10000000,
                                            sorting=True,
                                            independence_detection=algorithm.id,
-                                           matching_id=False)
+                                           matching_id=False,
+                                           search_options=algorithm.search_options,
+                                           deadline=deadline)
         elif algorithm.algorithm is Algorithm.ExhaustiveMatchingSortingID:
             self.solver = MatchingIDSolver(problem,
                                            num_goal_assignments=10000000,
                                            sorting=True,
                                            independence_detection=algorithm.id,
-                                           matching_id=True)
+                                           matching_id=True,
+                                           search_options=algorithm.search_options,
+                                           deadline=deadline)
 
         elif algorithm.algorithm is Algorithm.HeuristicMatching:
-            self.solver = HeuristicMatchingSolver(problem, independence_detection=algorithm.id)
+            self.solver = HeuristicMatchingSolver(problem, independence_detection=algorithm.id,
+                                                  search_options=algorithm.search_options, deadline=deadline)
 
     def solve(self) -> Tuple[Optional[List[Path]], StatisticTracker]:
         """
         Runs the algorithm to solve the MAPFM problem
-        :return:    A path for every agent
+        :return:    A path for every agent and the statistic tracker. If the deadline has passed, there are no paths and
+                    StatisticTracker.timed_out is set, so a timeout can be told apart from an unsolvable problem.
         """
         return self.solver.solve()
@@ -0,0 +1,42 @@
+from typing import List, Tuple
+
+from src.util.agent import Agent
+from src.util.state import PackedState
+
+
+class AgentTable:
+    """
+    Static per-search table with the agent properties that do not change during the search.
+    Together with a packed state, which only contains the grid cell of every agent, it describes all agents.
+    """
+
+    __slots__ = 'colors', 'identifiers', 'width'
+
+    def __init__(self, agents: List[Agent], width: int):
+        """
+        Constructs an AgentTable instance
+        :param agents:  The agents of the search, in the order in which they appear in the packed states
+        :param width:   Width of the grid, used to convert coordinates to cell indices
+        """
+        self.colors: Tuple[int, ...] = tuple(agent.color for agent in agents)
+        self.identifiers: Tuple[int, ...] = tuple(agent.identifier for agent in agents)
+        self.width = width
+
+    def pack(self, agents: List[Agent]) -> PackedState:
+        """
+        Converts a list of agents into a packed state
+        :param agents:  Agents in the same order as in the table
+        :return:        Tuple with the grid cell index of every agent
+        """
+        return tuple(agent.coord.y * self.width + agent.coord.x for agent in agents)
+
+    def to_coordinates(self, cell: int) -> Tuple[int, int]:
+        """
+        Converts a grid cell index back to coordinates
+        :param cell:    Grid cell index
+        :return:        Tuple of the x and y coordinate
+        """
+        return cell % self.width, cell // self.width
+
+    def __len__(self):
+        return len(self.colors)
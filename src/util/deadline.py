@@ -0,0 +1,48 @@
+from time import perf_counter
+
+
+class SolverTimeout(Exception):
+    """
+    Raised inside the solvers when their deadline has passed or they have been cancelled
+    """
+
+
+class Deadline:
+    """
+    Cooperative deadline and cancellation token for the solvers.
+    The solvers check the token every check_interval expansions and between goal assignments, and abort with
+    SolverTimeout when it has expired. The top-level solvers catch the exception and report the timeout in their
+    statistic tracker, so the interrupted search is unwound and its memory is freed.
+    """
+
+    __slots__ = 'end_time', 'cancelled', 'check_interval'
+
+    def __init__(self, time_limit: float = float('inf'), check_interval: int = 256):
+        """
+        Constructs a Deadline instance
+        :param time_limit:      Wall-clock time in seconds from now after which the solvers are stopped
+        :param check_interval:  Number of expansions between two checks of the deadline in EPEA*
+        """
+        self.end_time = perf_counter() + time_limit
+        self.cancelled = False
+        self.check_interval = check_interval
+
+    def cancel(self) -> None:
+        """
+        Stops the solvers at their next check. Can be called from another thread.
+        """
+        self.cancelled = True
+
+    def expired(self) -> bool:
+        """
+        Checks if the solvers should stop
+        :return:    True if the token has been cancelled or the deadline has passed, otherwise false
+        """
+        return self.cancelled or perf_counter() >= self.end_time
+
+    def check(self) -> None:
+        """
+        Raises SolverTimeout if the solvers should stop
+        """
+        if self.expired():
+            raise SolverTimeout()
@@ -1,32 +1,52 @@
 from __future__ import annotations
 
-from src.util.state import State
+from typing import Optional, Tuple, Union
+
+from src.util.state import State, PackedState
 
 
 class Node:
     """
     A* tree search node
+    The fields of search modes that are not enabled by default are stored by subclasses. The node of the default search
+    reads their values from the class attributes below.
     """
 
-    __slots__ = 'state', 'cost', 'heuristic', 'collisions', 'value', 'delta_f', 'parent', 'time'
+    __slots__ = 'state', 'cost', 'heuristic', 'collisions', 'value', 'delta_f', 'parent', 'time', 'waiting_costs', \
+        'agents_on_goal'
+
+    # Index of the agent that moves next with operator decomposition, see ODNode
+    next_agent = 0
+    # Reachable Δf values of the operators of the node, see LayeredNode
+    reachable_sums: Optional[Tuple[int, ...]] = None
+    # Bit mask of the agents that branch with subdimensional expansion, see SubdimensionalNode
+    collision_set = 0
 
-    def __init__(self, state: State, cost: int, heuristic: int, collisions: int, time: int, delta_f=0, parent=None):
+    def __init__(self, state: Union[State, PackedState], cost: int, heuristic: int, collisions: int, time: int,
+                 delta_f=0, parent=None, waiting_costs: Optional[Tuple[int, ...]] = None, agents_on_goal: int = 0):
         """
         Constructs a Node instance
         :param state:       The state that is associated with this node
         :param cost:        The cost of reaching this node f(n)
         :param heuristic:   The heuristic h(n) (estimate of cost to reach the goal)
         :param delta_f:     Δf(n) value. Default value is zero, but this will be increased when the node is expanded.
-        :param parent:      Parent node. Used when finding the path in the final solution
+        :param parent:      Parent node. Used when finding the path in the final solution. With compact parents, the
+                            index of the node in the node arena of the search instead.
+        :param waiting_costs:   Waiting cost of every agent. Only used for packed states, since these do not contain
+                                Agent objects that keep track of their own waiting cost.
+        :param agents_on_goal:  Number of agents that are on a goal of their color. The state is a solution if all
+                                agents are on a goal.
         """
-        self.state: State = state
+        self.state: Union[State, PackedState] = state
         self.cost: int = cost
         self.heuristic: int = heuristic
         self.collisions: int = collisions
         self.value: int = cost + heuristic  # F(n) - Stored value. Will be larger than cost + heuristic when the node is collapsed
         self.time: int = time
         self.delta_f = delta_f
-        self.parent: Node = parent
+        self.parent: Union[Node, int] = parent
+        self.waiting_costs: Optional[Tuple[int, ...]] = waiting_costs
+        self.agents_on_goal: int = agents_on_goal
 
     def __lt__(self, other: Node):
         """
@@ -35,3 +55,59 @@ class Node:
         :returns:        True if the other node is less than this node, otherwise false
         """
         return (self.value, self.collisions, self.heuristic) < (other.value, other.collisions, other.heuristic)
+
+
+class ODNode(Node):
+    """
+    Intermediate node of operator decomposition, in which the agents before the next agent have already moved
+    """
+
+    __slots__ = 'next_agent'
+
+    def __init__(self, *args, next_agent: int = 0, **kwargs):
+        """
+        Constructs an ODNode instance
+        :param args:        Arguments of Node
+        :param next_agent:  Index of the agent that moves next. Zero for standard nodes, in which all agents are at the
+                            same time step.
+        :param kwargs:      Keyword arguments of Node
+        """
+        super().__init__(*args, **kwargs)
+        self.next_agent: int = next_agent
+
+
+class LayeredNode(Node):
+    """
+    Node of a search with Δf layers, which stores the reachable Δf values of its operators
+    """
+
+    __slots__ = 'reachable_sums'
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructs a LayeredNode instance
+        :param args:    Arguments of Node
+        :param kwargs:  Keyword arguments of Node
+        """
+        super().__init__(*args, **kwargs)
+        # Reachable Δf values of the operators of the node. Computed on the first expansion.
+        self.reachable_sums: Optional[Tuple[int, ...]] = None
+
+
+class SubdimensionalNode(LayeredNode):
+    """
+    Node of a search with subdimensional expansion, which stores the collision set of the node. Also stores the
+    reachable Δf values, since subdimensional expansion can be combined with Δf layers.
+    """
+
+    __slots__ = 'collision_set'
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructs a SubdimensionalNode instance
+        :param args:    Arguments of Node
+        :param kwargs:  Keyword arguments of Node
+        """
+        super().__init__(*args, **kwargs)
+        # Bit mask of the agents that branch when the node is expanded
+        self.collision_set = 0
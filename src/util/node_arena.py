@@ -0,0 +1,58 @@
+from array import array
+from typing import List, Tuple
+
+from src.util.direction import Direction
+
+# Every move of an agent is stored as the index of its direction in this tuple
+DIRECTIONS: Tuple[Direction, ...] = tuple(Direction)
+MOVE_CODES = dict((direction.value, i) for i, direction in enumerate(DIRECTIONS))
+
+
+class NodeArena:
+    """
+    Compact storage of the parent links of the search tree.
+    Every node is identified by an index in the arena, which stores the index of its parent and a move code for every
+    agent from the parent to the node. Paths are reconstructed by replaying the moves from the initial state, so the
+    nodes and states of the search tree do not have to be kept alive by their children.
+    """
+
+    __slots__ = 'parents', 'moves', 'num_agents'
+
+    def __init__(self, num_agents: int):
+        """
+        Constructs an empty NodeArena
+        :param num_agents:  Number of agents in the states of the search
+        """
+        self.parents = array('i')
+        self.moves = bytearray()
+        self.num_agents = num_agents
+
+    def add(self, parent: int, moves: bytes) -> int:
+        """
+        Adds a node to the arena
+        :param parent:  Arena index of the parent, -1 for the root
+        :param moves:   Move code of every agent from the parent to the node
+        :return:        Arena index of the node
+        """
+        self.parents.append(parent)
+        self.moves += moves
+        return len(self.parents) - 1
+
+    def get_moves(self, index: int) -> List[bytes]:
+        """
+        Collects the moves from the root to a node
+        :param index:   Arena index of the node
+        :return:        Move codes of every agent for every time step
+        """
+        n = self.num_agents
+        moves = []
+        parent = self.parents[index]
+        while parent >= 0:
+            moves.append(self.moves[index * n:(index + 1) * n])
+            index = parent
+            parent = self.parents[index]
+        moves.reverse()
+        return moves
+
+    def __len__(self):
+        return len(self.parents)
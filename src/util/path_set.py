@@ -22,8 +22,7 @@ class PathSet:
         self.costs: List[Optional[int]] = [None for _ in range(len(agents))]
 
         # Create CAT with the same dimensions as the heuristic function
-        width = len(heuristic.heuristic[agents[0].color][0])
-        height = len(heuristic.heuristic[agents[0].color])
+        height, width = heuristic.heuristic[agents[0].color].shape
         self.cat = CAT(agents, width, height, active=True)
 
     def update(self, new_paths: Iterator[Path]):
@@ -66,7 +65,7 @@ class PathSet:
         :return:                The minimum heuristic cost
         """
         agent = next(agent for agent in self.agents if agent.identifier == agent_id)
-        return self.heuristic.heuristic[agent.color][agent.coord.y][agent.coord.x]
+        return self.heuristic.heuristic[agent.color].item(agent.coord.y, agent.coord.x)
 
     def find_conflict(self) -> Optional[Tuple[int, int]]:
         """
@@ -1,7 +1,11 @@
-from typing import List
+from typing import List, Tuple
 
 from src.util.agent import Agent
 
+# Compact state representation in which every agent is represented by the index (y * width + x) of its grid cell.
+# The colors and identifiers of the agents are stored once per search in an AgentTable.
+PackedState = Tuple[int, ...]
+
 
 class State:
     """
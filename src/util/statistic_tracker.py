@@ -1,12 +1,240 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+
+class SearchStatistics:
+    """
+    Machine-independent statistics of a single low-level EPEA* search, which solves one group of agents
+    """
+
+    __slots__ = 'group_size', 'expanded', 'generated', 're_expansions', 'frontier_peak', 'closed_size', 'time', \
+        'cost'
+
+    def __init__(self, group_size: int):
+        """
+        Constructs an empty SearchStatistics instance
+        :param group_size:  Number of agents in the search
+        """
+        self.group_size = group_size
+        self.expanded = 0
+        self.generated = 0
+        self.re_expansions = 0
+        self.frontier_peak = 0
+        self.closed_size = 0
+        self.time = 0.0
+        self.cost: Optional[int] = None
+
+    def as_dict(self) -> Dict:
+        """
+        Converts the statistics into a dictionary
+        :return:    Dictionary with every statistic
+        """
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
+class AssignmentStatistics:
+    """
+    Statistics of the evaluation of a goal assignment, summed over all searches and merges of the evaluation
+    """
+
+    __slots__ = 'goal_assignment', 'searches', 'merges', 'expanded', 'generated', 're_expansions', 'frontier_peak', \
+        'closed_size', 'time'
+
+    def __init__(self, goal_assignment: Optional[Tuple[int, ...]]):
+        """
+        Constructs an empty AssignmentStatistics instance
+        :param goal_assignment: The goal of every agent
+        """
+        self.goal_assignment = goal_assignment
+        self.searches = 0
+        self.merges = 0
+        self.expanded = 0
+        self.generated = 0
+        self.re_expansions = 0
+        self.frontier_peak = 0
+        self.closed_size = 0
+        self.time = 0.0
+
+    def add_search(self, search: SearchStatistics) -> None:
+        """
+        Adds the statistics of a search of the evaluation
+        :param search:  The statistics of the search
+        """
+        self.searches += 1
+        self.expanded += search.expanded
+        self.generated += search.generated
+        self.re_expansions += search.re_expansions
+        self.frontier_peak = max(self.frontier_peak, search.frontier_peak)
+        self.closed_size += search.closed_size
+        self.time += search.time
+
+    def as_dict(self) -> Dict:
+        """
+        Converts the statistics into a dictionary
+        :return:    Dictionary with every statistic
+        """
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
 class StatisticTracker:
-    __slots__ = 'assignment_evaluation', 'max_group_size'
+    """
+    Collects the statistics of a solver run. By default, only the totals of the low-level searches are kept, so the
+    memory of the tracker does not grow with the number of searches. When records are enabled, the tracker also keeps
+    the statistics of every low-level search, every evaluated goal assignment and every merge, which can be exported
+    as JSON. Unlike the runtime, these statistics do not depend on the machine.
+    """
+
+    __slots__ = 'assignment_evaluation', 'max_group_size', 'operator_cache_hits', 'operator_cache_misses', \
+        'operator_cache_evictions', 'bounded_searches', 'collapsed_nodes', 'suboptimality', \
+        'timed_out', 'profile', 'merges', 'merge_sizes', 'precomputation_time', 'records', 'search_count', \
+        'expanded', 'generated', 're_expansions', 'frontier_peak', 'closed_peak', 'search_time', 'last_search', \
+        'searches', 'assignments', 'resumed_searches', 'spilled_nodes', 'spill_duplicates'
 
-    def __init__(self):
+    def __init__(self, records: bool = False):
+        """
+        Constructs an empty StatisticTracker
+        :param records: When set to true, the statistics of every search, goal assignment and merge are kept
+        """
         self.assignment_evaluation = 0
         self.max_group_size = 1
+        self.operator_cache_hits = 0
+        self.operator_cache_misses = 0
+        self.operator_cache_evictions = 0
+        self.bounded_searches = 0
+        self.collapsed_nodes = 0
+        self.suboptimality = 1.0
+        self.timed_out = False
+        # SearchProfile of the EPEA* searches, only set when profiling is enabled in the search options
+        self.profile = None
+        self.merges = 0
+        self.precomputation_time = 0.0
+        # Totals of the low-level searches, and the statistics of the last search
+        self.search_count = 0
+        self.expanded = 0
+        self.generated = 0
+        self.re_expansions = 0
+        self.frontier_peak = 0
+        self.closed_peak = 0
+        self.search_time = 0.0
+        self.last_search: Optional[SearchStatistics] = None
+        self.records = records
+        # Size of the new group of every merge of independence detection, and the statistics of every search and
+        # every evaluated goal assignment. Only kept when records are enabled.
+        self.merge_sizes: List[int] = []
+        self.searches: List[SearchStatistics] = []
+        self.assignments: List[AssignmentStatistics] = []
+        self.resumed_searches = 0
+        self.spilled_nodes = 0
+        self.spill_duplicates = 0
 
-    def assignment_evaluated(self):
+    def assignment_evaluated(self, goal_assignment: Optional[Tuple[int, ...]] = None):
         self.assignment_evaluation += 1
+        if self.records:
+            self.assignments.append(AssignmentStatistics(goal_assignment))
 
     def group_merged(self, group_size: int):
         self.max_group_size = max(self.max_group_size, group_size)
+        self.merges += 1
+        if self.records:
+            self.merge_sizes.append(group_size)
+            if self.assignments:
+                self.assignments[-1].merges += 1
+
+    def operator_cache_hit(self):
+        self.operator_cache_hits += 1
+
+    def operator_cache_missed(self):
+        self.operator_cache_misses += 1
+
+    def operator_cache_evicted(self):
+        self.operator_cache_evictions += 1
+
+    def search_bounded(self):
+        self.bounded_searches += 1
+
+    def nodes_collapsed(self, count: int):
+        self.collapsed_nodes += count
+
+    def solution_found(self, cost: int, lower_bound: int):
+        self.suboptimality = max(self.suboptimality, cost / lower_bound)
+
+    def solver_timed_out(self):
+        self.timed_out = True
+
+    def search_resumed(self):
+        self.resumed_searches += 1
+
+    def frontier_spilled(self):
+        self.spilled_nodes += 1
+
+    def spill_duplicates_discarded(self, count: int):
+        self.spill_duplicates += count
+
+    def precomputation_finished(self, duration: float):
+        self.precomputation_time += duration
+
+    def search_finished(self, search: SearchStatistics):
+        self.search_count += 1
+        self.expanded += search.expanded
+        self.generated += search.generated
+        self.re_expansions += search.re_expansions
+        self.frontier_peak = max(self.frontier_peak, search.frontier_peak)
+        self.closed_peak = max(self.closed_peak, search.closed_size)
+        self.search_time += search.time
+        self.last_search = search
+        if self.records:
+            self.searches.append(search)
+            if self.assignments:
+                self.assignments[-1].add_search(search)
+
+    def get_row(self) -> Dict:
+        """
+        Collects the totals of the run
+        :return:    Dictionary with a single value for every statistic
+        """
+        return {
+            'assignment_evaluation': self.assignment_evaluation,
+            'max_group_size': self.max_group_size,
+            'merges': self.merges,
+            'searches': self.search_count,
+            'resumed_searches': self.resumed_searches,
+            'expanded': self.expanded,
+            'generated': self.generated,
+            're_expansions': self.re_expansions,
+            'frontier_peak': self.frontier_peak,
+            'closed_peak': self.closed_peak,
+            'precomputation_time': self.precomputation_time,
+            'search_time': self.search_time,
+            'operator_cache_hits': self.operator_cache_hits,
+            'operator_cache_misses': self.operator_cache_misses,
+            'operator_cache_evictions': self.operator_cache_evictions,
+            'bounded_searches': self.bounded_searches,
+            'collapsed_nodes': self.collapsed_nodes,
+            'spilled_nodes': self.spilled_nodes,
+            'spill_duplicates': self.spill_duplicates,
+            'suboptimality': self.suboptimality,
+            'timed_out': self.timed_out,
+        }
+
+    def as_dict(self) -> Dict:
+        """
+        Collects all statistics of the run
+        :return:    Dictionary with the totals of get_row, the search profile if profiling was enabled and, if records
+                    are enabled, the merge sizes and the statistics of the search of every group and of every
+                    evaluated goal assignment
+        """
+        result = self.get_row()
+        if self.records:
+            result['merge_sizes'] = list(self.merge_sizes)
+            result['groups'] = [search.as_dict() for search in self.searches]
+            result['assignments'] = [assignment.as_dict() for assignment in self.assignments]
+        if self.profile is not None:
+            result['profile'] = self.profile.as_dict()
+        return result
+
+    def to_json(self) -> str:
+        """
+        Exports all statistics of the run
+        :return:    JSON object with the statistics of as_dict
+        """
+        return json.dumps(self.as_dict())